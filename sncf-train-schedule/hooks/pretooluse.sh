@@ -0,0 +1,107 @@
+#!/bin/bash
+# PreToolUse hook (Bash): token availability and hardcoded-token checks in one pass
+# Non-blocking — always exits 0, warns on stderr
+#
+# Runs on every Bash call, so it only uses shell builtins: no python3, grep or
+# sed is started, and commands that do not mention SNCF exit after one match.
+#
+# Usage: pretooluse.sh [--token-only | --security-only]
+
+MODE=${1:-all}
+KEYWORDS='(navitia|sncf|plan_journey|search_stations|get_departures|get_arrivals|validate_station|validate_datetime|travel_matrix|nearest_stations)'
+
+# Read the tool input from stdin
+IFS= read -r -d '' INPUT
+
+# Prefilter on the raw JSON: most calls have nothing to do with SNCF
+shopt -s nocasematch
+[[ $INPUT =~ $KEYWORDS ]] || exit 0
+
+# Extract the command string (JSON escapes are left in place: neither the
+# keywords nor the token pattern contain escapable characters)
+COMMAND_FIELD='"command"[[:space:]]*:[[:space:]]*"(([^"\\]|\\.)*)"'
+[[ $INPUT =~ $COMMAND_FIELD ]] || exit 0
+COMMAND=${BASH_REMATCH[1]}
+[[ $COMMAND =~ $KEYWORDS ]] || exit 0
+shopt -u nocasematch
+
+# Where the token comes from: a settings or .env file path, or "none".
+# Same candidates as config.py (settings file, then .env in the project, then
+# in the plugin directory). The location recorded in config.py's settings
+# cache is used while none of the files is newer than the cache; otherwise
+# the files are scanned (the scripts rewrite the cache on their next start).
+token_location() {
+    local settings="$PWD/.claude/sncf-train-schedule.local.md"
+    local dotenv="$PWD/.env"
+    local plugin_dotenv="${BASH_SOURCE[0]%/*}/../.env"
+    local cache="$PWD/.claude/sncf-train-schedule.local.config-cache"
+    local location_field='"location"[[:space:]]*:[[:space:]]*"([^"\\]*)"'
+    local entry line file
+
+    if [ -f "$cache" ] && ! [ "$settings" -nt "$cache" ] && ! [ "$dotenv" -nt "$cache" ] \
+            && ! [ "$plugin_dotenv" -nt "$cache" ]; then
+        IFS= read -r entry < "$cache"
+        if [[ $entry =~ $location_field ]]; then
+            LOCATION=${BASH_REMATCH[1]}
+            if [ "$LOCATION" = none ] || [ -f "$LOCATION" ]; then
+                return
+            fi
+        fi
+    fi
+
+    LOCATION=none
+    if [ -f "$settings" ]; then
+        while IFS= read -r line || [ -n "$line" ]; do
+            if [[ $line =~ ^navitia_api_token:[[:space:]\"\']*[^[:space:]\"\'] ]]; then
+                LOCATION=$settings
+                return
+            fi
+        done < "$settings"
+    fi
+    for file in "$dotenv" "$plugin_dotenv"; do
+        [ -f "$file" ] || continue
+        while IFS= read -r line || [ -n "$line" ]; do
+            if [[ $line =~ ^[[:space:]]*(export[[:space:]]+)?NAVITIA_API_TOKEN=[\"\']?[^[:space:]\"\'] ]]; then
+                LOCATION=$file
+                return
+            fi
+        done < "$file"
+    done
+}
+
+# Token check: env var, then .claude/sncf-train-schedule.local.md, then .env files
+if [ "$MODE" != "--security-only" ] && [ -z "$NAVITIA_API_TOKEN" ]; then
+    token_location
+    if [ "$LOCATION" = none ]; then
+        cat >&2 << 'EOF'
+SNCF Plugin: NAVITIA_API_TOKEN not found.
+
+To use the SNCF Train Schedule plugin, set your API token:
+  export NAVITIA_API_TOKEN="your-token-here"
+
+Or save it in your project's .claude/sncf-train-schedule.local.md:
+  navitia_api_token: your-token-here
+
+Or in a .env file in your project or in the plugin directory:
+  echo 'NAVITIA_API_TOKEN=your-token-here' > .env
+
+Get a free token at: https://www.navitia.io/
+EOF
+    fi
+fi
+
+# Security check: UUID-like patterns (Navitia tokens look like xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx)
+UUID='[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+if [ "$MODE" != "--token-only" ] && [[ $COMMAND =~ $UUID ]]; then
+    cat >&2 << 'EOF'
+SNCF Plugin Security Warning: Possible hardcoded API token detected in command.
+
+Use environment variables instead:
+  curl -H "Authorization: $NAVITIA_API_TOKEN" "URL"
+
+Or source from .env:
+  source .env && curl -H "Authorization: $NAVITIA_API_TOKEN" "URL"
+EOF
+fi
+
+exit 0
@@ -1,37 +1,7 @@
 #!/bin/bash
 # PreToolUse hook (Bash): Warn if hardcoded API tokens appear in commands
 # Non-blocking — always exits 0, warns on potential token exposure
-
-# Read the tool input from stdin
-INPUT=$(cat)
-
-# Extract the command field from the JSON input
-COMMAND=$(echo "$INPUT" | python3 -c "
-import sys, json
-try:
-    data = json.load(sys.stdin)
-    print(data.get('input', {}).get('command', ''))
-except:
-    print('')
-" 2>/dev/null)
-
-# Only run for SNCF-related commands
-if ! echo "$COMMAND" | grep -qiE '(navitia|sncf|plan_journey|search_stations|get_departures|get_arrivals|validate_station|validate_datetime)'; then
-    exit 0
-fi
-
-# Check for UUID-like patterns (common API token format)
-# Navitia tokens look like: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
-if echo "$COMMAND" | grep -qE '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'; then
-    cat >&2 << 'EOF'
-SNCF Plugin Security Warning: Possible hardcoded API token detected in command.
-
-Use environment variables instead:
-  curl -H "Authorization: $NAVITIA_API_TOKEN" "URL"
-
-Or source from .env:
-  source .env && curl -H "Authorization: $NAVITIA_API_TOKEN" "URL"
-EOF
-fi
-
-exit 0
+#
+# hooks.json runs pretooluse.sh, which does this check and the token one in
+# a single pass; this entry point runs the security check alone.
+exec "${BASH_SOURCE[0]%/*}/pretooluse.sh" --security-only
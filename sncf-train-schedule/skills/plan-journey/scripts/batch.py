@@ -0,0 +1,183 @@
+"""
+Batch mode for station boards: fetch many stations concurrently.
+
+Requests fan out over a bounded thread pool sharing the pooled client
+session, and results are yielded as they complete so callers can stream
+them (one JSON line per station) instead of waiting for the slowest one.
+"""
+import json
+import sys
+
+import client
+import errors
+import navitia
+
+DEFAULT_CONCURRENCY = 8
+
+
+def read_station_ids(station_ids, file=None):
+    """
+    Collect station IDs from arguments and an optional file.
+
+    Args:
+        station_ids: IDs given on the command line
+        file: Path to a file with one ID per line, or "-" for stdin;
+            blank lines and lines starting with '#' are ignored
+
+    Returns:
+        List of unique IDs, in first-seen order
+    """
+    ids = list(station_ids)
+    if file:
+        stream = sys.stdin if file == "-" else open(file, encoding="utf-8")
+        try:
+            ids.extend(line.strip() for line in stream)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    return list(dict.fromkeys(i for i in ids if i and not i.startswith("#")))
+
+
+def describe_error(error):
+    """Return a one-line message for a Navitia error."""
+    if isinstance(error, errors.APITimeoutError):
+        return "API timeout"
+    if isinstance(error, errors.AuthenticationError):
+        return "Invalid API token"
+    if isinstance(error, errors.NotFoundError):
+        return "Station ID not found"
+    if isinstance(error, errors.RateLimitError):
+        return "API rate limit reached"
+    if isinstance(error, errors.HTTPStatusError):
+        return f"API error: HTTP {error.status}"
+    return f"Network error: {error}"
+
+
+def report_error(error, station_id):
+    """Print a Navitia error for a station board and exit."""
+    if isinstance(error, errors.APITimeoutError):
+        print("❌ API timeout - network may be slow", file=sys.stderr)
+        print("Retry the request or check your connection", file=sys.stderr)
+    elif isinstance(error, errors.HTTPStatusError):
+        if error.status == 401:
+            print("❌ Invalid API token", file=sys.stderr)
+            print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
+            print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
+        elif error.status == 404:
+            print(f"❌ Station ID '{station_id}' not found", file=sys.stderr)
+            print("Search stations with: python scripts/search_stations.py 'name'", file=sys.stderr)
+        elif error.status == 429:
+            print("❌ API rate limit reached", file=sys.stderr)
+            if error.retry_after:
+                print(f"Retry in {int(error.retry_after)}s", file=sys.stderr)
+        else:
+            print(f"❌ API error: HTTP {error.status}", file=sys.stderr)
+    else:
+        print(f"❌ Network error: {error}", file=sys.stderr)
+    sys.exit(0)
+
+
+def stream_board(kind, station_id, api_token, until, format_item, from_datetime=None,
+                 data_freshness="realtime", output_format="human"):
+    """
+    Print every departure or arrival up to `until` as pages arrive.
+
+    Args:
+        kind: "departure" or "arrival"
+        station_id: Station ID (e.g., "stop_area:SNCF:87686006")
+        api_token: Navitia API token
+        until: End of the window in YYYYMMDDTHHmmss format (inclusive)
+        format_item: The script's formatter for one item, called with (index, item)
+        from_datetime: Start of the window (None = now)
+        data_freshness: "realtime" or "base_schedule"
+        output_format: "human", or "json" for one JSON object per line (NDJSON)
+
+    Returns:
+        Number of items printed
+    """
+    walk = navitia.iter_departures if kind == "departure" else navitia.iter_arrivals
+    count = 0
+    try:
+        for count, item in enumerate(walk(station_id, api_token, until, from_datetime, data_freshness), 1):
+            if output_format == "json":
+                print(json.dumps(item, ensure_ascii=False), flush=True)
+            else:
+                print(format_item(count, item) + "\n", flush=True)
+    except errors.NavitiaError as e:
+        report_error(e, station_id)
+
+    if not count:
+        print(f"⚠️  No {kind}s found for station '{station_id}' before {until}", file=sys.stderr)
+    return count
+
+
+def run(fetch, station_ids, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Call fetch(station_id) for every station over a bounded thread pool.
+
+    Args:
+        fetch: Callable taking a station ID and returning its results
+        station_ids: Station IDs to query
+        concurrency: Maximum number of requests in flight
+
+    Yields:
+        (station_id, results, error) tuples in completion order; error is a
+        message string (and results None) when the request failed
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    concurrency = max(1, concurrency)
+    client.ensure_pool_size(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fetch, sid): sid for sid in station_ids}
+        for future in as_completed(futures):
+            station_id = futures[future]
+            try:
+                yield station_id, future.result(), None
+            except errors.NavitiaError as e:
+                yield station_id, None, describe_error(e)
+
+
+def print_results(results, key, format_output, output_format="human"):
+    """
+    Stream batch results to stdout as they arrive.
+
+    Args:
+        results: Iterator from run()
+        key: Result field name in JSON lines ("departures" or "arrivals")
+        format_output: The script's formatter for human output
+        output_format: "json" for one JSON object per line, "human" for blocks
+
+    Returns:
+        Number of stations that failed
+    """
+    failures = 0
+    for station_id, items, error in results:
+        if error:
+            failures += 1
+        if output_format == "json":
+            record = {"station_id": station_id}
+            if error:
+                record["error"] = error
+            else:
+                record[key] = items
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+            continue
+
+        print(f"=== {station_id} ===")
+        if error:
+            print(f"❌ {error}")
+        elif not items:
+            print(f"⚠️  No {key} found")
+        else:
+            print(format_output(items, output_format).rstrip())
+        print("", flush=True)
+    return failures
+
+
+def add_arguments(parser):
+    """Add the batch options (--file, --concurrency) to a board script's parser."""
+    parser.add_argument("--file",
+                       help="Read station IDs from a file, one per line ('-' for stdin)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help=f"Parallel requests in batch mode (default: {DEFAULT_CONCURRENCY})")
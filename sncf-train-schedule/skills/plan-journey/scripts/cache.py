@@ -0,0 +1,212 @@
+"""
+On-disk response cache for Navitia calls.
+
+Responses are stored in a SQLite file under .claude/ (next to the settings
+file), keyed by coverage URL, endpoint path and normalized query parameters. Each endpoint
+class gets its own TTL: station data changes about once a year, realtime
+boards within seconds. The file is size-bounded with LRU eviction.
+
+A broken or read-only cache never fails a request — it just stops caching.
+"""
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# TTLs per endpoint class (seconds)
+TTL_PLACES = 7 * DAY
+TTL_STOP_AREA = 7 * DAY
+TTL_REALTIME = 30
+TTL_BASE_SCHEDULE = 6 * HOUR
+
+MAX_BYTES = 20 * 1024 * 1024
+
+_STOP_AREA_RE = re.compile(r"^/stop_areas/[^/]+$")
+_BOARD_RE = re.compile(r"^/stop_areas/[^/]+/(departures|arrivals)$")
+
+enabled = True
+stats = {"hits": 0, "misses": 0}
+_conn = None
+# One connection shared by batch worker threads, serialized by this lock
+_lock = threading.RLock()
+
+
+def cache_path():
+    """Return the cache file path for the current working directory."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.cache.db")
+
+
+def ttl_for(path, params=None):
+    """
+    Return the cache TTL in seconds for an endpoint, or 0 if it is not cacheable.
+
+    Args:
+        path: Path below the coverage URL (e.g., "/places")
+        params: Query parameters of the request
+    """
+    params = params or {}
+    if path == "/places":
+        return TTL_PLACES
+    if _STOP_AREA_RE.match(path):
+        return TTL_STOP_AREA
+    if path == "/journeys" or _BOARD_RE.match(path):
+        if params.get("data_freshness") == "base_schedule":
+            return TTL_BASE_SCHEDULE
+        return TTL_REALTIME
+    return 0
+
+
+def make_key(path, params=None):
+    """
+    Build a cache key from the coverage URL, endpoint path and normalized parameters.
+
+    The coverage URL (client.base_url()) keeps a mock's or another coverage's
+    answers apart from the real API's.
+    """
+    import hashlib
+
+    import client  # imports this module
+
+    normalized = sorted(
+        (str(k), " ".join(str(v).split()).lower() if k == "q" else str(v))
+        for k, v in (params or {}).items()
+        if v is not None
+    )
+    raw = json.dumps([client.base_url(), path, normalized], separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    global _conn
+    import sqlite3
+
+    if _conn is None:
+        path = cache_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=2, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " path TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        _conn = conn
+    return _conn
+
+
+def get(path, params=None):
+    """Return the cached JSON body for a request, or None on miss/expiry."""
+    if not enabled or not ttl_for(path, params):
+        return None
+    import sqlite3
+
+    key = make_key(path, params)
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connect()
+            row = conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                stats["misses"] += 1
+                return None
+            with conn:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            stats["hits"] += 1
+        return json.loads(row[0])
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+
+
+def put(path, params, data):
+    """Store a JSON body for a request if its endpoint is cacheable."""
+    ttl = ttl_for(path, params)
+    if not enabled or not ttl:
+        return
+    import sqlite3
+
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (make_key(path, params), path, body, len(body), now + ttl, now),
+                )
+                _evict(conn, now)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _evict(conn, now):
+    """Drop expired entries, then least-recently-used ones until under MAX_BYTES."""
+    conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    for key, size in conn.execute(
+        "SELECT key, size FROM responses ORDER BY last_access"
+    ).fetchall():
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        total -= size
+        if total <= MAX_BYTES:
+            break
+
+
+def clear():
+    """Remove every cached response."""
+    import sqlite3
+
+    try:
+        with _lock, _connect() as conn:
+            conn.execute("DELETE FROM responses")
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def format_stats():
+    """Return a one-line summary of this run's hits/misses and the cache size."""
+    entries, size = 0, 0
+    if os.path.isfile(cache_path()):
+        import sqlite3
+
+        try:
+            entries, size = _connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            pass
+    state = "" if enabled else " (disabled)"
+    return (f"Cache{state}: {stats['hits']} hit(s), {stats['misses']} miss(es) this run"
+            f" · {entries} entries, {size / 1024:.1f} KB in {cache_path()}")
+
+
+def add_arguments(parser):
+    """Add --no-cache / --cache-stats to a script's argument parser."""
+    parser.add_argument("--no-cache", action="store_true",
+                       help="Bypass the local response cache")
+    parser.add_argument("--cache-stats", action="store_true",
+                       help="Print cache hit/miss statistics to stderr on exit")
+
+
+def apply_arguments(args):
+    """Apply the cache flags parsed by add_arguments()."""
+    global enabled
+    if args.no_cache:
+        enabled = False
+    if args.cache_stats:
+        atexit.register(lambda: print(format_stats(), file=sys.stderr))
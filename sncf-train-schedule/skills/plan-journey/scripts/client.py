@@ -0,0 +1,206 @@
+"""
+Shared Navitia HTTP client for SNCF scripts.
+
+All scripts go through one keep-alive requests.Session, so chained calls
+(search → validate → departures → journey) reuse the same TLS connection
+instead of paying a handshake per request. Cacheable responses are served
+from the on-disk cache (see cache.py) before touching the network, and
+network calls are paced and retried by the shared rate limiter (ratelimit.py).
+Identical concurrent requests are coalesced into one upstream call
+(singleflight.py). When the local server (daemon.py) is running, calls are
+forwarded to its warm session and cache instead.
+
+The coverage URL, timeouts and pool sizes come from config.get(), so every
+script can be pointed at another Navitia instance (or a local mock) at once.
+
+`requests` is imported on the first real network call only: it costs more
+than the rest of a script's startup, and cache hits, forwarded calls and
+--help never need it.
+"""
+import sys
+import time
+
+import cache
+import config
+import errors
+import ratelimit
+import singleflight
+
+# Coverage URL override (None = config.get().base_url)
+BASE_URL = None
+
+# Pool size asked for by batch callers (ensure_pool_size), when above the configured one
+_pool_maxsize = 0
+
+_session = None
+
+
+def _requests():
+    """Import and return the requests module, exiting with a hint if it is missing."""
+    try:
+        import requests
+    except ImportError:
+        print("❌ Error: 'requests' package not found", file=sys.stderr)
+        print("Install with: pip install requests", file=sys.stderr)
+        sys.exit(1)
+    return requests
+
+
+def base_url():
+    """Return the coverage URL endpoint paths are appended to."""
+    return BASE_URL or config.get().base_url
+
+
+def _mount_adapter(session):
+    from requests.adapters import HTTPAdapter
+    settings = config.get()
+    adapter = HTTPAdapter(pool_connections=settings.pool_connections,
+                          pool_maxsize=max(settings.pool_maxsize, _pool_maxsize))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_session(api_token=None):
+    """Return the shared session, creating it on first use.
+
+    Args:
+        api_token: Navitia API token; when given, it becomes the session's
+            Authorization header for every subsequent request
+
+    Returns:
+        requests.Session
+    """
+    global _session
+    if _session is None:
+        session = _requests().Session()
+        _mount_adapter(session)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        _session = session
+    if api_token:
+        _session.headers["Authorization"] = api_token
+    return _session
+
+
+def ensure_pool_size(maxsize):
+    """Grow the connection pool so `maxsize` concurrent requests can keep their connections."""
+    global _pool_maxsize
+    if maxsize > max(config.get().pool_maxsize, _pool_maxsize):
+        _pool_maxsize = maxsize
+        if _session is not None:
+            _mount_adapter(_session)
+
+
+def get_json(path, api_token, params=None, timeout=None, decode=None):
+    """
+    GET a Navitia endpoint and return the decoded JSON body.
+
+    Args:
+        path: Path below the coverage URL (e.g., "/places")
+        api_token: Navitia API token
+        params: Query parameters
+        timeout: Request timeout in seconds (default: config.get().timeout)
+        decode: Optional callable reading the (decompressed) body from a binary
+            stream, e.g. a streaming parser keeping only some fields; its
+            result is what gets cached and returned. The local server (see
+            daemon.py) applies it too when it is one of navitia.DECODERS
+
+    Returns:
+        Decoded JSON response (dict)
+
+    Concurrent identical requests (same path and params) share a single
+    upstream call. Timeouts, HTTP 429 and 5xx responses are retried up to
+    ratelimit.MAX_RETRIES times with jittered exponential backoff (or the
+    server's Retry-After) before the error is raised.
+
+    Raises:
+        errors.APITimeoutError: the request timed out
+        errors.HTTPStatusError: the API answered with an error status (typed per status)
+        errors.NetworkError: the API could not be reached
+    """
+    import daemon
+
+    if timeout is None:
+        timeout = config.get().timeout
+    forwarded = daemon.forward_get(path, api_token, params, timeout, cache.enabled, base_url(),
+                                   decode and getattr(decode, "__name__", "?"))
+    if forwarded is not daemon.UNAVAILABLE:
+        data, cache_hit = forwarded
+        if cache.enabled and cache.ttl_for(path, params):
+            cache.stats["hits" if cache_hit else "misses"] += 1
+        return data
+
+    cached = cache.get(path, params)
+    if cached is not None:
+        return cached
+    key = cache.make_key(path, params)
+    return singleflight.do(key, lambda: _fetch_shared(key, path, api_token, params, timeout, decode))
+
+
+def _fetch_shared(key, path, api_token, params, timeout, decode=None):
+    """Fetch under the cross-process lock, unless another process just cached it."""
+    if not cache.enabled or not cache.ttl_for(path, params):
+        return _fetch(path, api_token, params, timeout, decode)
+    with singleflight.process_lock(key):
+        cached = cache.get(path, params)
+        if cached is not None:
+            return cached
+        data = _fetch(path, api_token, params, timeout, decode)
+        cache.put(path, params, data)
+        return data
+
+
+def _fetch(path, api_token, params, timeout, decode=None):
+    """Issue the request with rate limiting and retries; return the decoded body."""
+    requests = _requests()
+    session = get_session(api_token)
+    for attempt in range(ratelimit.MAX_RETRIES + 1):
+        last_attempt = attempt == ratelimit.MAX_RETRIES
+        ratelimit.acquire()
+        try:
+            response = session.get(base_url() + path, params=params, timeout=timeout,
+                                   stream=decode is not None)
+        except requests.exceptions.Timeout as e:
+            if last_attempt:
+                raise errors.APITimeoutError(str(e)) from e
+            time.sleep(ratelimit.backoff_delay(attempt))
+            continue
+        except requests.exceptions.RequestException as e:
+            raise errors.NetworkError(str(e)) from e
+
+        if response.status_code < 400:
+            break
+        retry_after = ratelimit.parse_retry_after(response.headers.get("Retry-After"))
+        if (last_attempt or response.status_code not in ratelimit.RETRY_STATUSES
+                or (retry_after or 0) > ratelimit.MAX_RETRY_AFTER):
+            error = errors.for_status(response.status_code, _json_or_none(response))
+            error.retry_after = retry_after
+            raise error
+        response.close()
+        delay = ratelimit.backoff_delay(attempt, retry_after)
+        if response.status_code == 429:
+            # Hold back the other processes too, not just this one
+            ratelimit.block_for(delay)
+        time.sleep(delay)
+
+    if decode is None:
+        return response.json()
+    from urllib3.exceptions import HTTPError as TransportError, ReadTimeoutError
+    try:
+        response.raw.decode_content = True
+        return decode(response.raw)
+    except ReadTimeoutError as e:
+        raise errors.APITimeoutError(str(e)) from e
+    except TransportError as e:
+        raise errors.NetworkError(str(e)) from e
+    finally:
+        response.close()
+
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
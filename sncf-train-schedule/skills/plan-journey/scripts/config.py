@@ -1,33 +1,225 @@
 """
-Shared token loading for SNCF scripts.
+Shared token and settings loading for SNCF scripts.
 
-Priority:
-  1. NAVITIA_API_TOKEN env var (already set)
+Priority (token and every setting):
+  1. Environment variables (NAVITIA_API_TOKEN, NAVITIA_API_URL, ...)
   2. .claude/sncf-train-schedule.local.md (persistent, survives plugin updates)
-  3. .env file via python-dotenv
+  3. .env file (working directory, then plugin directory) via python-dotenv
+
+Settings (see SETTINGS) point the scripts at another Navitia instance or
+coverage and tune timeouts and connection pools, e.g. for load tests against
+a local mock. The settings resolved from the files are cached in
+.claude/sncf-train-schedule.local.config-cache, keyed on the files' mtimes:
+once cached, a script start costs a few stat calls instead of reading the
+settings file and importing python-dotenv. The token itself is never copied
+there: the cache records which file holds it, and that file is read again
+the first time the token is needed.
 """
+import json
 import os
+import sys
+from collections import namedtuple
 
+# name → (default, type); environment and .env use the upper-case name, the
+# settings file the lower-case one
+SETTINGS = {
+    "NAVITIA_API_TOKEN": (None, str),
+    "NAVITIA_API_URL": ("https://api.navitia.io/v1", str),
+    "NAVITIA_COVERAGE": ("sncf", str),
+    "NAVITIA_TIMEOUT": (10.0, float),
+    "NAVITIA_JOURNEY_TIMEOUT": (15.0, float),
+    # One host, but batch callers may run many requests at once
+    "NAVITIA_POOL_CONNECTIONS": (4, int),
+    "NAVITIA_POOL_MAXSIZE": (16, int),
+    # Client-side pacing of the API quota: requests per second and burst (0 = no pacing)
+    "NAVITIA_RATE": (5.0, float),
+    "NAVITIA_BURST": (10, int),
+}
 
-def load_token():
-    """Load NAVITIA_API_TOKEN into the environment if not already set."""
-    if os.getenv("NAVITIA_API_TOKEN"):
-        return
+SETTINGS_FILE = os.path.join(".claude", "sncf-train-schedule.local.md")
+CACHE_FILE = os.path.join(".claude", "sncf-train-schedule.local.config-cache")
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+
+
+TOKEN = "NAVITIA_API_TOKEN"
+
+
+class Config(namedtuple("Config", "api_url coverage timeout journey_timeout "
+                                  "pool_connections pool_maxsize rate burst")):
+    """Resolved settings; build with get()."""
+    __slots__ = ()
+
+    @property
+    def api_token(self):
+        """The API token: environment first, else read from its file on first use."""
+        return os.getenv(TOKEN) or _file_token()
+
+    @property
+    def base_url(self):
+        """Coverage URL the endpoint paths are appended to."""
+        return f"{self.api_url.rstrip('/')}/coverage/{self.coverage}"
+
+
+_config = None
+# Where the token was found ("none" without one), and the token once read from there
+_token_location = "none"
+_token = None
 
-    # Try .claude/sncf-train-schedule.local.md in the working directory
-    settings_file = os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.md")
-    if os.path.isfile(settings_file):
-        with open(settings_file) as f:
-            for line in f:
-                if line.startswith("navitia_api_token:"):
-                    token = line.split(":", 1)[1].strip().strip("'\"")
-                    if token:
-                        os.environ["NAVITIA_API_TOKEN"] = token
-                    return
-
-    # Fall back to .env via python-dotenv
+
+def _candidates():
+    """Settings file and .env files, in priority order."""
+    cwd = os.getcwd()
+    return [os.path.join(cwd, SETTINGS_FILE), os.path.join(cwd, ".env"),
+            os.path.normpath(os.path.join(PLUGIN_DIR, ".env"))]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_settings_file(path):
+    """Return the NAVITIA_* values of the settings file's `key: value` lines."""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            key, sep, value = line.partition(":")
+            name = key.strip().upper()
+            value = value.strip().strip("'\"")
+            if sep and name in SETTINGS and value:
+                values[name] = value
+    return values
+
+
+def _read_dotenv(path):
+    """Return the NAVITIA_* values of a .env file ({} without python-dotenv)."""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
+        from dotenv import dotenv_values
     except ImportError:
+        return {}
+    return {name: value for name, value in dotenv_values(path).items() if name in SETTINGS and value}
+
+
+def _resolve_files(paths):
+    """
+    Read the settings and .env files.
+
+    Returns:
+        (values, location): NAVITIA_* values from the files, the first file
+        winning, and the path the token came from ("none" without one)
+    """
+    values, location = {}, "none"
+    for i, path in enumerate(paths):
+        if not os.path.isfile(path):
+            continue
+        found = _read_settings_file(path) if i == 0 else _read_dotenv(path)
+        if TOKEN in found and location == "none":
+            location = path
+        values = dict(found, **values)
+    return values, location
+
+
+def _read_token(location):
+    """Read the token again from the file it was found in (None if it is gone)."""
+    if location == "none":
+        return None
+    read = _read_settings_file if location.endswith(SETTINGS_FILE) else _read_dotenv
+    try:
+        return read(location).get(TOKEN)
+    except OSError:
+        return None
+
+
+def _file_token():
+    global _token
+    if _token is None:
+        _token = _read_token(_token_location)
+    return _token
+
+
+def _cached_entry(cache_path, mtimes):
+    """Return the cached entry if it was written for these mtimes, else None."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            entry = json.loads(f.readline() or "null")
+    except (OSError, ValueError):
+        return None
+    if isinstance(entry, dict) and entry.get("mtimes") == mtimes:
+        return entry
+    return None
+
+
+def _write_cache(cache_path, entry):
+    """Write the cache atomically."""
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            # Unescaped, so the Bash hook can read the token location as is
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, cache_path)
+    except OSError:
         pass
+
+
+def _file_values():
+    """
+    NAVITIA_* settings from the settings and .env files, through the mtime-keyed cache.
+
+    The token is left out of the returned values: its location is kept in
+    _token_location (and in the cache) so Config.api_token can read it.
+    """
+    global _token_location, _token
+    paths = _candidates()
+    mtimes = [_mtime(path) for path in paths]
+    cache_path = os.path.join(os.getcwd(), CACHE_FILE)
+    entry = _cached_entry(cache_path, mtimes)
+    if entry is None:
+        values, location = _resolve_files(paths)
+        _token_location, _token = location, values.pop(TOKEN, None)
+        if os.path.isdir(os.path.dirname(cache_path)):
+            _write_cache(cache_path, {"mtimes": mtimes, "location": location, "values": values})
+        return values
+    _token_location, _token = entry.get("location", "none"), None
+    return entry.get("values", {})
+
+
+def get(refresh=False):
+    """
+    Return the resolved settings, reading the files once per process.
+
+    Args:
+        refresh: Resolve again (e.g. after the working directory or environment changed)
+
+    Returns:
+        Config
+    """
+    global _config
+    if _config is not None and not refresh:
+        return _config
+
+    files = _file_values()
+    resolved = []
+    for name, (default, kind) in SETTINGS.items():
+        if name == TOKEN:
+            continue
+        raw = os.getenv(name) or files.get(name)
+        value = default
+        if raw:
+            try:
+                value = kind(raw)
+            except ValueError:
+                print(f"⚠️  Ignoring invalid {name}: '{raw}'", file=sys.stderr)
+        resolved.append(value)
+    _config = Config(*resolved)
+    return _config
+
+
+def load_token():
+    """Load NAVITIA_API_TOKEN into the environment if not already set."""
+    if os.getenv(TOKEN):
+        return
+    token = get().api_token
+    if token:
+        os.environ[TOKEN] = token
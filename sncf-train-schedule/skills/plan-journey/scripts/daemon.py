@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Optional long-lived SNCF query server.
+
+While it runs, the scripts forward their API calls and station-index lookups
+to it over a UNIX socket in .claude/ instead of opening their own TLS
+connection, cache handle and index. The server keeps the client session
+pool, the response cache, request coalescing and the station index warm, so
+a forwarded call costs a socket round-trip plus network time.
+
+Forwarding is transparent: when no server is running (or it declines the
+request, e.g. because it was started with another API token), scripts do
+the work themselves exactly as before.
+
+Usage:
+    python daemon.py start          # background server for this directory
+    python daemon.py status
+    python daemon.py stop
+    python daemon.py serve          # foreground, for debugging
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+# Idle servers exit on their own after this many seconds
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+# Forwarded calls may wait on the server's retries and backoff
+FORWARD_TIMEOUT = 120
+
+UNAVAILABLE = object()
+
+# Set in the server process so its own client calls are not forwarded back to it
+serving = False
+
+
+def socket_path():
+    """Return the server socket path for the current working directory."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.daemon.sock")
+
+
+# -- Client side ------------------------------------------------------------
+
+def _call(message, timeout=FORWARD_TIMEOUT):
+    """Send one request to the server and return its reply, or None if it is not running."""
+    if serving or not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def forward_get(path, api_token, params=None, timeout=10, use_cache=True, base_url=None, decode=None):
+    """
+    Run client.get_json() in the server.
+
+    The server declines requests for another coverage URL than its own, so a
+    script pointed at a mock never gets answers from the real API.
+
+    Args:
+        decode: Name of a streaming decoder in navitia.DECODERS (e.g.
+            "decode_journeys"), applied by the server so only the projected
+            body crosses the socket; unknown names are declined
+
+    Returns:
+        (data, cache_hit), or UNAVAILABLE when the caller must fetch locally
+
+    Raises:
+        errors.NavitiaError subclasses, rebuilt from the server's reply
+    """
+    reply = _call({"op": "get", "path": path, "params": params, "timeout": timeout,
+                   "token": api_token, "cache": use_cache, "base_url": base_url, "decode": decode})
+    if reply is None or reply.get("declined"):
+        return UNAVAILABLE
+    if "error" in reply:
+        raise _rebuild_error(reply)
+    return reply["data"], reply.get("cache_hit", False)
+
+
+def forward_search(query, count=10):
+    """Run station_index.search() in the server; returns UNAVAILABLE when not running."""
+    reply = _call({"op": "search", "query": query, "count": count})
+    if reply is None or reply.get("declined"):
+        return UNAVAILABLE
+    return reply["stations"]
+
+
+def _rebuild_error(reply):
+    import errors
+    kind = reply["error"]
+    if kind == "timeout":
+        return errors.APITimeoutError(reply.get("message"))
+    if kind == "network":
+        return errors.NetworkError(reply.get("message"))
+    error = errors.for_status(reply["status"], {"message": reply.get("message")})
+    error.retry_after = reply.get("retry_after")
+    return error
+
+
+# -- Server side ------------------------------------------------------------
+
+def _handle(message, api_token):
+    """Answer one forwarded request (runs in a server thread)."""
+    import cache
+    import client
+    import errors
+    import station_index
+
+    op = message.get("op")
+    if op == "ping":
+        return {"pid": os.getpid()}
+    if op == "search":
+        return {"stations": station_index.search(message["query"], message.get("count", 10))}
+    if (op != "get" or message.get("token") != api_token
+            or message.get("base_url") not in (None, client.base_url())):
+        return {"declined": True}
+    decode = None
+    if message.get("decode"):
+        import navitia
+        decode = navitia.DECODERS.get(message["decode"])
+        if decode is None:
+            return {"declined": True}
+
+    path, params, timeout = message["path"], message.get("params"), message.get("timeout", 10)
+    try:
+        if not message.get("cache", True):
+            return {"data": client._fetch(path, api_token, params, timeout, decode)}
+        data = cache.get(path, params)
+        if data is not None:
+            return {"data": data, "cache_hit": True}
+        return {"data": client.get_json(path, api_token, params, timeout, decode)}
+    except errors.APITimeoutError as e:
+        return {"error": "timeout", "message": str(e)}
+    except errors.HTTPStatusError as e:
+        return {"error": "http", "status": e.status, "message": e.message,
+                "retry_after": e.retry_after}
+    except errors.NavitiaError as e:
+        return {"error": "network", "message": str(e)}
+
+
+def serve(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Serve forwarded requests on the socket until stopped or idle."""
+    import socketserver
+    import threading
+
+    from config import load_token
+
+    global serving
+    serving = True
+    load_token()
+    api_token = os.getenv("NAVITIA_API_TOKEN")
+
+    # Warm everything a first request would otherwise pay for
+    import client
+    import station_index
+    if api_token:
+        client.get_session(api_token)
+    station_index.load()
+
+    last_request = [time.monotonic()]
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            last_request[0] = time.monotonic()
+            try:
+                message = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+            if message.get("op") == "shutdown":
+                reply = {"stopping": True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                reply = _handle(message, api_token)
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    path = socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    server = Server(path, Handler)
+
+    def watch_idle():
+        while True:
+            time.sleep(min(idle_timeout, 30))
+            if time.monotonic() - last_request[0] > idle_timeout:
+                server.shutdown()
+                return
+
+    threading.Thread(target=watch_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a warm local server that the SNCF scripts forward to",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python daemon.py start                      # background, exits after 30 min idle
+  python daemon.py start --idle-timeout 7200
+  python daemon.py status
+  python daemon.py stop
+        """
+    )
+    parser.add_argument("command", choices=["start", "serve", "status", "stop"])
+    parser.add_argument("--idle-timeout", type=int, default=DEFAULT_IDLE_TIMEOUT,
+                       help=f"Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT})")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ The SNCF server needs UNIX sockets (not available on this platform)", file=sys.stderr)
+        sys.exit(0)
+
+    running = _call({"op": "ping"}, timeout=2)
+
+    if args.command == "status":
+        if running:
+            print(f"✓ Running (pid {running['pid']}) on {socket_path()}")
+        else:
+            print("Not running")
+    elif args.command == "stop":
+        if running:
+            _call({"op": "shutdown"}, timeout=2)
+            print("✓ Stopped")
+        else:
+            print("Not running")
+    elif running:
+        print(f"✓ Already running (pid {running['pid']})")
+    elif args.command == "serve":
+        serve(args.idle_timeout)
+    else:
+        import subprocess
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve", "--idle-timeout", str(args.idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        for _ in range(50):
+            time.sleep(0.1)
+            running = _call({"op": "ping"}, timeout=2)
+            if running:
+                print(f"✓ Started (pid {running['pid']}) on {socket_path()}")
+                return
+        print("❌ Server did not start", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Typed errors raised by the Navitia API layer.
+
+Library callers (navitia.py, navitia_async.py, batch mode) get these instead
+of a printed message and sys.exit(), so they can be embedded in long-running
+services. The CLI scripts catch them and print the usual hints.
+"""
+
+
+class NavitiaError(Exception):
+    """Base class for every Navitia API failure."""
+
+    status = None
+
+
+class APITimeoutError(NavitiaError):
+    """The request timed out."""
+
+
+class NetworkError(NavitiaError):
+    """The API could not be reached (DNS, connection reset, TLS, ...)."""
+
+
+class HTTPStatusError(NavitiaError):
+    """The API answered with an HTTP error status."""
+
+    def __init__(self, status, message=None, retry_after=None):
+        self.status = status
+        self.message = message
+        # Seconds the server asked us to wait (Retry-After), if any
+        self.retry_after = retry_after
+        super().__init__(message or f"HTTP {status}")
+
+
+class BadRequestError(HTTPStatusError):
+    """HTTP 400 — invalid parameters; `message` carries Navitia's explanation."""
+
+
+class AuthenticationError(HTTPStatusError):
+    """HTTP 401 — missing or invalid API token."""
+
+
+class NotFoundError(HTTPStatusError):
+    """HTTP 404 — unknown station, location or object."""
+
+
+class RateLimitError(HTTPStatusError):
+    """HTTP 429 — the token's quota is exhausted; see `retry_after`."""
+
+
+_BY_STATUS = {
+    400: BadRequestError,
+    401: AuthenticationError,
+    404: NotFoundError,
+    429: RateLimitError,
+}
+
+
+def for_status(status, body=None):
+    """
+    Build the typed error for an HTTP error response.
+
+    Args:
+        status: HTTP status code
+        body: Decoded JSON error body, if any (Navitia puts details in error.message)
+
+    Returns:
+        HTTPStatusError subclass instance
+    """
+    message = None
+    if isinstance(body, dict):
+        message = (body.get("error") or {}).get("message") or body.get("message")
+    return _BY_STATUS.get(status, HTTPStatusError)(status, message)
@@ -5,23 +5,26 @@ Get arrivals at an SNCF station.
 Usage:
     python get_arrivals.py "stop_area:SNCF:87686006"
     python get_arrivals.py "stop_area:SNCF:87686006" --count 5 --datetime "20260210T140000"
+    python get_arrivals.py "stop_area:SNCF:87686006" --until "20260210T220000"   # whole window, streamed
+    python get_arrivals.py "stop_area:SNCF:87686006" --watch 30   # poll, print only changes
+    python get_arrivals.py --file stations.txt --format json   # batch, one JSON line per station
 """
 
 import argparse
 import json
 import os
 import sys
-from datetime import datetime
-
-try:
-    import requests
-except ImportError:
-    print("❌ Error: 'requests' package not found", file=sys.stderr)
-    print("Install with: pip install requests", file=sys.stderr)
-    sys.exit(1)
 
+import batch
+import cache
+import navitia
+import watch
 from config import load_token
-load_token()
+from errors import NavitiaError
+from models import Arrival, clock
+from timestamps import parse_timestamp
+# Delay helpers historically defined here, now shared in models.py
+from models import compute_delay_minutes, format_datetime, format_disruption
 
 
 def get_arrivals(station_id, api_token, count=10, from_datetime=None, data_freshness="realtime"):
@@ -38,22 +41,8 @@ def get_arrivals(station_id, api_token, count=10, from_datetime=None, data_fresh
     Returns:
         List of arrival dictionaries
     """
-    url = f"https://api.navitia.io/v1/coverage/sncf/stop_areas/{station_id}/arrivals"
-    params = {
-        "count": count,
-        "data_freshness": data_freshness
-    }
-    if from_datetime:
-        params["from_datetime"] = from_datetime
-
-    headers = {"Authorization": api_token}
-
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        arrivals = data.get("arrivals", [])
+        arrivals = navitia.get_arrivals(station_id, api_token, count, from_datetime, data_freshness)
         if not arrivals:
             print(f"⚠️  No arrivals found for station '{station_id}'", file=sys.stderr)
             if from_datetime:
@@ -62,67 +51,24 @@ def get_arrivals(station_id, api_token, count=10, from_datetime=None, data_fresh
 
         return arrivals
 
-    except requests.exceptions.Timeout:
-        print("❌ API timeout - network may be slow", file=sys.stderr)
-        print("Retry the request or check your connection", file=sys.stderr)
-        sys.exit(0)
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
-            print("❌ Invalid API token", file=sys.stderr)
-            print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
-            print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
-        elif e.response.status_code == 404:
-            print(f"❌ Station ID '{station_id}' not found", file=sys.stderr)
-            print("Search stations with: python scripts/search_stations.py 'name'", file=sys.stderr)
-        else:
-            print(f"❌ API error: HTTP {e.response.status_code}", file=sys.stderr)
-        sys.exit(0)
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Network error: {e}", file=sys.stderr)
-        sys.exit(0)
-
-
-def format_datetime(dt_string):
-    """Convert YYYYMMDDTHHmmss to readable format."""
-    try:
-        dt = datetime.strptime(dt_string, "%Y%m%dT%H%M%S")
-        return dt.strftime("%H:%M")
-    except:
-        return dt_string
-
-
-def compute_delay_minutes(base_dt_str, actual_dt_str):
-    """Return delay in minutes (positive = late, negative = early, 0 = on time)."""
-    try:
-        base = datetime.strptime(base_dt_str, "%Y%m%dT%H%M%S")
-        actual = datetime.strptime(actual_dt_str, "%Y%m%dT%H%M%S")
-        return int((actual - base).total_seconds() // 60)
-    except (ValueError, TypeError):
-        return 0
-
-
-def format_disruption(stop_date_time, time_key):
-    """Return disruption label: '+Xmin', '-Xmin', '❌ SUPPRIMÉ', or '' for on-time.
-
-    Args:
-        stop_date_time: The stop_date_time dict from Navitia response
-        time_key: 'departure_date_time' or 'arrival_date_time'
-    """
-    if "no_departing" in stop_date_time.get("additional_informations", []) or \
-       "no_arriving" in stop_date_time.get("additional_informations", []):
-        return "❌ SUPPRIMÉ"
+    except NavitiaError as e:
+        batch.report_error(e, station_id)
 
-    base_key = f"base_{time_key}"
-    base_time = stop_date_time.get(base_key)
-    actual_time = stop_date_time.get(time_key)
 
-    if not base_time or not actual_time or base_time == actual_time:
-        return ""
+def format_arrival(index, item):
+    """Format one arrival as human-readable lines."""
+    arrival = Arrival.from_json(item)
+    sdt = arrival.stop_date_time
+    disruption = sdt.disruption("arrival")
 
-    delay = compute_delay_minutes(base_time, actual_time)
-    if delay == 0:
-        return ""
-    return f"+{delay}min" if delay > 0 else f"{delay}min"
+    lines = [f"{index}. [{arrival.code}] from {arrival.direction}"]
+    if sdt.cancelled:
+        lines.append(f"   {disruption}")
+    elif disruption:
+        lines.append(f"   Arrival: {clock(sdt.arrival, sdt.arrival_text)} ({disruption})")
+    else:
+        lines.append(f"   Arrival: {clock(sdt.arrival, sdt.arrival_text)}")
+    return "\n".join(lines)
 
 
 def format_output(arrivals, output_format="human"):
@@ -131,29 +77,23 @@ def format_output(arrivals, output_format="human"):
         return json.dumps(arrivals, indent=2, ensure_ascii=False)
 
     # Human-readable format
-    output = []
-    for i, arr in enumerate(arrivals, 1):
-        # Extract key information
-        route = arr.get("route", {})
-        display_info = arr.get("display_informations", {})
-
-        line = display_info.get("code", "?")
-        direction = display_info.get("direction", "Unknown")
-        sdt = arr.get("stop_date_time", {})
-        arr_time = format_datetime(sdt.get("arrival_date_time", ""))
-        disruption = format_disruption(sdt, "arrival_date_time")
-
-        output.append(f"{i}. [{line}] from {direction}")
-        if disruption == "❌ SUPPRIMÉ":
-            output.append(f"   {disruption}")
-        elif disruption:
-            output.append(f"   Arrival: {arr_time} ({disruption})")
-        else:
-            output.append(f"   Arrival: {arr_time}")
+    if not arrivals:
+        return ""
+    return "\n\n".join(format_arrival(i, item) for i, item in enumerate(arrivals, 1)) + "\n"
 
-        output.append("")
 
-    return "\n".join(output)
+def stream_arrivals(station_id, api_token, until, from_datetime=None, data_freshness="realtime",
+                    output_format="human"):
+    """Print every arrival up to `until` as pages arrive (see batch.stream_board)."""
+    return batch.stream_board("arrival", station_id, api_token, until, format_arrival, from_datetime,
+                              data_freshness, output_format)
+
+
+def watch_arrivals(station_id, api_token, interval, count=10, from_datetime=None,
+                   data_freshness="realtime", output_format="human"):
+    """Poll the arrivals board and print only what changed, until interrupted (see watch.watch_board)."""
+    watch.watch_board("arrival", station_id, api_token, interval, count, from_datetime,
+                      data_freshness, output_format)
 
 
 def main():
@@ -166,21 +106,55 @@ Examples:
   python get_arrivals.py "stop_area:SNCF:87686006" --count 5
   python get_arrivals.py "stop_area:SNCF:87686006" --datetime "20260210T140000"
   python get_arrivals.py "stop_area:SNCF:87686006" --format json
+
+  # Every arrival in a time window, printed page by page (NDJSON with --format json)
+  python get_arrivals.py "stop_area:SNCF:87686006" --datetime "20260210T170000" --until "20260210T220000"
+
+  # Dashboard feed: poll every 30s, print only new/removed trains, delays, cancellations, platforms
+  python get_arrivals.py "stop_area:SNCF:87686006" --watch 30 --format json
+
+  # Batch: several stations fetched concurrently, streamed as they complete
+  python get_arrivals.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025"
+  cat stations.txt | python get_arrivals.py --file - --concurrency 16 --format json
         """
     )
-    parser.add_argument("station_id", help="Station ID (e.g., stop_area:SNCF:87686006)")
+    parser.add_argument("station_ids", nargs="*", metavar="station_id",
+                       help="Station ID(s) (e.g., stop_area:SNCF:87686006); several IDs run in batch mode")
     parser.add_argument("--count", type=int, default=10,
                        help="Number of arrivals (default: 10)")
     parser.add_argument("--datetime", dest="from_datetime",
                        help="Starting datetime in YYYYMMDDTHHmmss format")
+    parser.add_argument("--until",
+                       help="Fetch every arrival up to this YYYYMMDDTHHmmss datetime, streamed "
+                            "as pages arrive (--count is then ignored)")
+    parser.add_argument("--watch", type=float, metavar="INTERVAL",
+                       help="Poll every INTERVAL seconds and print only changes, as events "
+                            "(backs off while the board is unchanged; Ctrl-C to stop)")
     parser.add_argument("--data-freshness", choices=["realtime", "base_schedule"],
                        default="realtime", help="Data freshness (default: realtime)")
     parser.add_argument("--format", choices=["human", "json"], default="human",
                        help="Output format (default: human)")
 
+    batch.add_arguments(parser)
+    cache.add_arguments(parser)
+
     args = parser.parse_args()
+    cache.apply_arguments(args)
+
+    station_ids = batch.read_station_ids(args.station_ids, args.file)
+    if not station_ids:
+        parser.error("at least one station ID is required (as argument or via --file)")
+    if args.watch is not None and (len(station_ids) > 1 or args.file or args.until):
+        parser.error("--watch takes a single station and cannot be combined with --until")
+    if args.watch is not None and args.watch <= 0:
+        parser.error("--watch INTERVAL must be positive")
+    if args.until and parse_timestamp(args.until) is None:
+        print(f"❌ Invalid --until datetime: '{args.until}'", file=sys.stderr)
+        print("Required format: YYYYMMDDTHHmmss (e.g. 20260210T220000)", file=sys.stderr)
+        sys.exit(0)
 
-    # Get API token from environment
+    # Get API token from environment (settings file / .env only read once a call is needed)
+    load_token()
     api_token = os.getenv("NAVITIA_API_TOKEN")
     if not api_token:
         print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
@@ -188,9 +162,33 @@ Examples:
         print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
         sys.exit(0)
 
+    # Batch mode: fan out and stream one result per station as it completes
+    if len(station_ids) > 1 or args.file:
+        if args.until:
+            fetch = lambda sid: list(navitia.iter_arrivals(
+                sid, api_token, args.until, args.from_datetime, args.data_freshness))
+        else:
+            fetch = lambda sid: navitia.get_arrivals(
+                sid, api_token, args.count, args.from_datetime, args.data_freshness)
+        results = batch.run(fetch, station_ids, args.concurrency)
+        batch.print_results(results, "arrivals", format_output, args.format)
+        sys.exit(0)
+
+    # Watch: poll in this process and print only what changed
+    if args.watch:
+        watch_arrivals(station_ids[0], api_token, args.watch, args.count, args.from_datetime,
+                       args.data_freshness, args.format)
+        sys.exit(0)
+
+    # Time window: stream pages as they arrive
+    if args.until:
+        stream_arrivals(station_ids[0], api_token, args.until, args.from_datetime,
+                        args.data_freshness, args.format)
+        sys.exit(0)
+
     # Get arrivals
     arrivals = get_arrivals(
-        args.station_id,
+        station_ids[0],
         api_token,
         args.count,
         args.from_datetime,
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Navitia API, replaying recorded responses.
+
+Serves /coverage/{coverage}/... from the synthetic responses of
+mock_responses.py, or from fixture files (departures.json, arrivals.json,
+journeys.json, journeys_large.json, places.json, stop_area.json) with
+--fixtures, with configurable latency, jitter and error injection, for load
+tests and CI runs without network access. Point the scripts at it with
+NAVITIA_API_URL:
+
+    python mock_navitia.py --port 8080 --latency 0.05 --jitter 0.02 --error-rate 0.01
+    NAVITIA_API_URL=http://127.0.0.1:8080/v1 NAVITIA_RATE=0 python get_departures.py "stop_area:SNCF:87686006"
+
+Tests and benchmarks embed it directly:
+
+    with MockNavitia(latency=0.05, rate_limit_every=5) as api:
+        client.BASE_URL = api.url
+        ...
+    api.hits  # requests served, including injected errors
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+COVERAGE_REGIONS = b'{"regions":[{"id":"sncf","status":"running"}]}'
+NOT_FOUND = b'{"error":{"id":"unknown_object","message":"Invalid id"}}'
+RATE_LIMITED = b'{"message":"API rate limit exceeded"}'
+SERVER_ERROR = b'{"error":{"id":"internal_error","message":"Injected server error"}}'
+
+
+_generated = {}
+
+
+def load_fixture(name, fixtures=None):
+    """Return a decoded response (e.g. "departures" → departures.json)."""
+    return json.loads(fixture_bytes(name, fixtures))
+
+
+def fixture_bytes(name, fixtures=None):
+    """
+    Return a response's raw JSON bytes.
+
+    Args:
+        name: Response name, e.g. "departures"
+        fixtures: Directory of recorded files (None = the synthetic responses)
+    """
+    if fixtures is None:
+        if not _generated:
+            import mock_responses
+            _generated.update({key: mock_responses.dump(data) for key, data in mock_responses.build().items()})
+        return _generated[name]
+    with open(os.path.join(fixtures, f"{name}.json"), "rb") as f:
+        return f.read()
+
+
+def fixture_for(path, params):
+    """Pick the fixture answering a request; journeys with count > 3 get the large one."""
+    if path.endswith("/departures"):
+        return "departures"
+    if path.endswith("/arrivals"):
+        return "arrivals"
+    if path == "/journeys":
+        return "journeys_large" if int(params.get("count", 5)) > 3 else "journeys"
+    if path == "/places":
+        return "places"
+    if path.startswith("/stop_areas/"):
+        return "stop_area"
+    return None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once: the default backlog of 5 drops them
+    request_queue_size = 128
+
+
+class MockNavitia:
+    """Threaded HTTP server with configurable latency and error injection."""
+
+    def __init__(self, latency=0.0, rate_limit_every=0, retry_after=0, jitter=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, host="127.0.0.1", port=0,
+                 fixtures=None, seed=None):
+        """
+        Args:
+            latency: Seconds to wait before answering each request
+            rate_limit_every: Answer every Nth request with HTTP 429 (0 = never)
+            retry_after: Retry-After value sent with injected 429s
+            jitter: Extra random delay, uniform between 0 and this many seconds
+            error_rate: Fraction of requests answered with HTTP 503
+            rate_limit_rate: Fraction of requests answered with HTTP 429
+            host: Address to listen on
+            port: Port to listen on (0 = any free port)
+            fixtures: Directory of recorded responses (None = the synthetic ones)
+            seed: Seed for the jitter and error draws (None = unseeded)
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.fixtures = fixtures
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._bodies = {}
+        self._server = _Server((host, port), self._handler())
+
+    @property
+    def api_url(self):
+        """API root to use as NAVITIA_API_URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def url(self):
+        """Coverage URL to use as client.BASE_URL."""
+        return f"{self.api_url}/coverage/sncf"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def close(self):
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _body(self, name):
+        if name not in self._bodies:
+            self._bodies[name] = fixture_bytes(name, self.fixtures)
+        return self._bodies[name]
+
+    def _respond(self, raw_path):
+        """Return (status, headers, body) for a request path with query string."""
+        with self._lock:
+            self.hits += 1
+            hit = self.hits
+            draw = self._random.random()
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if (self.rate_limit_every and hit % self.rate_limit_every == 0) or draw < self.rate_limit_rate:
+            return 429, {"Retry-After": str(self.retry_after)}, RATE_LIMITED
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 503, {}, SERVER_ERROR
+        url = urlsplit(raw_path)
+        path = url.path
+        if path.rstrip("/").endswith("/coverage"):
+            return 200, {}, COVERAGE_REGIONS
+        if "/coverage/" in path:
+            path = "/" + path.split("/coverage/", 1)[1].partition("/")[2]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        name = fixture_for(path, params)
+        if name is None:
+            return 404, {}, NOT_FOUND
+        return 200, {}, self._body(name)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes: without this, small
+            # responses stall ~40 ms on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, headers, body = mock._respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local Navitia stand-in replaying recorded responses (no token or network needed)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python mock_navitia.py --port 8080
+  python mock_navitia.py --port 8080 --latency 0.05 --jitter 0.02 --error-rate 0.01 --rate-limit-rate 0.005
+
+  # In another shell: every script (and save-journey.sh, test-api.sh) talks to it,
+  # without client-side pacing
+  export NAVITIA_API_URL=http://127.0.0.1:8080/v1 NAVITIA_API_TOKEN=test NAVITIA_RATE=0
+  python get_departures.py "stop_area:SNCF:87686006" --no-cache
+        """
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                       help="Seconds before each answer (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                       help="Extra random delay of up to this many seconds (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                       help="Fraction of requests answered with HTTP 503 (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                       help="Fraction of requests answered with HTTP 429 (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=1,
+                       help="Retry-After seconds sent with HTTP 429 (default: 1)")
+    parser.add_argument("--fixtures",
+                       help="Directory of recorded responses (default: synthetic ones, see mock_responses.py)")
+    parser.add_argument("--seed", type=int, help="Seed for jitter and error draws (default: random)")
+
+    args = parser.parse_args()
+
+    if args.fixtures and not os.path.isfile(os.path.join(args.fixtures, "departures.json")):
+        print(f"❌ No recorded responses in {os.path.normpath(args.fixtures)}", file=sys.stderr)
+        print("Pass --fixtures DIR (departures.json, arrivals.json, journeys.json, ...)", file=sys.stderr)
+        sys.exit(0)
+
+    try:
+        api = MockNavitia(args.latency, 0, args.retry_after, args.jitter, args.error_rate,
+                          args.rate_limit_rate, args.host, args.port, args.fixtures, args.seed)
+    except OSError as e:
+        print(f"❌ Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(0)
+    print(f"Navitia stand-in on {api.api_url} (Ctrl-C to stop)")
+    print(f"  export NAVITIA_API_URL={api.api_url}")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+        print(f"\n{api.hits} request(s) served")
+
+
+if __name__ == "__main__":
+    main()
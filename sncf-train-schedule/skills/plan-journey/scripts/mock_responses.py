@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Synthetic Navitia responses served by mock_navitia.py.
+
+The responses follow the structure of real /coverage/sncf responses — full
+display_informations, stop_point and route objects, links, disruptions,
+geojson and stop_date_times — with deterministic content built from the
+bundled station list (references/stations.tsv), so load tests and benchmarks
+parse and format realistic payloads without any API access. The recorded
+fixtures of the repository's test suite (tests/fixtures/navitia) are these
+responses written to disk.
+
+Usage:
+    python mock_responses.py tests/fixtures/navitia    # write the fixture files
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+STATIONS_TSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "references", "stations.tsv")
+
+START = datetime(2026, 2, 10, 14, 0, 0)
+MODES = [("TGV INOUI", "TGV INOUI", "physical_mode:LongDistanceTrain"),
+         ("TER", "TER", "physical_mode:LocalTrain"),
+         ("OUIGO", "OUIGO", "physical_mode:LongDistanceTrain"),
+         ("Intercités", "INTERCITES", "physical_mode:LongDistanceTrain")]
+
+
+def load_stations():
+    stations = []
+    with open(STATIONS_TSV, encoding="utf-8") as f:
+        for line in f:
+            _, sid, name, lon, lat = line.rstrip("\n").split("\t")
+            stations.append({"id": sid, "name": name, "lon": float(lon), "lat": float(lat)})
+    return stations
+
+
+def ts(dt):
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def coord(station):
+    return {"lon": f"{station['lon']:.6f}", "lat": f"{station['lat']:.6f}"}
+
+
+def stop_area(station):
+    return {
+        "id": station["id"], "name": station["name"], "label": f"{station['name']} (Ville)",
+        "coord": coord(station), "timezone": "Europe/Paris", "links": [],
+        "codes": [{"type": "uic", "value": station["id"].rsplit(":", 1)[-1]}],
+        "administrative_regions": [{"id": "admin:fr:75056", "name": station["name"].split()[0],
+                                    "level": 8, "zip_code": "", "coord": coord(station),
+                                    "insee": "75056", "label": station["name"]}],
+    }
+
+
+def stop_point(station):
+    return {
+        "id": station["id"].replace("stop_area", "stop_point") + ":Train",
+        "name": station["name"], "label": f"{station['name']} (Ville)",
+        "coord": coord(station), "links": [], "equipments": [],
+        "physical_modes": [{"id": "physical_mode:LongDistanceTrain", "name": "Train grande vitesse"}],
+        "commercial_modes": [{"id": "commercial_mode:TGV", "name": "TGV INOUI"}],
+        "stop_area": stop_area(station),
+        "fare_zone": {"name": "0"},
+    }
+
+
+def display_informations(rng, direction):
+    label, code, physical = rng.choice(MODES)
+    number = str(rng.randint(800, 9999))
+    return {
+        "direction": direction["name"], "code": code, "network": "SNCF",
+        "links": [],
+        "color": "000000", "name": label, "physical_mode": physical.split(":")[1],
+        "headsign": number, "label": code, "equipments": [], "text_color": "FFFFFF",
+        "trip_short_name": number, "commercial_mode": label, "description": "",
+    }
+
+
+def route(direction):
+    return {
+        "id": f"route:SNCF:FR:Line::{direction['id'][-8:]}:", "name": f"→ {direction['name']}",
+        "is_frequence": "False", "direction_type": "forward", "links": [],
+        "direction": {"id": direction["id"], "name": direction["name"], "quality": 0,
+                      "embedded_type": "stop_area", "stop_area": stop_area(direction)},
+        "geojson": {"type": "MultiLineString", "coordinates": []},
+        "line": {"id": "line:SNCF:FR:Line::1:", "name": direction["name"], "code": "",
+                 "color": "000000", "text_color": "FFFFFF", "links": [],
+                 "opening_time": "050000", "closing_time": "235900"},
+    }
+
+
+def board_item(rng, stations, station, i, kind):
+    direction = rng.choice([s for s in stations if s is not station])
+    base = START + timedelta(minutes=4 * i + rng.randint(0, 3))
+    roll = rng.random()
+    delay = 0 if roll < 0.7 else rng.choice([2, 5, 7, 12, 25, -1])
+    # A few cancelled trains per board
+    cancelled = {"departure": "no_departing", "arrival": "no_arriving"}[kind]
+    info = [cancelled] if i % 13 == 12 else []
+    actual = base + timedelta(minutes=delay)
+    return {
+        "display_informations": display_informations(rng, direction),
+        "stop_point": stop_point(station),
+        "route": route(direction),
+        "links": [{"type": "line", "id": "line:SNCF:FR:Line::1:"},
+                  {"type": "vehicle_journey", "id": f"vehicle_journey:SNCF:{i}"},
+                  {"type": "route", "id": "route:SNCF:1"},
+                  {"type": "commercial_mode", "id": "commercial_mode:TGV"},
+                  {"type": "physical_mode", "id": "physical_mode:LongDistanceTrain"},
+                  {"type": "network", "id": "network:SNCF:TGV"}],
+        "stop_date_time": {
+            "links": [], "additional_informations": info, "data_freshness": "realtime",
+            "arrival_date_time": ts(actual), "departure_date_time": ts(actual),
+            "base_arrival_date_time": ts(base), "base_departure_date_time": ts(base),
+        },
+    }
+
+
+def envelope(rng, **payload):
+    data = {
+        "pagination": {"start_page": 0, "items_on_page": 0, "items_per_page": 0, "total_result": 0},
+        "links": [{"href": "https://api.navitia.io/v1/coverage/sncf/stop_areas/{stop_area.id}",
+                   "type": "stop_area", "rel": "stop_areas", "templated": True}],
+        "disruptions": [],
+        "notes": [],
+        "feed_publishers": [{"id": "sncf", "name": "SNCF PRODUCTION", "url": "", "license": ""}],
+        "context": {"timezone": "Europe/Paris", "current_datetime": ts(START),
+                    "car_direct_path": {"co2_emission": {"value": 0, "unit": ""}}},
+        "exceptions": [],
+    }
+    data.update(payload)
+    return data
+
+
+def board(rng, stations, kind, count):
+    station = next(s for s in stations if s["id"] == "stop_area:SNCF:87686006")
+    items = [board_item(rng, stations, station, i, kind) for i in range(count)]
+    data = envelope(rng, **{kind + "s": items})
+    data["pagination"].update(items_on_page=count, items_per_page=count, total_result=count)
+    return data
+
+
+def geojson(rng, a, b, points):
+    coordinates = []
+    for k in range(points):
+        t = k / (points - 1)
+        coordinates.append([round(a["lon"] + (b["lon"] - a["lon"]) * t + rng.uniform(-0.01, 0.01), 6),
+                            round(a["lat"] + (b["lat"] - a["lat"]) * t + rng.uniform(-0.01, 0.01), 6)])
+    return {"type": "LineString", "coordinates": coordinates,
+            "properties": [{"length": points * 350}]}
+
+
+def place(station):
+    return {"id": station["id"].replace("stop_area", "stop_point") + ":Train",
+            "name": station["name"], "quality": 0, "embedded_type": "stop_point",
+            "stop_point": stop_point(station)}
+
+
+def pt_section(rng, stations, a, b, dep, minutes, points, stops):
+    arr = dep + timedelta(minutes=minutes)
+    intermediate = [rng.choice(stations) for _ in range(stops)]
+    calls = [a] + intermediate + [b]
+    stop_date_times = []
+    for k, station in enumerate(calls):
+        t = dep + timedelta(minutes=minutes * k // (len(calls) - 1))
+        stop_date_times.append({
+            "stop_point": stop_point(station), "links": [], "additional_informations": [],
+            "arrival_date_time": ts(t), "departure_date_time": ts(t),
+            "base_arrival_date_time": ts(t), "base_departure_date_time": ts(t),
+        })
+    return {
+        "id": f"section_{rng.randrange(10**8)}", "type": "public_transport",
+        "from": place(a), "to": place(b), "duration": minutes * 60,
+        "departure_date_time": ts(dep), "arrival_date_time": ts(arr),
+        "base_departure_date_time": ts(dep), "base_arrival_date_time": ts(arr),
+        "data_freshness": "realtime", "additional_informations": ["regular"],
+        "co2_emission": {"value": round(rng.uniform(200, 3000), 2), "unit": "gEC"},
+        "display_informations": display_informations(rng, b),
+        "links": [{"type": "vehicle_journey", "id": "vehicle_journey:SNCF:1"},
+                  {"type": "line", "id": "line:SNCF:FR:Line::1:"},
+                  {"type": "route", "id": "route:SNCF:1"},
+                  {"type": "commercial_mode", "id": "commercial_mode:TGV"},
+                  {"type": "physical_mode", "id": "physical_mode:LongDistanceTrain"},
+                  {"type": "network", "id": "network:SNCF:TGV"}],
+        "geojson": geojson(rng, a, b, points),
+        "stop_date_times": stop_date_times,
+    }
+
+
+def simple_section(kind, a, b, dep, seconds, transfer_type=None):
+    section = {
+        "id": f"section_{kind}_{dep:%H%M%S}", "type": kind, "duration": seconds,
+        "departure_date_time": ts(dep), "arrival_date_time": ts(dep + timedelta(seconds=seconds)),
+        "co2_emission": {"value": 0, "unit": ""}, "links": [],
+    }
+    if kind != "waiting":
+        section["from"] = place(a)
+        section["to"] = place(b)
+    if transfer_type:
+        section["transfer_type"] = transfer_type
+        section["geojson"] = {"type": "LineString", "coordinates": [[a["lon"], a["lat"]], [b["lon"], b["lat"]]],
+                              "properties": [{"length": 120}]}
+    return section
+
+
+def journey(rng, stations, origin, destination, dep, legs, points, stops):
+    hubs = [rng.choice(stations) for _ in range(legs - 1)]
+    calls = [origin] + hubs + [destination]
+    sections, t = [], dep
+    for k in range(legs):
+        if k:
+            sections.append(simple_section("transfer", calls[k], calls[k], t, 300, "walking"))
+            t += timedelta(seconds=300)
+            sections.append(simple_section("waiting", calls[k], calls[k], t, 600))
+            t += timedelta(seconds=600)
+        minutes = rng.randint(40, 150)
+        sections.append(pt_section(rng, stations, calls[k], calls[k + 1], t, minutes, points, stops))
+        t += timedelta(minutes=minutes)
+    duration = int((t - dep).total_seconds())
+    status = rng.choice(["", "", "", "SIGNIFICANT_DELAYS", "REDUCED_SERVICE"])
+    return {
+        "duration": duration, "nb_transfers": legs - 1,
+        "departure_date_time": ts(dep), "arrival_date_time": ts(t),
+        "requested_date_time": ts(START), "type": "best" if legs == 1 else "fastest",
+        "status": status, "tags": ["walking", "ecologic"],
+        "co2_emission": {"value": round(rng.uniform(500, 9000), 2), "unit": "gEC"},
+        "durations": {"total": duration, "walking": 300 * (legs - 1), "car": 0, "bike": 0,
+                      "taxi": 0, "ridesharing": 0},
+        "distances": {"walking": 120 * (legs - 1), "car": 0, "bike": 0, "taxi": 0, "ridesharing": 0},
+        "fare": {"found": False, "total": {"value": "0.0"}, "links": []},
+        "calendars": [{"week_pattern": {"monday": True, "tuesday": True}, "active_periods": []}],
+        "links": [{"href": "https://api.navitia.io/v1/coverage/sncf/journeys?...", "type": "journeys",
+                   "rel": "same_journey_schedules", "templated": False}],
+        "sections": sections,
+    }
+
+
+def journeys(rng, stations, count, legs, points, stops):
+    origin = next(s for s in stations if s["id"] == "stop_area:SNCF:87686006")
+    destination = next(s for s in stations if s["id"] == "stop_area:SNCF:87751008")
+    items = [journey(rng, stations, origin, destination, START + timedelta(minutes=30 * i),
+                     legs if i % 2 else max(1, legs - 1), points, stops)
+             for i in range(count)]
+    data = envelope(rng, journeys=items, tickets=[], terminus=[stop_area(destination)])
+    # Paging links: next departs a minute after the latest departure, prev
+    # arrives a minute before the earliest arrival
+    query = f"https://api.navitia.io/v1/coverage/sncf/journeys?from={origin['id']}&to={destination['id']}"
+    latest = START + timedelta(minutes=30 * (count - 1), seconds=60)
+    earliest = min(datetime.strptime(j["arrival_date_time"], "%Y%m%dT%H%M%S") for j in items) - timedelta(minutes=1)
+    data["links"] += [
+        {"href": f"{query}&datetime={ts(latest)}&datetime_represents=departure", "type": "next", "templated": False},
+        {"href": f"{query}&datetime={ts(earliest)}&datetime_represents=arrival", "type": "prev", "templated": False},
+    ]
+    return data
+
+
+def places(stations, query):
+    matches = [s for s in stations if query in s["name"].lower()]
+    return envelope(None, places=[
+        {"id": s["id"], "name": s["name"], "quality": 90 - i, "embedded_type": "stop_area",
+         "stop_area": stop_area(s)} for i, s in enumerate(matches)])
+
+
+def build():
+    """Return every response by name ("departures", "journeys_large", ...), always the same."""
+    rng = random.Random(2026)
+    stations = load_stations()
+    return {
+        "departures": board(rng, stations, "departure", 40),
+        "arrivals": board(rng, stations, "arrival", 40),
+        "journeys": journeys(rng, stations, 3, legs=1, points=60, stops=3),
+        "journeys_large": journeys(rng, stations, 10, legs=3, points=400, stops=12),
+        "places": places(stations, "paris"),
+        "stop_area": envelope(rng, stop_areas=[stop_area(stations[14])]),
+    }
+
+
+def dump(data):
+    """Serialize a response as served and recorded (compact UTF-8 JSON and a newline)."""
+    return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the synthetic Navitia responses as JSON files")
+    parser.add_argument("directory", help="Where to write departures.json, journeys.json, ...")
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for name, data in build().items():
+        with open(os.path.join(args.directory, f"{name}.json"), "wb") as f:
+            f.write(dump(data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Compact records for Navitia departures, arrivals and journeys.
+
+The formatters (get_departures, get_arrivals, plan_journey, save-journey.sh)
+render from these instead of walking nested dicts: each record is built in
+one pass from the Navitia JSON, with timestamps parsed and delays computed
+once. Plain classes with __slots__ (no per-instance __dict__) keep large
+boards and batch outputs small on every Python 3 version the scripts run on.
+
+--format json output still prints the Navitia objects themselves.
+"""
+from timestamps import parse_timestamp
+
+CANCELLED = "❌ SUPPRIMÉ"
+_CANCELLED_FLAGS = ("no_departing", "no_arriving")
+
+
+def clock(moment, text=""):
+    """Return HH:MM for a parsed timestamp, else the original text."""
+    if moment is None:
+        return text
+    return f"{moment.hour:02d}:{moment.minute:02d}"
+
+
+def _delay(base_text, actual_text, actual=None):
+    """Minutes between base and actual time (0 when equal, missing or malformed)."""
+    if not base_text or not actual_text or base_text == actual_text:
+        return 0
+    base = parse_timestamp(base_text)
+    if actual is None:
+        actual = parse_timestamp(actual_text)
+    if base is None or actual is None:
+        return 0
+    return int((actual - base).total_seconds() // 60)
+
+
+class StopDateTime:
+    """Times at one stop: realtime and base times, delays, cancellation."""
+
+    __slots__ = ("departure", "arrival", "departure_text", "arrival_text",
+                 "departure_delay", "arrival_delay", "cancelled")
+
+    def __init__(self, departure, arrival, departure_text, arrival_text,
+                 departure_delay=0, arrival_delay=0, cancelled=False):
+        self.departure = departure
+        self.arrival = arrival
+        self.departure_text = departure_text
+        self.arrival_text = arrival_text
+        self.departure_delay = departure_delay
+        self.arrival_delay = arrival_delay
+        self.cancelled = cancelled
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from a Navitia stop_date_time object."""
+        departure_text = data.get("departure_date_time", "")
+        arrival_text = data.get("arrival_date_time", "")
+        base_departure = data.get("base_departure_date_time")
+        base_arrival = data.get("base_arrival_date_time")
+        info = data.get("additional_informations", ())
+
+        # On a board, arrival and departure are usually the same instant
+        departure = parse_timestamp(departure_text)
+        arrival = departure if arrival_text == departure_text else parse_timestamp(arrival_text)
+        departure_delay = _delay(base_departure, departure_text, departure)
+        if base_arrival == base_departure and arrival_text == departure_text:
+            arrival_delay = departure_delay
+        else:
+            arrival_delay = _delay(base_arrival, arrival_text, arrival)
+        return cls(departure, arrival, departure_text, arrival_text,
+                   departure_delay, arrival_delay,
+                   any(flag in info for flag in _CANCELLED_FLAGS))
+
+    def disruption(self, kind):
+        """Return '+Xmin', '-Xmin', '❌ SUPPRIMÉ' or '' for the 'departure' or 'arrival' time."""
+        if self.cancelled:
+            return CANCELLED
+        delay = self.departure_delay if kind == "departure" else self.arrival_delay
+        if delay == 0:
+            return ""
+        return f"+{delay}min" if delay > 0 else f"{delay}min"
+
+
+class Departure:
+    """One row of a departures board."""
+
+    __slots__ = ("code", "direction", "commercial_mode", "headsign", "stop_date_time",
+                 "vehicle_journey", "platform")
+
+    def __init__(self, code, direction, commercial_mode, headsign, stop_date_time,
+                 vehicle_journey=None, platform=None):
+        self.code = code
+        self.direction = direction
+        self.commercial_mode = commercial_mode
+        self.headsign = headsign
+        self.stop_date_time = stop_date_time
+        self.vehicle_journey = vehicle_journey
+        self.platform = platform
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from a Navitia departure (or arrival) object."""
+        info = data.get("display_informations", {})
+        # The item's own links name its vehicle journey; the display links are disruptions
+        return cls(
+            info.get("code", "?"),
+            info.get("direction", "Unknown"),
+            info.get("commercial_mode", ""),
+            info.get("headsign", ""),
+            StopDateTime.from_json(data.get("stop_date_time", {})),
+            next((link.get("id") for link in data.get("links", ())
+                  if link.get("type") == "vehicle_journey"), None),
+            data.get("stop_point", {}).get("platform_code"),
+        )
+
+
+class Arrival(Departure):
+    """One row of an arrivals board (same shape; `direction` is the train's terminus)."""
+
+    __slots__ = ()
+
+
+class Section:
+    """One leg of a journey: public transport, transfer, waiting, walking..."""
+
+    __slots__ = ("type", "duration", "transfer_type", "code", "direction", "commercial_mode",
+                 "from_name", "to_name", "departure", "arrival", "departure_text", "arrival_text")
+
+    def __init__(self, type, duration=0, transfer_type="", code="?", direction="Unknown",
+                 commercial_mode="", from_name="?", to_name="?", departure_text="",
+                 arrival_text=""):
+        self.type = type
+        self.duration = duration
+        self.transfer_type = transfer_type
+        self.code = code
+        self.direction = direction
+        self.commercial_mode = commercial_mode
+        self.from_name = from_name
+        self.to_name = to_name
+        self.departure_text = departure_text
+        self.arrival_text = arrival_text
+        self.departure = parse_timestamp(departure_text)
+        self.arrival = parse_timestamp(arrival_text)
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from a Navitia journey section."""
+        info = data.get("display_informations", {})
+        return cls(
+            data.get("type", "unknown"),
+            data.get("duration", 0),
+            data.get("transfer_type", ""),
+            info.get("code", "?"),
+            info.get("direction", "Unknown"),
+            info.get("commercial_mode", ""),
+            data.get("from", {}).get("name", "?"),
+            data.get("to", {}).get("name", "?"),
+            data.get("departure_date_time", ""),
+            data.get("arrival_date_time", ""),
+        )
+
+
+class Journey:
+    """One journey option with its sections."""
+
+    __slots__ = ("departure", "arrival", "departure_text", "arrival_text", "requested_text",
+                 "duration", "nb_transfers", "status", "type", "co2", "sections")
+
+    def __init__(self, departure_text="", arrival_text="", duration=0, nb_transfers=0,
+                 status="", type="", co2=0, sections=(), requested_text=""):
+        self.departure_text = departure_text
+        self.arrival_text = arrival_text
+        self.requested_text = requested_text
+        self.departure = parse_timestamp(departure_text)
+        self.arrival = parse_timestamp(arrival_text)
+        self.duration = duration
+        self.nb_transfers = nb_transfers
+        self.status = status
+        self.type = type
+        self.co2 = co2
+        self.sections = sections
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from a Navitia journey (full or projected, see navitia.project_journey)."""
+        return cls(
+            data.get("departure_date_time", ""),
+            data.get("arrival_date_time", ""),
+            data.get("duration", 0),
+            data.get("nb_transfers", 0),
+            data.get("status", ""),
+            data.get("type", ""),
+            (data.get("co2_emission") or {}).get("value", 0),
+            tuple(Section.from_json(s) for s in data.get("sections", [])),
+            data.get("requested_date_time", ""),
+        )
+
+    @property
+    def status_label(self):
+        """'❌ SUPPRIMÉ' for cancelled journeys, '⚠️' for delayed/modified ones, else ''."""
+        if self.status == "NO_SERVICE":
+            return CANCELLED
+        if self.status in ("SIGNIFICANT_DELAYS", "MODIFIED_SERVICE"):
+            return "⚠️"
+        return ""
+
+
+# -- Helpers kept for the scripts' historical function names ------------------
+
+def format_datetime(dt_string):
+    """Convert YYYYMMDDTHHmmss to HH:MM (unparseable input is returned unchanged)."""
+    return clock(parse_timestamp(dt_string), dt_string)
+
+
+def format_duration(seconds):
+    """Convert seconds to readable duration."""
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    if hours > 0:
+        return f"{hours}h {minutes}min"
+    return f"{minutes}min"
+
+
+def compute_delay_minutes(base_dt_str, actual_dt_str):
+    """Return delay in minutes (positive = late, negative = early, 0 = on time)."""
+    return _delay(base_dt_str, actual_dt_str)
+
+
+def format_disruption(stop_date_time, time_key):
+    """Return disruption label: '+Xmin', '-Xmin', '❌ SUPPRIMÉ', or '' for on-time.
+
+    Args:
+        stop_date_time: The stop_date_time dict from Navitia response
+        time_key: 'departure_date_time' or 'arrival_date_time'
+    """
+    return StopDateTime.from_json(stop_date_time).disruption(time_key.split("_", 1)[0])
+
+
+def format_journey_status(journey):
+    """Return status label for a journey: '❌ SUPPRIMÉ', '⚠️', or ''."""
+    return Journey(status=journey.get("status", "")).status_label
@@ -0,0 +1,534 @@
+"""
+Navitia API layer shared by the CLI scripts and navitia_async.py.
+
+Each endpoint is split into a request builder (path, params, timeout) and a
+response parser, so the blocking functions below and the asyncio variants in
+navitia_async.py issue identical queries and return identical structures.
+
+Functions here return data and raise errors.NavitiaError subclasses; they
+never print or exit.
+
+/journeys payloads are large (geojson, full stop_point objects, links,
+fares), so journeys are projected down to the fields the formatters and
+--format json consumers use, and the blocking API streams them through
+ijson when it is installed.
+
+Boards over a time window (--until) are walked page by page with
+iter_departures / iter_arrivals, fetching the next page while the caller
+renders the current one. Journeys over a departure window are collected by
+plan_journey_range, which walks slices of the window concurrently and keeps
+the Pareto-optimal journeys. plan_journey_page also returns the cursors of
+the response's next/prev links, for paging through later or earlier options.
+
+base_schedule boards are answered from the local GTFS timetable
+(timetable.py) when one has been built and covers the station and date.
+"""
+import json
+from collections import namedtuple
+from datetime import timedelta
+
+import client
+import config
+from client import get_json
+from timestamps import TIMESTAMP_FORMAT, parse_timestamp
+
+Request = namedtuple("Request", "path params timeout")
+
+# Board items per request when walking a time window
+WINDOW_PAGE_SIZE = 50
+
+# Journey window walks (plan_journey_range): slice length walked by one
+# worker, journeys asked per call, parallel slices
+RANGE_SLICE = timedelta(hours=1)
+RANGE_PAGE_SIZE = 10
+RANGE_CONCURRENCY = 6
+
+# Ask Navitia for less: no geojson shapes, shallow embedded objects
+JOURNEY_DEPTH = 0
+
+# Fields kept when projecting journeys (see project_journey)
+JOURNEY_FIELDS = ("duration", "nb_transfers", "departure_date_time", "arrival_date_time",
+                  "requested_date_time", "type", "status", "tags", "co2_emission", "durations")
+SECTION_FIELDS = ("id", "type", "mode", "duration", "transfer_type",
+                  "departure_date_time", "arrival_date_time",
+                  "base_departure_date_time", "base_arrival_date_time",
+                  "data_freshness", "additional_informations", "vehicle_journey")
+DISPLAY_FIELDS = ("code", "commercial_mode", "direction", "headsign", "label", "name",
+                  "network", "physical_mode", "trip_short_name")
+PLACE_FIELDS = ("id", "name", "embedded_type")
+STOP_TIME_FIELDS = ("arrival_date_time", "departure_date_time",
+                    "base_arrival_date_time", "base_departure_date_time",
+                    "additional_informations")
+
+# Top-level /journeys links followed when paging (see parse_page_links)
+PAGE_LINKS = ("next", "prev")
+
+
+# -- Request builders -------------------------------------------------------
+
+def departures_request(station_id, count=10, from_datetime=None, data_freshness="realtime"):
+    """Build the /stop_areas/{id}/departures request."""
+    params = {"count": count, "data_freshness": data_freshness}
+    if from_datetime:
+        params["from_datetime"] = from_datetime
+    return Request(f"/stop_areas/{station_id}/departures", params, config.get().timeout)
+
+
+def arrivals_request(station_id, count=10, from_datetime=None, data_freshness="realtime"):
+    """Build the /stop_areas/{id}/arrivals request."""
+    params = {"count": count, "data_freshness": data_freshness}
+    if from_datetime:
+        params["from_datetime"] = from_datetime
+    return Request(f"/stop_areas/{station_id}/arrivals", params, config.get().timeout)
+
+
+def journeys_request(from_location, to_location, datetime_param=None,
+                     datetime_represents="departure", count=5, data_freshness="realtime",
+                     min_nb_journeys=None):
+    """
+    Build the /journeys request (journey planning is slow: 15s timeout by default).
+
+    With min_nb_journeys, Navitia returns at least that many journeys
+    instead of exactly `count`.
+    """
+    params = {
+        "from": from_location,
+        "to": to_location,
+        "count": count,
+        "data_freshness": data_freshness,
+        "depth": JOURNEY_DEPTH,
+        "disable_geojson": "true",
+    }
+    if min_nb_journeys is not None:
+        del params["count"]
+        params["min_nb_journeys"] = min_nb_journeys
+    if datetime_param:
+        params["datetime"] = datetime_param
+        params["datetime_represents"] = datetime_represents
+    return Request("/journeys", params, config.get().journey_timeout)
+
+
+def places_request(query, count=10):
+    """Build the /places request, restricted to stop areas."""
+    return Request("/places", {"q": query, "type[]": "stop_area", "count": count}, config.get().timeout)
+
+
+def stop_area_request(station_id):
+    """Build the /stop_areas/{id} request."""
+    return Request(f"/stop_areas/{station_id}", None, config.get().timeout)
+
+
+# -- Response parsers -------------------------------------------------------
+
+def parse_departures(data):
+    """Return the departures list of a response."""
+    return data.get("departures", [])
+
+
+def parse_arrivals(data):
+    """Return the arrivals list of a response."""
+    return data.get("arrivals", [])
+
+
+def parse_journeys(data):
+    """Return the projected journeys of a response (see project_journey)."""
+    return [project_journey(journey) for journey in data.get("journeys", [])]
+
+
+def _pick(obj, fields):
+    return {key: obj[key] for key in fields if key in obj}
+
+
+def _project_section(section):
+    projected = _pick(section, SECTION_FIELDS)
+    trip = next((link.get("id") for link in section.get("links", ())
+                 if link.get("type") == "vehicle_journey"), None)
+    if trip:
+        projected["vehicle_journey"] = trip
+    for key in ("from", "to"):
+        if key in section:
+            projected[key] = _pick(section[key], PLACE_FIELDS)
+    if "display_informations" in section:
+        projected["display_informations"] = _pick(section["display_informations"], DISPLAY_FIELDS)
+    if "stop_date_times" in section:
+        projected["stop_date_times"] = [
+            dict(_pick(sdt, STOP_TIME_FIELDS),
+                 stop_point=_pick(sdt.get("stop_point", {}), ("id", "name")))
+            for sdt in section["stop_date_times"]
+        ]
+    return projected
+
+
+def project_journey(journey):
+    """
+    Keep only the journey fields used by the formatters and JSON consumers.
+
+    Drops geojson, links, fares, calendars and full stop_point objects; a
+    section's vehicle journey link is kept as its "vehicle_journey" ID.
+    Projecting an already projected journey returns an equal one.
+    """
+    projected = _pick(journey, JOURNEY_FIELDS)
+    projected["sections"] = [_project_section(s) for s in journey.get("sections", [])]
+    return projected
+
+
+class _LinkTap:
+    """
+    Binary stream wrapper keeping the bytes read around a /journeys body's journeys array.
+
+    head holds the chunks read until the first journey was parsed, tail the
+    chunk in which the latest journey ended and the ones read after it: the
+    top-level members, whether before or after the journeys, are in these.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.head = []
+        self.tail = None
+
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        (self.head if self.tail is None else self.tail).append(chunk)
+        return chunk
+
+    def journey_parsed(self):
+        """Drop the chunks that can only hold journeys."""
+        chunks = self.tail or self.head
+        self.tail = chunks[-1:]
+
+    def page_links(self):
+        """Return the next/prev link objects found in the kept bytes."""
+        import re
+
+        links = []
+        for chunks in (self.head, self.tail or ()):
+            # Paging links are flat objects; no other Navitia link has these types
+            for match in re.finditer(rb'\{[^{}]*"type"\s*:\s*"(?:next|prev)"[^{}]*\}', b"".join(chunks)):
+                try:
+                    link = _pick(json.loads(match.group()), ("type", "href"))
+                except ValueError:
+                    continue
+                if link not in links:
+                    links.append(link)
+        return links
+
+
+def decode_journeys(stream):
+    """
+    Decode a /journeys body from a binary stream into
+    {"journeys": [projected...], "links": [next/prev links]}.
+
+    With ijson installed, journeys are parsed one at a time and projected
+    immediately, so the full payload is never held in memory; the paging
+    links are picked in the same pass from the bytes before the first
+    journey and after the last one. Otherwise the body is loaded with json
+    and projected afterwards.
+    """
+    try:
+        import ijson
+    except ImportError:
+        data = json.load(stream)
+        return {"journeys": parse_journeys(data),
+                "links": [_pick(link, ("type", "href")) for link in data.get("links", [])
+                          if link.get("type") in PAGE_LINKS]}
+    tap = _LinkTap(stream)
+    journeys = []
+    for journey in ijson.items(tap, "journeys.item", use_float=True):
+        journeys.append(project_journey(journey))
+        tap.journey_parsed()
+    return {"journeys": journeys, "links": tap.page_links()}
+
+
+# Decoders the local server (daemon.py) may apply to forwarded requests, by name
+DECODERS = {decode.__name__: decode for decode in (decode_journeys,)}
+
+
+def parse_page_links(data):
+    """
+    Return the cursors of a /journeys response's next/prev links.
+
+    Returns:
+        Dict mapping "next" / "prev" to (datetime, datetime_represents),
+        for the links present
+    """
+    from urllib.parse import parse_qs, urlsplit
+
+    pages = {}
+    for link in data.get("links", []):
+        if link.get("type") not in PAGE_LINKS:
+            continue
+        query = parse_qs(urlsplit(link.get("href", "")).query)
+        if "datetime" in query:
+            pages[link["type"]] = (query["datetime"][0], query.get("datetime_represents", ["departure"])[0])
+    return pages
+
+
+def parse_places(data):
+    """Convert a /places response to station dicts (id, name, quality, coordinates)."""
+    stations = []
+    for place in data.get("places", []):
+        station = {
+            "id": place.get("id"),
+            "name": place.get("name"),
+            "quality": place.get("quality", 0)
+        }
+
+        # Add coordinates if available
+        if "stop_area" in place and "coord" in place["stop_area"]:
+            coord = place["stop_area"]["coord"]
+            station["coordinates"] = f"{coord.get('lon')};{coord.get('lat')}"
+
+        stations.append(station)
+    return stations
+
+
+def parse_stop_area(data):
+    """Return the first stop_area object of a /stop_areas/{id} response, or None."""
+    stop_areas = data.get("stop_areas", [])
+    return stop_areas[0] if stop_areas else None
+
+
+# -- Blocking API -----------------------------------------------------------
+
+def _get(request, api_token, decode=None):
+    """Run a built request through the shared client."""
+    return get_json(request.path, api_token, request.params, timeout=request.timeout,
+                    decode=decode)
+
+
+def _local_board(kind, station_id, count, from_datetime, data_freshness):
+    """Answer a base_schedule board from the GTFS timetable when one is built, else None."""
+    if data_freshness != "base_schedule":
+        return None
+    import timetable
+
+    if not timetable.available():
+        return None
+    return timetable.board(station_id, kind, count, from_datetime)
+
+
+def get_departures(station_id, api_token, count=10, from_datetime=None, data_freshness="realtime"):
+    """Return the departures from a station (possibly empty)."""
+    local = _local_board("departure", station_id, count, from_datetime, data_freshness)
+    if local is not None:
+        return local
+    return parse_departures(_get(
+        departures_request(station_id, count, from_datetime, data_freshness), api_token))
+
+
+def get_arrivals(station_id, api_token, count=10, from_datetime=None, data_freshness="realtime"):
+    """Return the arrivals at a station (possibly empty)."""
+    local = _local_board("arrival", station_id, count, from_datetime, data_freshness)
+    if local is not None:
+        return local
+    return parse_arrivals(_get(
+        arrivals_request(station_id, count, from_datetime, data_freshness), api_token))
+
+
+def _board_key(item, time_key):
+    """Identify a board item across overlapping pages: (time, vehicle journey)."""
+    info = item.get("display_informations", {})
+    trip = next((link.get("id") for link in item.get("links", [])
+                 if link.get("type") == "vehicle_journey"), None)
+    return (item.get("stop_date_time", {}).get(time_key),
+            trip or (info.get("code"), info.get("headsign")))
+
+
+def _walk_window(fetch, time_key, from_datetime, until, page_size):
+    """
+    Yield board items from from_datetime up to until, one page at a time.
+
+    Each page starts at the latest time of the previous one, so items at
+    that time come back twice and are dropped; a page made only of items
+    at its start time is requested again at twice the size. The next page
+    is requested as soon as the current one arrives, while the caller
+    consumes it.
+
+    Args:
+        fetch: Callable (from_datetime, count) returning a list of board items
+        time_key: "departure_date_time" or "arrival_date_time"
+        from_datetime: Window start (None = now)
+        until: Window end, YYYYMMDDTHHmmss (inclusive)
+        page_size: Items per request
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    seen = set()
+    cursor, size = from_datetime, page_size
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        page = prefetch.submit(fetch, cursor, size)
+        while page is not None:
+            items = page.result()
+            times = [item.get("stop_date_time", {}).get(time_key) or "" for item in items]
+            latest = max(times, default="")
+
+            page = None
+            if latest and latest <= until:
+                if cursor is None or latest > cursor:
+                    cursor, size = latest, page_size
+                    page = prefetch.submit(fetch, cursor, size)
+                elif latest == cursor and len(items) >= size:
+                    size *= 2
+                    page = prefetch.submit(fetch, cursor, size)
+
+            keys = set()
+            for item, moment in zip(items, times):
+                key = _board_key(item, time_key)
+                keys.add(key)
+                if moment <= until and key not in seen:
+                    yield item
+            seen = keys
+
+
+def iter_departures(station_id, api_token, until, from_datetime=None,
+                    data_freshness="realtime", page_size=WINDOW_PAGE_SIZE):
+    """Yield every departure from from_datetime (None = now) up to until, paging ahead."""
+    return _walk_window(
+        lambda cursor, count: get_departures(station_id, api_token, count, cursor, data_freshness),
+        "departure_date_time", from_datetime, until, page_size)
+
+
+def iter_arrivals(station_id, api_token, until, from_datetime=None,
+                  data_freshness="realtime", page_size=WINDOW_PAGE_SIZE):
+    """Yield every arrival from from_datetime (None = now) up to until, paging ahead."""
+    return _walk_window(
+        lambda cursor, count: get_arrivals(station_id, api_token, count, cursor, data_freshness),
+        "arrival_date_time", from_datetime, until, page_size)
+
+
+def plan_journey(from_location, to_location, api_token, datetime_param=None,
+                 datetime_represents="departure", count=5, data_freshness="realtime"):
+    """Return journeys between two locations (possibly empty)."""
+    return parse_journeys(_get(
+        journeys_request(from_location, to_location, datetime_param,
+                         datetime_represents, count, data_freshness),
+        api_token, decode=decode_journeys))
+
+
+def plan_journey_page(from_location, to_location, api_token, datetime_param=None,
+                      datetime_represents="departure", count=5, data_freshness="realtime"):
+    """
+    Return (journeys, pages): journeys as plan_journey, and the cursors of
+    the response's next/prev links (see parse_page_links).
+    """
+    data = _get(journeys_request(from_location, to_location, datetime_param,
+                                 datetime_represents, count, data_freshness),
+                api_token, decode=decode_journeys)
+    return data.get("journeys", []), parse_page_links(data)
+
+
+def journey_trips(journey):
+    """
+    Identify a journey by the trains it rides: the vehicle journey of each
+    public transport section (departure time and code when it has none).
+    """
+    return tuple(section.get("vehicle_journey") or
+                 (section.get("departure_date_time"), section.get("display_informations", {}).get("code"))
+                 for section in journey.get("sections", []) if section.get("type") == "public_transport")
+
+
+def journey_key(journey):
+    """Identify a journey by its times and trains, to drop repeats across calls."""
+    return (journey.get("departure_date_time"), journey.get("arrival_date_time"),
+            tuple((section.get("departure_date_time"), section.get("display_informations", {}).get("code"),
+                   section.get("display_informations", {}).get("headsign"))
+                  for section in journey.get("sections", []) if section.get("type") == "public_transport"))
+
+
+def pareto_front(journeys):
+    """
+    Keep the journeys no other one beats on departure, arrival and changes.
+
+    A journey is dropped when another leaves no earlier, arrives no later
+    and has no more transfers, and differs on one of them; repeats (same
+    journey_key) are kept once.
+
+    Returns:
+        The remaining journeys by departure, then number of transfers
+    """
+    unique = {}
+    for journey in journeys:
+        unique.setdefault(journey_key(journey), journey)
+    scores = [(j.get("departure_date_time") or "", j.get("arrival_date_time") or "", j.get("nb_transfers") or 0, j)
+              for j in unique.values()]
+    front = [(departure, arrival, transfers, journey) for departure, arrival, transfers, journey in scores
+             if not any(d >= departure and a <= arrival and t <= transfers and (d, a, t) != (departure, arrival, transfers)
+                        for d, a, t, _ in scores)]
+    front.sort(key=lambda score: score[:3])
+    return [journey for _, _, _, journey in front]
+
+
+def _walk_journeys(fetch, start, end):
+    """
+    Collect journeys departing from start up to end (datetimes, inclusive).
+
+    Each call starts one minute after the latest departure of the previous
+    one, like Navitia's "next journeys" links.
+    """
+    found = []
+    cursor = start
+    while cursor <= end:
+        journeys = fetch(cursor.strftime(TIMESTAMP_FORMAT))
+        departures = [parse_timestamp(j.get("departure_date_time") or "") for j in journeys]
+        found.extend(j for j, moment in zip(journeys, departures) if moment and moment <= end)
+        latest = max((moment for moment in departures if moment), default=None)
+        if latest is None or latest < cursor:
+            break
+        cursor = latest + timedelta(minutes=1)
+    return found
+
+
+def plan_journey_range(from_location, to_location, api_token, from_datetime, until,
+                       data_freshness="realtime", page_size=RANGE_PAGE_SIZE,
+                       concurrency=RANGE_CONCURRENCY):
+    """
+    Return the Pareto-optimal journeys departing within a time window.
+
+    The window is cut into RANGE_SLICE slices walked concurrently over the
+    pooled session, each asking for at least `page_size` journeys per
+    call; repeats where slices overlap are dropped and the result is
+    reduced to pareto_front.
+
+    Args:
+        from_location: Origin (station ID or lon;lat coordinates)
+        to_location: Destination (station ID or lon;lat coordinates)
+        api_token: Navitia API token
+        from_datetime: Window start, YYYYMMDDTHHmmss (None = now)
+        until: Window end, YYYYMMDDTHHmmss (inclusive)
+        data_freshness: "realtime" or "base_schedule"
+        page_size: min_nb_journeys of each call
+        concurrency: Slices walked in parallel
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime
+
+    start = parse_timestamp(from_datetime) if from_datetime else datetime.now().replace(second=0, microsecond=0)
+    end = parse_timestamp(until)
+    slices = []
+    while start <= end:
+        slices.append((start, min(start + RANGE_SLICE - timedelta(seconds=1), end)))
+        start += RANGE_SLICE
+
+    def fetch(cursor):
+        return parse_journeys(_get(
+            journeys_request(from_location, to_location, cursor, "departure", page_size,
+                             data_freshness, min_nb_journeys=page_size),
+            api_token, decode=decode_journeys))
+
+    if not slices:
+        return []
+    workers = max(1, min(concurrency, len(slices)))
+    client.ensure_pool_size(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        walks = [pool.submit(_walk_journeys, fetch, low, high) for low, high in slices]
+        return pareto_front([journey for walk in walks for journey in walk.result()])
+
+
+def search_stations(query, api_token, count=10):
+    """Return stations matching a name from the /places API (possibly empty)."""
+    return parse_places(_get(places_request(query, count), api_token))
+
+
+def get_stop_area(station_id, api_token):
+    """Return the stop_area object for an ID, or None if the API returns none."""
+    return parse_stop_area(_get(stop_area_request(station_id), api_token))
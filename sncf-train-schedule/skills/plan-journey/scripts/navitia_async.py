@@ -0,0 +1,158 @@
+"""
+Asyncio variant of the Navitia API layer, for long-running services.
+
+Uses one httpx.AsyncClient connection pool per AsyncNavitia instance, so a
+single worker can serve hundreds of concurrent rider queries without a
+thread per request. Queries and result shapes are the ones built by
+navitia.py; failures raise errors.NavitiaError subclasses.
+
+Requests are paced by an in-process token bucket and retried on 429, 5xx
+and timeouts with the backoff policy of ratelimit.py. Identical concurrent
+requests on one instance are coalesced into a single upstream call.
+
+Requires httpx (pip install httpx). The on-disk response cache is not used
+here — a long-running service should keep its own in-memory state.
+
+Usage:
+    async with AsyncNavitia(api_token) as api:
+        departures, journeys = await asyncio.gather(
+            api.get_departures("stop_area:SNCF:87686006", count=5),
+            api.plan_journey("stop_area:SNCF:87686006", "stop_area:SNCF:87722025"),
+        )
+"""
+import asyncio
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import cache
+import client
+import config
+import errors
+import navitia
+import ratelimit
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncNavitia:
+    """Async Navitia client sharing one connection pool across all calls."""
+
+    def __init__(self, api_token, max_connections=DEFAULT_MAX_CONNECTIONS, base_url=None,
+                 rate=None, burst=None):
+        """
+        Args:
+            api_token: Navitia API token
+            max_connections: Upper bound on concurrent connections to the API
+            base_url: Coverage URL (default: client.base_url())
+            rate: Sustained requests per second (token bucket; default: config.get().rate)
+            burst: Token bucket size (default: config.get().burst)
+        """
+        if httpx is None:
+            raise ImportError("navitia_async requires httpx — install with: pip install httpx")
+        self._client = httpx.AsyncClient(
+            base_url=base_url or client.base_url(),
+            headers={
+                "Authorization": api_token,
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+            },
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        settings = config.get()
+        self._bucket = ratelimit.TokenBucket(settings.rate if rate is None else rate,
+                                             settings.burst if burst is None else burst)
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the connection pool."""
+        await self._client.aclose()
+
+    async def _acquire(self):
+        """Wait for a token from the in-process bucket (no pacing with a rate of 0)."""
+        while self._bucket.rate > 0:
+            wait = self._bucket.take(time.time())
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _get(self, request):
+        """Run a request built by navitia.py, joining an identical one already in flight."""
+        key = cache.make_key(request.path, request.params)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(request))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded: one caller being cancelled must not cancel the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, request):
+        """Issue a request with rate limiting and retries; return the decoded JSON body."""
+        for attempt in range(ratelimit.MAX_RETRIES + 1):
+            last_attempt = attempt == ratelimit.MAX_RETRIES
+            await self._acquire()
+            try:
+                response = await self._client.get(request.path, params=request.params,
+                                                  timeout=request.timeout)
+            except httpx.TimeoutException as e:
+                if last_attempt:
+                    raise errors.APITimeoutError(str(e)) from e
+                await asyncio.sleep(ratelimit.backoff_delay(attempt))
+                continue
+            except httpx.HTTPError as e:
+                raise errors.NetworkError(str(e)) from e
+
+            if response.status_code < 400:
+                return response.json()
+            retry_after = ratelimit.parse_retry_after(response.headers.get("Retry-After"))
+            if (last_attempt or response.status_code not in ratelimit.RETRY_STATUSES
+                    or (retry_after or 0) > ratelimit.MAX_RETRY_AFTER):
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = None
+                error = errors.for_status(response.status_code, body)
+                error.retry_after = retry_after
+                raise error
+            delay = ratelimit.backoff_delay(attempt, retry_after)
+            if response.status_code == 429:
+                self._bucket.block(time.time() + delay)
+            await asyncio.sleep(delay)
+
+    async def get_departures(self, station_id, count=10, from_datetime=None,
+                             data_freshness="realtime"):
+        """Return the departures from a station (possibly empty)."""
+        return navitia.parse_departures(await self._get(
+            navitia.departures_request(station_id, count, from_datetime, data_freshness)))
+
+    async def get_arrivals(self, station_id, count=10, from_datetime=None,
+                           data_freshness="realtime"):
+        """Return the arrivals at a station (possibly empty)."""
+        return navitia.parse_arrivals(await self._get(
+            navitia.arrivals_request(station_id, count, from_datetime, data_freshness)))
+
+    async def plan_journey(self, from_location, to_location, datetime_param=None,
+                           datetime_represents="departure", count=5, data_freshness="realtime"):
+        """Return journeys between two locations (possibly empty)."""
+        return navitia.parse_journeys(await self._get(
+            navitia.journeys_request(from_location, to_location, datetime_param,
+                                     datetime_represents, count, data_freshness)))
+
+    async def search_stations(self, query, count=10):
+        """Return stations matching a name from the /places API (possibly empty)."""
+        return navitia.parse_places(await self._get(navitia.places_request(query, count)))
+
+    async def get_stop_area(self, station_id):
+        """Return the stop_area object for an ID, or None if the API returns none."""
+        return navitia.parse_stop_area(await self._get(navitia.stop_area_request(station_id)))
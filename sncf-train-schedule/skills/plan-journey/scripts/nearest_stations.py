@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Find the SNCF stations nearest to a point, offline.
+
+Answers from the station index (see station_index.py) without an API call;
+build the full index for small stations, the bundled one only lists major
+stations.
+
+Usage:
+    python nearest_stations.py "2.3522;48.8566"
+    python nearest_stations.py "2.3522;48.8566" --k 5 --radius 2km
+"""
+
+import argparse
+import json
+import sys
+
+import station_index
+
+
+def format_distance(metres):
+    """Format a distance as "850 m" or "2.4 km"."""
+    return f"{metres} m" if metres < 1000 else f"{metres / 1000:.1f} km"
+
+
+def format_output(stations, output_format="human"):
+    """Format nearby stations for display."""
+    if output_format == "json":
+        return json.dumps(stations, indent=2, ensure_ascii=False)
+
+    # Human-readable format
+    output = []
+    for i, station in enumerate(stations, 1):
+        output.append(f"{i}. {station['name']} ({format_distance(station['distance'])})")
+        output.append(f"   ID: {station['id']}")
+        output.append(f"   Coordinates: {station['coordinates']}")
+        output.append("")
+
+    return "\n".join(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the SNCF stations nearest to coordinates (offline)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python nearest_stations.py "2.3522;48.8566"
+  python nearest_stations.py "2.3522;48.8566" --k 3 --radius 2km
+  python nearest_stations.py "4.8357;45.7640" --radius 500m --format json
+        """
+    )
+    parser.add_argument("coordinates", help="Point as lon;lat (e.g. 2.3522;48.8566)")
+    parser.add_argument("--k", type=int, default=5,
+                       help="Maximum number of stations (default: 5)")
+    parser.add_argument("--radius",
+                       help="Only stations within this distance, e.g. 2km or 500m (default: no limit)")
+    parser.add_argument("--format", choices=["human", "json"], default="human",
+                       help="Output format (default: human)")
+
+    args = parser.parse_args()
+
+    point = station_index.parse_coordinates(args.coordinates)
+    if point is None:
+        print(f"❌ Invalid coordinates: '{args.coordinates}'", file=sys.stderr)
+        print("Required format: lon;lat (e.g. 2.3522;48.8566)", file=sys.stderr)
+        sys.exit(0)
+    radius = None
+    if args.radius is not None:
+        radius = station_index.parse_radius(args.radius)
+        if radius is None:
+            print(f"❌ Invalid radius: '{args.radius}'", file=sys.stderr)
+            print("Use a distance such as 2km or 500m", file=sys.stderr)
+            sys.exit(0)
+
+    stations = station_index.nearest(point[0], point[1], args.k, radius)
+    if not station_index.is_complete():
+        print("⚠️  Only major stations are indexed; run 'python station_index.py build' for all stations",
+              file=sys.stderr)
+    if not stations:
+        within = f" within {args.radius}" if args.radius else ""
+        print(f"⚠️  No stations found{within} of {args.coordinates}", file=sys.stderr)
+        sys.exit(0)
+
+    print(format_output(stations, args.format))
+
+
+if __name__ == "__main__":
+    main()
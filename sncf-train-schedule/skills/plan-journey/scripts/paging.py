@@ -0,0 +1,156 @@
+"""
+Session state for paging through journey options (plan_journey.py --later / --earlier).
+
+Each search between two locations whose response has next/prev links
+records, in a small JSON file under .claude/, the cursors of those links
+and the trains of the journeys already shown. --later and --earlier start from the stored
+cursor and return only journeys made of other trains, so "and the next
+ones?" is one /journeys call printing new options only, instead of a
+shifted --datetime search printing overlapping ones again.
+"""
+import json
+import os
+import time
+from datetime import timedelta
+
+from navitia import journey_trips
+from timestamps import TIMESTAMP_FORMAT, parse_timestamp
+
+# Searches older than this are forgotten (a new conversation, a new plan)
+STATE_TTL = 6 * 3600
+# Searches kept in the file (oldest dropped first), and trains remembered per search
+MAX_SEARCHES = 20
+MAX_SEEN = 200
+# Pages followed when a page only repeats journeys already shown
+MAX_PAGES = 3
+
+
+def state_path():
+    """Return the paging state file for the current working directory."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.journeys.json")
+
+
+def search_key(from_location, to_location, data_freshness="realtime"):
+    """Key of a search in the state file."""
+    return f"{from_location}|{to_location}|{data_freshness}"
+
+
+def _load():
+    try:
+        with open(state_path(), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save(state):
+    """Write the state atomically; paging still works for this run if it cannot be saved."""
+    path = state_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def get_search(key):
+    """Return the recorded search for a key, or None if there is none or it expired."""
+    entry = _load().get(key)
+    if not isinstance(entry, dict) or time.time() - entry.get("updated", 0) > STATE_TTL:
+        return None
+    return entry
+
+
+def derive_pages(journeys):
+    """
+    Compute next/prev cursors for journeys without links (e.g. a last page).
+
+    Next departs one minute after the latest departure; prev arrives one
+    minute before the earliest arrival.
+    """
+    departures = [parse_timestamp(j.get("departure_date_time") or "") for j in journeys]
+    arrivals = [parse_timestamp(j.get("arrival_date_time") or "") for j in journeys]
+    departures = [moment for moment in departures if moment]
+    arrivals = [moment for moment in arrivals if moment]
+    pages = {}
+    if departures:
+        pages["next"] = ((max(departures) + timedelta(minutes=1)).strftime(TIMESTAMP_FORMAT), "departure")
+    if arrivals:
+        pages["prev"] = ((min(arrivals) - timedelta(minutes=1)).strftime(TIMESTAMP_FORMAT), "arrival")
+    return pages
+
+
+def _trip_id(journey):
+    return json.dumps(journey_trips(journey))
+
+
+def record(key, journeys, pages, direction=None):
+    """
+    Remember the journeys shown for a search and where to continue.
+
+    Args:
+        key: Search key (see search_key)
+        journeys: Journeys just shown
+        pages: Cursors of the last page fetched ({"next": ..., "prev": ...});
+            missing ones are derived from the journeys
+        direction: None for a new search (both cursors replaced), or "next" /
+            "prev" when paging (only that cursor moves)
+    """
+    pages = dict(derive_pages(journeys), **pages)
+    state = _load()
+    entry = state.get(key) if direction else None
+    if not isinstance(entry, dict):
+        entry = {"seen": []}
+    for name in ("next", "prev"):
+        if name in pages and direction in (None, name):
+            entry[name] = list(pages[name])
+    seen = entry.get("seen", [])
+    seen.extend(trip for trip in map(_trip_id, journeys) if trip not in seen)
+    entry["seen"] = seen[-MAX_SEEN:]
+    entry["updated"] = time.time()
+
+    state.pop(key, None)
+    state[key] = entry
+    for old in list(state)[:-MAX_SEARCHES]:
+        del state[old]
+    _save(state)
+
+
+def page(fetch, entry, direction):
+    """
+    Fetch journeys beyond a recorded search, dropping the ones already shown.
+
+    Follows the next (or prev) cursor page by page, up to MAX_PAGES, until a
+    page brings journeys made of trains not shown yet.
+
+    Args:
+        fetch: Callable (datetime, datetime_represents) returning (journeys, pages)
+        entry: Recorded search (see get_search)
+        direction: "next" (later options) or "prev" (earlier options)
+
+    Returns:
+        (new journeys, sorted by departure; cursors of the last page fetched)
+    """
+    seen = set(entry.get("seen", []))
+    cursor = entry.get(direction)
+    pages = {}
+    for _ in range(MAX_PAGES):
+        if not cursor:
+            break
+        journeys, pages = fetch(*cursor)
+        pages = dict(derive_pages(journeys), **pages)
+        fresh = []
+        for journey in journeys:
+            trip = _trip_id(journey)
+            if trip not in seen:
+                seen.add(trip)
+                fresh.append(journey)
+        if fresh or not journeys:
+            return sorted(fresh, key=lambda j: j.get("departure_date_time") or ""), pages
+        following = pages.get(direction)
+        cursor = list(following) if following and list(following) != list(cursor) else None
+    return [], pages
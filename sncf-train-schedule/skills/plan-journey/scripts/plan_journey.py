@@ -5,23 +5,55 @@ Plan a journey between two SNCF stations.
 Usage:
     python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025"
     python plan_journey.py "2.3522;48.8566" "4.8357;45.7640" --datetime "20260210T140000"
+    python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" --engine local
+    python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" \\
+        --datetime "20260210T060000" --until "20260210T120000"
+    python plan_journey.py "2.3522;48.8566" "4.8357;45.7640" --snap 2km
+    python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" --later
 """
 
 import argparse
 import json
 import os
 import sys
-from datetime import datetime
-
-try:
-    import requests
-except ImportError:
-    print("❌ Error: 'requests' package not found", file=sys.stderr)
-    print("Install with: pip install requests", file=sys.stderr)
-    sys.exit(1)
 
+import cache
+import navitia
 from config import load_token
-load_token()
+from errors import APITimeoutError, HTTPStatusError, NetworkError
+from models import CANCELLED, Journey, clock, format_duration
+# Formatting helpers historically defined here, now shared in models.py
+from models import format_datetime, format_journey_status
+from timestamps import parse_timestamp
+
+
+def report_error(error):
+    """Print a Navitia error for a journey request and exit."""
+    if isinstance(error, APITimeoutError):
+        print("❌ API timeout - journey planning can take longer", file=sys.stderr)
+        print("Retry the request or check your connection", file=sys.stderr)
+    elif isinstance(error, HTTPStatusError):
+        if error.status == 401:
+            print("❌ Invalid API token", file=sys.stderr)
+            print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
+            print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
+        elif error.status == 404:
+            print(f"❌ Invalid location", file=sys.stderr)
+            print("Locations should be station IDs (stop_area:SNCF:...) or coordinates (lon;lat)", file=sys.stderr)
+        elif error.status == 400:
+            if error.message:
+                print(f"❌ API error: {error.message}", file=sys.stderr)
+            else:
+                print(f"❌ Bad request - check your parameters", file=sys.stderr)
+        elif error.status == 429:
+            print("❌ API rate limit reached", file=sys.stderr)
+            if error.retry_after:
+                print(f"Retry in {int(error.retry_after)}s", file=sys.stderr)
+        else:
+            print(f"❌ API error: HTTP {error.status}", file=sys.stderr)
+    else:
+        print(f"❌ Network error: {error}", file=sys.stderr)
+    sys.exit(0)
 
 
 def plan_journey(from_location, to_location, api_token, datetime_param=None,
@@ -41,26 +73,9 @@ def plan_journey(from_location, to_location, api_token, datetime_param=None,
     Returns:
         List of journey dictionaries
     """
-    url = "https://api.navitia.io/v1/coverage/sncf/journeys"
-    params = {
-        "from": from_location,
-        "to": to_location,
-        "count": count,
-        "data_freshness": data_freshness
-    }
-
-    if datetime_param:
-        params["datetime"] = datetime_param
-        params["datetime_represents"] = datetime_represents
-
-    headers = {"Authorization": api_token}
-
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-
-        journeys = data.get("journeys", [])
+        journeys = navitia.plan_journey(from_location, to_location, api_token, datetime_param,
+                                        datetime_represents, count, data_freshness)
         if not journeys:
             print(f"⚠️  No journeys found from '{from_location}' to '{to_location}'", file=sys.stderr)
             print("Check that both locations are valid station IDs or coordinates", file=sys.stderr)
@@ -68,59 +83,171 @@ def plan_journey(from_location, to_location, api_token, datetime_param=None,
 
         return journeys
 
-    except requests.exceptions.Timeout:
-        print("❌ API timeout - journey planning can take longer", file=sys.stderr)
-        print("Retry the request or check your connection", file=sys.stderr)
-        sys.exit(0)
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
-            print("❌ Invalid API token", file=sys.stderr)
-            print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
-            print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
-        elif e.response.status_code == 404:
-            print(f"❌ Invalid location", file=sys.stderr)
-            print("Locations should be station IDs (stop_area:SNCF:...) or coordinates (lon;lat)", file=sys.stderr)
-        elif e.response.status_code == 400:
-            try:
-                error_data = e.response.json()
-                error_msg = error_data.get("error", {}).get("message", "Bad request")
-                print(f"❌ API error: {error_msg}", file=sys.stderr)
-            except:
-                print(f"❌ Bad request - check your parameters", file=sys.stderr)
-        else:
-            print(f"❌ API error: HTTP {e.response.status_code}", file=sys.stderr)
-        sys.exit(0)
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Network error: {e}", file=sys.stderr)
+    except (APITimeoutError, HTTPStatusError, NetworkError) as e:
+        report_error(e)
+
+
+def plan_journey_page(from_location, to_location, api_token, datetime_param=None,
+                      datetime_represents="departure", count=5, data_freshness="realtime"):
+    """
+    Plan a journey like plan_journey, and remember it for --later / --earlier
+    when the response links to later or earlier options.
+
+    Returns:
+        List of journey dictionaries
+    """
+    import paging
+
+    try:
+        journeys, pages = navitia.plan_journey_page(from_location, to_location, api_token, datetime_param,
+                                                    datetime_represents, count, data_freshness)
+    except (APITimeoutError, HTTPStatusError, NetworkError) as e:
+        report_error(e)
+    if not journeys:
+        print(f"⚠️  No journeys found from '{from_location}' to '{to_location}'", file=sys.stderr)
+        print("Check that both locations are valid station IDs or coordinates", file=sys.stderr)
+        return []
+    if pages:
+        paging.record(paging.search_key(from_location, to_location, data_freshness), journeys, pages)
+    return journeys
+
+
+def plan_journey_more(from_location, to_location, api_token, direction, count=5,
+                      data_freshness="realtime"):
+    """
+    Continue the last search between two locations with later or earlier options.
+
+    Follows the recorded next/prev cursor and returns only journeys riding
+    trains not shown by the previous pages of the search.
+
+    Args:
+        from_location: Origin (station ID or lon;lat coordinates)
+        to_location: Destination (station ID or lon;lat coordinates)
+        api_token: Navitia API token
+        direction: "next" (later) or "prev" (earlier)
+        count: Number of journey options asked per call
+        data_freshness: "realtime" or "base_schedule"
+
+    Returns:
+        List of new journey dictionaries, by departure
+    """
+    import paging
+
+    key = paging.search_key(from_location, to_location, data_freshness)
+    entry = paging.get_search(key)
+    if entry is None:
+        print(f"❌ No recent search from '{from_location}' to '{to_location}' to continue", file=sys.stderr)
+        print("Run plan_journey.py without --later / --earlier first", file=sys.stderr)
         sys.exit(0)
 
+    def fetch(datetime_param, datetime_represents):
+        return navitia.plan_journey_page(from_location, to_location, api_token, datetime_param,
+                                         datetime_represents, count, data_freshness)
+
+    try:
+        journeys, pages = paging.page(fetch, entry, direction)
+    except (APITimeoutError, HTTPStatusError, NetworkError) as e:
+        report_error(e)
+    paging.record(key, journeys, pages, direction)
+    if not journeys:
+        print(f"⚠️  No {'later' if direction == 'next' else 'earlier'} journeys besides the ones already shown",
+              file=sys.stderr)
+    return journeys
+
+
+def plan_journey_range(from_location, to_location, api_token, datetime_param, until,
+                       data_freshness="realtime"):
+    """
+    Plan every Pareto-optimal journey departing between datetime_param and until.
+
+    Args:
+        from_location: Origin (station ID or lon;lat coordinates)
+        to_location: Destination (station ID or lon;lat coordinates)
+        api_token: Navitia API token
+        datetime_param: Window start in YYYYMMDDTHHmmss format (None = now)
+        until: Window end in YYYYMMDDTHHmmss format (inclusive)
+        data_freshness: "realtime" or "base_schedule"
 
-def format_datetime(dt_string):
-    """Convert YYYYMMDDTHHmmss to readable format."""
+    Returns:
+        List of journey dictionaries, by departure then transfers
+    """
     try:
-        dt = datetime.strptime(dt_string, "%Y%m%dT%H%M%S")
-        return dt.strftime("%H:%M")
-    except:
-        return dt_string
+        journeys = navitia.plan_journey_range(from_location, to_location, api_token, datetime_param,
+                                              until, data_freshness)
+    except (APITimeoutError, HTTPStatusError, NetworkError) as e:
+        report_error(e)
+    if not journeys:
+        print(f"⚠️  No journeys found from '{from_location}' to '{to_location}' before {until}",
+              file=sys.stderr)
+    return journeys
+
+
+def snap_location(location, radius_km):
+    """
+    Replace lon;lat coordinates by the nearest station within radius_km.
+
+    Uses the offline station index (see station_index.py), so no API call
+    is made; station IDs and points without a station nearby are returned
+    unchanged.
+
+    Returns:
+        The station ID or the original location
+    """
+    import station_index
+
+    point = station_index.parse_coordinates(location)
+    if point is None:
+        return location
+    nearby = station_index.nearest(point[0], point[1], 1, radius_km)
+    if not nearby:
+        print(f"⚠️  No station within {radius_km:g} km of {location}, keeping coordinates", file=sys.stderr)
+        return location
+    station = nearby[0]
+    print(f"📍 {location} → {station['name']} ({station['distance']} m)", file=sys.stderr)
+    return station["id"]
+
+
+def choose_engine(engine, from_location, to_location, datetime_represents="departure",
+                  data_freshness="realtime"):
+    """
+    Resolve --engine to "local" or "navitia".
+
+    auto uses the local planner for base_schedule departures between two
+    stop areas when a GTFS timetable has been built (see timetable.py).
+    """
+    if engine != "auto":
+        return engine
+    import timetable
 
+    if (data_freshness == "base_schedule" and datetime_represents == "departure"
+            and timetable.available()
+            and from_location.startswith("stop_area:") and to_location.startswith("stop_area:")):
+        return "local"
+    return "navitia"
 
-def format_duration(seconds):
-    """Convert seconds to readable duration."""
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
-    if hours > 0:
-        return f"{hours}h {minutes}min"
-    return f"{minutes}min"
 
+def plan_journey_local(from_location, to_location, datetime_param=None, count=5, until=None):
+    """
+    Plan a journey from the local GTFS timetable (theoretical schedule).
 
-def format_journey_status(journey):
-    """Return status label for a journey: '❌ SUPPRIMÉ', '⚠️', or ''."""
-    status = journey.get("status", "")
-    if status == "NO_SERVICE":
-        return "❌ SUPPRIMÉ"
-    if status in ("SIGNIFICANT_DELAYS", "MODIFIED_SERVICE"):
-        return "⚠️"
-    return ""
+    With `until`, return every Pareto-optimal journey departing up to it
+    instead of `count` options.
+
+    Returns:
+        List of journey dictionaries, or None if the timetable cannot answer
+        (not built, unknown station, date outside the feed, or a window
+        ending on another day)
+    """
+    import planner
+
+    if until:
+        journeys = planner.plan_range(from_location, to_location, datetime_param, until)
+    else:
+        journeys = planner.plan(from_location, to_location, datetime_param, count)
+    if journeys == []:
+        print(f"⚠️  No journeys found from '{from_location}' to '{to_location}' in the local timetable",
+              file=sys.stderr)
+    return journeys
 
 
 def format_output(journeys, output_format="human"):
@@ -130,15 +257,15 @@ def format_output(journeys, output_format="human"):
 
     # Human-readable format
     output = []
-    for i, journey in enumerate(journeys, 1):
-        dep_time = format_datetime(journey.get("departure_date_time", ""))
-        arr_time = format_datetime(journey.get("arrival_date_time", ""))
-        duration = format_duration(journey.get("duration", 0))
-        nb_transfers = journey.get("nb_transfers", 0)
+    for i, item in enumerate(journeys, 1):
+        journey = Journey.from_json(item)
+        dep_time = clock(journey.departure, journey.departure_text)
+        arr_time = clock(journey.arrival, journey.arrival_text)
+        duration = format_duration(journey.duration)
 
-        status_label = format_journey_status(journey)
+        status_label = journey.status_label
         output.append(f"{'='*60}")
-        if status_label == "❌ SUPPRIMÉ":
+        if status_label == CANCELLED:
             output.append(f"Journey {i}: {dep_time} → {arr_time} ({duration}) {status_label}")
             output.append("")
             continue
@@ -146,34 +273,23 @@ def format_output(journeys, output_format="human"):
             output.append(f"Journey {i}: {dep_time} → {arr_time} ({duration}) {status_label}")
         else:
             output.append(f"Journey {i}: {dep_time} → {arr_time} ({duration})")
-        output.append(f"Transfers: {nb_transfers}")
+        output.append(f"Transfers: {journey.nb_transfers}")
         output.append("")
 
         # Show sections (walking, train, etc.)
-        sections = journey.get("sections", [])
-        for j, section in enumerate(sections):
-            section_type = section.get("type", "unknown")
-
-            if section_type == "public_transport":
-                display = section.get("display_informations", {})
-                line = display.get("code", "?")
-                direction = display.get("direction", "Unknown")
-                from_stop = section.get("from", {}).get("name", "?")
-                to_stop = section.get("to", {}).get("name", "?")
-                dep = format_datetime(section.get("departure_date_time", ""))
-                arr = format_datetime(section.get("arrival_date_time", ""))
-
-                output.append(f"  {j+1}. [{line}] → {direction}")
-                output.append(f"     {from_stop} ({dep}) → {to_stop} ({arr})")
-
-            elif section_type == "transfer":
-                duration_sec = section.get("duration", 0)
-                transfer_type = section.get("transfer_type", "walking")
-                output.append(f"  {j+1}. Transfer ({transfer_type}, {format_duration(duration_sec)})")
-
-            elif section_type in ["waiting", "crow_fly"]:
-                duration_sec = section.get("duration", 0)
-                output.append(f"  {j+1}. {section_type.replace('_', ' ').title()} ({format_duration(duration_sec)})")
+        for j, section in enumerate(journey.sections):
+            if section.type == "public_transport":
+                dep = clock(section.departure, section.departure_text)
+                arr = clock(section.arrival, section.arrival_text)
+                output.append(f"  {j+1}. [{section.code}] → {section.direction}")
+                output.append(f"     {section.from_name} ({dep}) → {section.to_name} ({arr})")
+
+            elif section.type == "transfer":
+                transfer_type = section.transfer_type or "walking"
+                output.append(f"  {j+1}. Transfer ({transfer_type}, {format_duration(section.duration)})")
+
+            elif section.type in ["waiting", "crow_fly"]:
+                output.append(f"  {j+1}. {section.type.replace('_', ' ').title()} ({format_duration(section.duration)})")
 
         output.append("")
 
@@ -202,6 +318,21 @@ Examples:
 
   # Get more journey options
   python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" --count 10
+
+  # Theoretical timetable, planned offline from the GTFS feed (see timetable.py)
+  python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" \\
+      --data-freshness base_schedule --engine local
+
+  # Snap coordinates to the nearest station within 2 km (offline), then plan between stations
+  python plan_journey.py "2.3522;48.8566" "4.8357;45.7640" --snap 2km
+
+  # Every Pareto-optimal journey (departure, arrival, transfers) leaving 06:00-12:00
+  python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" \\
+      --datetime "20260210T060000" --until "20260210T120000"
+
+  # "And the next ones?": continue the last search, printing only new options
+  python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" --later
+  python plan_journey.py "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" --earlier
         """
     )
     parser.add_argument("from_location",
@@ -215,14 +346,76 @@ Examples:
                        help="What the datetime represents (default: departure)")
     parser.add_argument("--count", type=int, default=5,
                        help="Number of journey options (default: 5)")
+    parser.add_argument("--until",
+                       help="Range query: every Pareto-optimal journey (later departure, earlier "
+                            "arrival, fewer transfers) departing from --datetime up to this "
+                            "YYYYMMDDTHHmmss datetime (--count is then ignored)")
     parser.add_argument("--data-freshness", choices=["realtime", "base_schedule"],
                        default="realtime", help="Data freshness (default: realtime)")
     parser.add_argument("--format", choices=["human", "json"], default="human",
                        help="Output format (default: human)")
+    more = parser.add_mutually_exclusive_group()
+    more.add_argument("--later", action="store_true",
+                      help="Continue the last search between these locations with later options "
+                           "(Navitia's next link), printing only journeys not shown yet")
+    more.add_argument("--earlier", action="store_true",
+                      help="Same with earlier options (Navitia's prev link)")
+    parser.add_argument("--snap", metavar="RADIUS",
+                       help="Replace lon;lat locations by the nearest station within RADIUS "
+                            "(e.g. 2km, 500m), looked up in the offline station index")
+    parser.add_argument("--engine", choices=["auto", "local", "navitia"], default="auto",
+                       help="Planner: local GTFS timetable (build it with timetable.py), the Navitia "
+                            "API, or auto = local for base_schedule trips between stations when a "
+                            "timetable is built (default: auto)")
+
+    cache.add_arguments(parser)
 
     args = parser.parse_args()
-
-    # Get API token from environment
+    cache.apply_arguments(args)
+
+    if (args.later or args.earlier) and (args.until or args.datetime):
+        parser.error("--later / --earlier continue the last search and cannot be combined with --datetime or --until")
+    if (args.later or args.earlier) and args.engine == "local":
+        parser.error("--later / --earlier follow Navitia's links: use --engine navitia or auto")
+    if args.until and args.datetime_represents == "arrival":
+        parser.error("--until is a departure window and cannot be combined with --datetime-represents arrival")
+    for option, value in (("--datetime", args.datetime), ("--until", args.until)):
+        if value and parse_timestamp(value) is None:
+            print(f"❌ Invalid {option} datetime: '{value}'", file=sys.stderr)
+            print("Required format: YYYYMMDDTHHmmss (e.g. 20260210T120000)", file=sys.stderr)
+            sys.exit(0)
+    if args.snap:
+        import station_index
+        radius = station_index.parse_radius(args.snap)
+        if radius is None:
+            print(f"❌ Invalid --snap radius: '{args.snap}'", file=sys.stderr)
+            print("Use a distance such as 2km or 500m", file=sys.stderr)
+            sys.exit(0)
+        args.from_location = snap_location(args.from_location, radius)
+        args.to_location = snap_location(args.to_location, radius)
+
+    # Local planner: theoretical timetable, no API call or token needed
+    engine = choose_engine(args.engine, args.from_location, args.to_location,
+                           args.datetime_represents, args.data_freshness)
+    if engine == "local" and not (args.later or args.earlier):
+        if args.datetime_represents == "arrival":
+            print("❌ The local planner only plans by departure time", file=sys.stderr)
+            print("Use --engine navitia for --datetime-represents arrival", file=sys.stderr)
+            sys.exit(0)
+        journeys = plan_journey_local(args.from_location, args.to_location, args.datetime, args.count,
+                                      args.until)
+        if journeys is not None:
+            if journeys:
+                print(format_output(journeys, args.format))
+            sys.exit(0)
+        if args.engine == "local":
+            print("❌ The local timetable cannot answer this query", file=sys.stderr)
+            print("Build it with: python timetable.py build FEED.zip (station IDs and dates must be "
+                  "in the feed, and an --until window must end on its start day)", file=sys.stderr)
+            sys.exit(0)
+
+    # Get API token from environment (settings file / .env only read once a call is needed)
+    load_token()
     api_token = os.getenv("NAVITIA_API_TOKEN")
     if not api_token:
         print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
@@ -230,8 +423,22 @@ Examples:
         print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
         sys.exit(0)
 
-    # Plan journey
-    journeys = plan_journey(
+    if args.until:
+        journeys = plan_journey_range(args.from_location, args.to_location, api_token, args.datetime,
+                                      args.until, args.data_freshness)
+        if journeys:
+            print(format_output(journeys, args.format))
+        sys.exit(0)
+
+    if args.later or args.earlier:
+        journeys = plan_journey_more(args.from_location, args.to_location, api_token,
+                                     "next" if args.later else "prev", args.count, args.data_freshness)
+        if journeys:
+            print(format_output(journeys, args.format))
+        sys.exit(0)
+
+    # Plan journey (remembered for --later / --earlier)
+    journeys = plan_journey_page(
         args.from_location,
         args.to_location,
         api_token,
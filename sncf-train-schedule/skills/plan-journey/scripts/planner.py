@@ -0,0 +1,524 @@
+"""
+Offline journey planner over the GTFS timetable (connection scan).
+
+plan_journey.py --engine local answers from the timetable built by
+timetable.py instead of /journeys. The timetable stores one connection per
+hop between consecutive stops of a trip, sorted by departure; the
+connection scan algorithm walks them once from the requested time and
+keeps the earliest arrival at every station, stopping as soon as the next
+connection leaves after the best arrival at the destination.
+
+Changing trains within a station takes at least MIN_CHANGE_TIME; changing
+between stations uses the feed's footpaths (transfers.txt).
+
+Connections of a travel day (including trips of the previous service day
+running past midnight and the next day's early trips) are loaded once and
+kept in memory, so repeated queries on the same day only pay for the scan.
+
+Range queries (plan_journey.py --until) run the profile variant: one scan
+backwards over the connections of the departure window keeps, for every
+station and each number of changes up to MAX_TRANSFERS, the earliest
+arrival at the destination by departure time, so every Pareto-optimal
+journey (later departure, earlier arrival, fewer changes) comes out of a
+single pass.
+
+Results have the shape of navitia.parse_journeys output, so the formatters
+and --format json consumers work unchanged.
+"""
+import bisect
+import os
+from datetime import datetime, timedelta
+
+import timetable
+from timestamps import parse_timestamp
+
+DAY = timetable.DAY
+
+# Minimum time to change trains within a station (seconds)
+MIN_CHANGE_TIME = 5 * 60
+
+# Longest journey searched for: unreachable destinations stop the scan here
+MAX_JOURNEY_TIME = DAY
+
+# Later departures tried when collecting several journey options
+NEXT_OPTION_DELAY = 60
+
+# Travel days kept in memory
+MAX_LOADED_DAYS = 4
+
+# Most changes considered by range queries
+MAX_TRANSFERS = 4
+
+_days = {}
+_footpaths = None
+_loaded_from = None
+
+_INF = float("inf")
+
+
+def _check_timetable():
+    """Drop loaded data when the timetable file was rebuilt."""
+    global _days, _footpaths, _loaded_from
+    path = timetable.timetable_path()
+    stamp = (path, os.path.getmtime(path))
+    if stamp != _loaded_from:
+        _days, _footpaths, _loaded_from = {}, None, stamp
+
+
+def footpaths():
+    """Return {stop: [(other_stop, seconds), ...]} from the transfers table."""
+    global _footpaths
+    if _footpaths is None:
+        _footpaths = {}
+        for from_stop, to_stop, duration in timetable.connect().execute(
+                "SELECT from_stop, to_stop, duration FROM transfers"):
+            _footpaths.setdefault(from_stop, []).append((to_stop, duration))
+    return _footpaths
+
+
+def day_connections(day):
+    """
+    Return the connections running on a travel day, sorted by departure.
+
+    Times are seconds after midnight of `day` (up to two days, for journeys
+    crossing midnight). Trips are keyed by (trip * 3 + service day shift + 1)
+    so the same trip on two consecutive days stays distinct.
+
+    Returns:
+        (departures, connections): the departure times alone (for bisect),
+        and (departure, arrival, from_stop, to_stop, trip_key, board, alight)
+        tuples
+    """
+    if day in _days:
+        return _days[day]
+
+    conn = timetable.connect()
+    streams = []
+    # Previous service day past midnight, the day itself, the next day's morning
+    for shift, low, high in ((-1, DAY, 2 * DAY), (0, 0, 2 * DAY), (1, 0, DAY)):
+        service_day = day + timedelta(days=shift)
+        running = {service for (service,) in conn.execute("SELECT service FROM services")
+                   if timetable.runs_on(service, service_day)}
+        offset = shift * DAY
+        streams.append([
+            (departure + offset, arrival + offset, from_stop, to_stop, trip * 3 + shift + 1, board, alight)
+            for departure, arrival, from_stop, to_stop, trip, service, board, alight in conn.execute(
+                "SELECT c.departure, c.arrival, c.from_stop, c.to_stop, c.trip, t.service, c.board, c.alight"
+                " FROM connections c JOIN trips t ON t.trip = c.trip"
+                " WHERE c.departure >= ? AND c.departure < ? ORDER BY c.departure", (low, high))
+            if service in running
+        ])
+
+    connections = sorted(c for stream in streams for c in stream)
+    loaded = ([c[0] for c in connections], connections)
+    if len(_days) >= MAX_LOADED_DAYS:
+        _days.pop(next(iter(_days)))
+    _days[day] = loaded
+    return loaded
+
+
+def _scan(day, origin, start, destination=None):
+    """
+    Forward connection scan from `origin`; return {stop: leg reaching it}.
+
+    With a destination, the scan stops once no connection can improve on
+    its arrival; without, it runs MAX_JOURNEY_TIME past `start` and reaches
+    every station it can.
+    """
+    departures, connections = day_connections(day)
+    paths = footpaths()
+
+    arrival = {origin: start}
+    ready = {origin: start}
+    via = {}
+    for stop, duration in paths.get(origin, ()):
+        arrival[stop] = ready[stop] = start + duration
+        via[stop] = ("walk", origin, start, stop, start + duration)
+    if destination in via:
+        return via
+    boarded = {}
+    best = start + MAX_JOURNEY_TIME
+    reached = arrival.get
+
+    for i in range(bisect.bisect_left(departures, start), len(connections)):
+        departure, arr, from_stop, to_stop, trip, board, alight = connections[i]
+        if departure >= best:
+            break
+        if trip not in boarded:
+            if not board or ready.get(from_stop, _INF) > departure:
+                continue
+            boarded[trip] = (from_stop, departure)
+        if alight and arr < reached(to_stop, _INF):
+            arrival[to_stop] = arr
+            ready[to_stop] = arr + MIN_CHANGE_TIME
+            via[to_stop] = ("ride", trip, *boarded[trip], to_stop, arr)
+            for stop, duration in paths.get(to_stop, ()):
+                if arr + duration < reached(stop, _INF):
+                    arrival[stop] = ready[stop] = arr + duration
+                    via[stop] = ("walk", to_stop, arr, stop, arr + duration)
+            if destination is not None:
+                best = min(best, reached(destination, _INF))
+    return via
+
+
+def _legs(via, origin, destination):
+    """Follow the legs of a scan (see _scan) back from destination to origin."""
+    if destination not in via:
+        return None
+    legs = []
+    stop = destination
+    while stop != origin:
+        leg = via[stop]
+        legs.append(leg)
+        stop = leg[2] if leg[0] == "ride" else leg[1]
+    legs.reverse()
+    return legs
+
+
+def earliest_arrival(day, origin, destination, start):
+    """
+    Run one connection scan.
+
+    Args:
+        day: Travel day (times are seconds after its midnight)
+        origin: Origin stop (timetable stop number)
+        destination: Destination stop
+        start: Earliest departure, seconds after midnight of `day`
+
+    Returns:
+        Legs from origin to destination, each ("ride", trip_key, from_stop,
+        departure, to_stop, arrival) or ("walk", from_stop, departure, to_stop,
+        arrival); None if the destination cannot be reached within
+        MAX_JOURNEY_TIME
+    """
+    return _legs(_scan(day, origin, start, destination), origin, destination)
+
+
+def _lookup(profile, stop, time):
+    """Return the profile entry of `stop` leaving first at or after `time`, or None."""
+    entries = profile.get(stop)
+    if entries is None:
+        return None
+    i = bisect.bisect_right(entries[0], -time) - 1
+    return entries[1][i] if i >= 0 else None
+
+
+def profile_scan(day, origin, destination, start, end):
+    """
+    Run one profile connection scan over a departure window.
+
+    Connections are scanned from the latest to the earliest. Each station
+    keeps a list of entries (departure, arrivals, boardings) ordered by
+    decreasing departure, where arrivals[k] is the earliest arrival at the
+    destination with at most k changes when leaving the station at that
+    departure or later, and boardings[k] the connection boarded plus where
+    its trip is left (to reconstruct the legs).
+
+    Args:
+        day: Travel day (times are seconds after its midnight)
+        origin: Origin stop (timetable stop number)
+        destination: Destination stop
+        start: Window start, seconds after midnight of `day`
+        end: Window end (inclusive), seconds after midnight of `day`
+
+    Returns:
+        The Pareto-optimal journeys leaving the origin station by train
+        within the window, as leg lists (see earliest_arrival), by departure
+        then number of changes
+    """
+    departures, connections = day_connections(day)
+    paths = footpaths()
+    to_destination = {stop: duration for stop, others in paths.items()
+                      for other, duration in others if other == destination}
+    to_destination[destination] = 0
+    slots = range(MAX_TRANSFERS + 1)
+    none = (_INF,) * (MAX_TRANSFERS + 1)
+
+    profile = {}
+    trip_arrivals = {}
+    trip_exits = {}
+    horizon = min(end + MAX_JOURNEY_TIME, 2 * DAY)
+    first = bisect.bisect_left(departures, start)
+
+    for i in range(bisect.bisect_left(departures, horizon) - 1, first - 1, -1):
+        departure, arr, from_stop, to_stop, trip, board, alight = connections[i]
+        reached = trip_arrivals.get(trip, none)
+        exits = trip_exits.get(trip)
+
+        if alight:
+            # Leave the trip here: at the destination, or change trains
+            walk = to_destination.get(to_stop)
+            final = arr + walk if walk is not None else _INF
+            changes = [(to_stop, arr + MIN_CHANGE_TIME)]
+            changes.extend((stop, arr + duration) for stop, duration in paths.get(to_stop, ()))
+            nexts = [(stop, _lookup(profile, stop, time)) for stop, time in changes]
+            arrivals, exits = list(reached), list(exits or (None,) * len(slots))
+            for k in slots:
+                best, how = final, ("final", walk)
+                if k:
+                    for stop, entry in nexts:
+                        if entry is not None and entry[1][k - 1] < best:
+                            best, how = entry[1][k - 1], ("change", stop)
+                if best < arrivals[k]:
+                    arrivals[k], exits[k] = best, (i, how)
+            if arrivals != list(reached):
+                reached = tuple(arrivals)
+                trip_arrivals[trip] = reached
+                trip_exits[trip] = exits = tuple(exits)
+
+        if not board or reached[-1] == _INF or (from_stop == origin and departure > end):
+            continue
+        # Board here: add an entry to the station's profile unless dominated
+        entries = profile.setdefault(from_stop, ([], []))
+        later = entries[1][-1] if entries[1] else (None, none, (None,) * len(slots))
+        if all(reached[k] >= later[1][k] for k in slots):
+            continue
+        arrivals = tuple(min(reached[k], later[1][k]) for k in slots)
+        boardings = tuple((i, exits[k]) if reached[k] < later[1][k] else later[2][k] for k in slots)
+        if later[0] == departure:
+            entries[1][-1] = (departure, arrivals, boardings)
+        else:
+            entries[0].append(-departure)
+            entries[1].append((departure, arrivals, boardings))
+
+    journeys = []
+    options = profile.get(origin, ([], []))[1]
+    for n, (departure, arrivals, boardings) in enumerate(options):
+        later = options[n - 1][1] if n else none
+        for k in slots:
+            if arrivals[k] < later[k] and (k == 0 or arrivals[k] < arrivals[k - 1]):
+                journeys.append((departure, k, _profile_legs(connections, profile, boardings[k], k, destination)))
+    return [legs for _, _, legs in sorted(journeys, key=lambda option: option[:2])]
+
+
+def _profile_legs(connections, profile, boarding, k, destination):
+    """Rebuild the legs of a profile entry (see profile_scan)."""
+    legs = []
+    while True:
+        i, (exit, how) = boarding
+        departure, _, from_stop, _, trip, _, _ = connections[i]
+        _, arrival, _, to_stop, _, _, _ = connections[exit]
+        legs.append(("ride", trip, from_stop, departure, to_stop, arrival))
+        kind, target = how
+        if kind == "final":
+            if target:
+                legs.append(("walk", to_stop, arrival, destination, arrival + target))
+            return legs
+        ready = arrival + MIN_CHANGE_TIME
+        if target != to_stop:
+            duration = next(d for stop, d in footpaths().get(to_stop, ()) if stop == target)
+            legs.append(("walk", to_stop, arrival, target, arrival + duration))
+            ready = arrival + duration
+        k -= 1
+        boarding = _lookup(profile, target, ready)[2][k]
+
+
+def _names(stops):
+    conn = timetable.connect()
+    marks = ",".join("?" * len(stops))
+    return {stop: (area, name) for stop, area, name in conn.execute(
+        f"SELECT stop, area, name FROM stops WHERE stop IN ({marks})", list(stops))}
+
+
+def _trips(trips):
+    conn = timetable.connect()
+    marks = ",".join("?" * len(trips))
+    return {trip: rest for trip, *rest in conn.execute(
+        "SELECT t.trip, t.code, t.mode, t.headsign, s.name FROM trips t"
+        f" JOIN stops s ON s.stop = t.terminus WHERE t.trip IN ({marks})", list(trips))}
+
+
+def to_journey(legs, day, requested):
+    """Convert legs from earliest_arrival() to a Navitia-shaped journey dict."""
+    midnight = datetime(day.year, day.month, day.day)
+
+    def stamp(seconds):
+        return (midnight + timedelta(seconds=seconds)).strftime("%Y%m%dT%H%M%S")
+
+    stops = {leg[i] for leg in legs for i in ((2, 4) if leg[0] == "ride" else (1, 3))}
+    names = _names(stops)
+    trips = _trips({leg[1] // 3 for leg in legs if leg[0] == "ride"})
+
+    def place(stop):
+        area, name = names[stop]
+        return {"id": area, "name": name, "embedded_type": "stop_area"}
+
+    sections = []
+    previous_arrival = None
+    for leg in legs:
+        if leg[0] == "ride":
+            _, trip_key, from_stop, departure, to_stop, arrival = leg
+            if previous_arrival is not None and departure > previous_arrival:
+                sections.append({"type": "waiting", "duration": departure - previous_arrival,
+                                 "departure_date_time": stamp(previous_arrival),
+                                 "arrival_date_time": stamp(departure)})
+            code, mode, headsign, terminus = trips[trip_key // 3]
+            sections.append({
+                "type": "public_transport",
+                "duration": arrival - departure,
+                "departure_date_time": stamp(departure),
+                "arrival_date_time": stamp(arrival),
+                "base_departure_date_time": stamp(departure),
+                "base_arrival_date_time": stamp(arrival),
+                "data_freshness": "base_schedule",
+                "from": place(from_stop),
+                "to": place(to_stop),
+                "display_informations": {"code": code, "commercial_mode": mode, "direction": terminus,
+                                         "headsign": headsign, "trip_short_name": headsign},
+            })
+        else:
+            _, from_stop, departure, to_stop, arrival = leg
+            sections.append({
+                "type": "transfer",
+                "transfer_type": "walking",
+                "mode": "walking",
+                "duration": arrival - departure,
+                "departure_date_time": stamp(departure),
+                "arrival_date_time": stamp(arrival),
+                "from": place(from_stop),
+                "to": place(to_stop),
+            })
+        previous_arrival = leg[-1]
+
+    departure, arrival = legs[0][3 if legs[0][0] == "ride" else 2], legs[-1][-1]
+    rides = sum(1 for leg in legs if leg[0] == "ride")
+    return {
+        "departure_date_time": stamp(departure),
+        "arrival_date_time": stamp(arrival),
+        "requested_date_time": requested,
+        "duration": arrival - departure,
+        "nb_transfers": max(rides - 1, 0),
+        "type": "",
+        "status": "",
+        "sections": sections,
+    }
+
+
+def _window(from_location, to_location, datetime_param):
+    """Resolve stations and start time; None when the timetable cannot answer."""
+    if timetable.connect() is None:
+        return None
+    start = parse_timestamp(datetime_param) if datetime_param else datetime.now().replace(microsecond=0)
+    origin, destination = stop_number(from_location), stop_number(to_location)
+    if start is None or origin is None or destination is None or not timetable.covers(start.date()):
+        return None
+    _check_timetable()
+    return start, origin, destination
+
+
+def stop_number(station_id):
+    """Return the timetable stop number of a Navitia stop_area id, or None."""
+    row = timetable.connect().execute("SELECT stop FROM stops WHERE area = ?", (station_id,)).fetchone()
+    return row[0] if row else None
+
+
+def plan(from_location, to_location, datetime_param=None, count=5):
+    """
+    Plan journeys from the local timetable, departing at or after a time.
+
+    Returns up to `count` options, each the earliest arrival for a later
+    departure than the previous one (like Navitia's next journeys).
+
+    Args:
+        from_location: Origin stop_area id
+        to_location: Destination stop_area id
+        datetime_param: Departure in YYYYMMDDTHHmmss format (None = now)
+        count: Number of journey options
+
+    Returns:
+        List of journeys shaped like navitia.parse_journeys output (possibly
+        empty), or None when the timetable is not built, does not know a
+        station or does not cover the date
+    """
+    resolved = _window(from_location, to_location, datetime_param)
+    if resolved is None:
+        return None
+    start, origin, destination = resolved
+
+    day = start.date()
+    requested = start.strftime("%Y%m%dT%H%M%S")
+    seconds = start.hour * 3600 + start.minute * 60 + start.second
+    journeys = []
+    while len(journeys) < count and seconds < DAY:
+        legs = earliest_arrival(day, origin, destination, seconds)
+        if legs is None:
+            break
+        journey = to_journey(legs, day, requested)
+        if journeys and journey["sections"] == journeys[-1]["sections"]:
+            break
+        journeys.append(journey)
+        first = legs[0]
+        seconds = (first[3] if first[0] == "ride" else first[2]) + NEXT_OPTION_DELAY
+    if journeys:
+        journeys[0]["type"] = "best"
+    return journeys
+
+
+def plan_range(from_location, to_location, datetime_param, until):
+    """
+    Plan every Pareto-optimal journey departing within a time window.
+
+    A journey is kept unless another one leaves no earlier, arrives no later
+    and has no more changes (and is better on one of them). Journeys start
+    with a train from the origin station and have at most MAX_TRANSFERS
+    changes; the window must end on its start day.
+
+    Args:
+        from_location: Origin stop_area id
+        to_location: Destination stop_area id
+        datetime_param: Window start in YYYYMMDDTHHmmss format (None = now)
+        until: Window end in YYYYMMDDTHHmmss format (inclusive)
+
+    Returns:
+        List of journeys shaped like navitia.parse_journeys output, by
+        departure then number of changes (possibly empty), or None when the
+        timetable cannot answer (see plan)
+    """
+    resolved = _window(from_location, to_location, datetime_param)
+    end = parse_timestamp(until)
+    if resolved is None or end is None:
+        return None
+    start, origin, destination = resolved
+    day = start.date()
+    if end < start or end.date() != day:
+        return None
+
+    requested = start.strftime("%Y%m%dT%H%M%S")
+    seconds = start.hour * 3600 + start.minute * 60 + start.second
+    end_seconds = end.hour * 3600 + end.minute * 60 + end.second
+    return [to_journey(legs, day, requested)
+            for legs in profile_scan(day, origin, destination, seconds, end_seconds)]
+
+
+def plan_many(from_location, to_locations, datetime_param=None):
+    """
+    Plan the earliest-arrival journey from one station to many, in one scan.
+
+    Args:
+        from_location: Origin stop_area id
+        to_locations: Destination stop_area ids
+        datetime_param: Departure in YYYYMMDDTHHmmss format (None = now)
+
+    Returns:
+        Dict of destination → journey shaped like navitia.parse_journeys
+        items, None for destinations the timetable does not know, [] for
+        those it cannot reach; or None when it cannot answer for the origin
+    """
+    if timetable.connect() is None:
+        return None
+    start = parse_timestamp(datetime_param) if datetime_param else datetime.now().replace(microsecond=0)
+    origin = stop_number(from_location)
+    if start is None or origin is None or not timetable.covers(start.date()):
+        return None
+    _check_timetable()
+
+    day = start.date()
+    requested = start.strftime("%Y%m%dT%H%M%S")
+    via = _scan(day, origin, start.hour * 3600 + start.minute * 60 + start.second)
+    journeys = {}
+    for to_location in to_locations:
+        destination = stop_number(to_location)
+        legs = _legs(via, origin, destination) if destination is not None and destination != origin else None
+        journeys[to_location] = (to_journey(legs, day, requested) if legs
+                                 else None if destination is None else [])
+    return journeys
@@ -0,0 +1,173 @@
+"""
+Client-side rate limiting and retry policy for Navitia calls.
+
+A token bucket paces requests below the token's quota (NAVITIA_RATE and
+NAVITIA_BURST, see config.py). Its state lives in a small JSON file under
+.claude/, one per API root, guarded by an exclusive flock, so every SNCF
+script process on the machine draws from the same bucket for the same API,
+while a local mock gets its own. A 429 response blocks the bucket for all
+processes until its Retry-After has elapsed.
+
+Where file locking is unavailable (Windows, read-only directory), the bucket
+falls back to per-process state.
+"""
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+
+import config
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Retries for 429 / 5xx / timeouts, with full-jitter exponential backoff
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# Never sleep longer than this on a Retry-After; fail fast instead
+MAX_RETRY_AFTER = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+enabled = True
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst, tokens=None, updated=None, blocked_until=0.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst if tokens is None else tokens
+        self.updated = time.time() if updated is None else updated
+        self.blocked_until = blocked_until
+
+    def take(self, now):
+        """
+        Try to take one token at time `now`.
+
+        Returns:
+            0 if a token was taken, else the number of seconds to wait before retrying
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, until):
+        """Refuse tokens until the given timestamp (e.g. after a 429)."""
+        self.blocked_until = max(self.blocked_until, until)
+
+    def to_dict(self):
+        return {"tokens": self.tokens, "updated": self.updated, "blocked_until": self.blocked_until}
+
+
+_local_buckets = {}
+
+
+def _api_root():
+    """API root the bucket paces: every coverage of one instance shares its quota."""
+    import client  # imports this module
+    return client.base_url().partition("/coverage/")[0]
+
+
+def state_path():
+    """Return the shared bucket state file for the current working directory and API."""
+    import hashlib
+
+    digest = hashlib.sha256(_api_root().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.getcwd(), ".claude", f"sncf-train-schedule.local.ratelimit-{digest}.json")
+
+
+def _local_bucket():
+    settings = config.get()
+    return _local_buckets.setdefault(_api_root(), TokenBucket(settings.rate, settings.burst))
+
+
+def _active():
+    return enabled and config.get().rate > 0
+
+
+@contextmanager
+def _shared_bucket():
+    """Yield the machine-wide bucket for the current API under an exclusive lock, saving it on exit."""
+    if fcntl is None:
+        yield _local_bucket()
+        return
+    try:
+        path = state_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, "a+")
+    except OSError:
+        yield _local_bucket()
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        try:
+            state = json.loads(f.read() or "{}")
+        except ValueError:
+            state = {}
+        settings = config.get()
+        bucket = TokenBucket(settings.rate, settings.burst, state.get("tokens"), state.get("updated"),
+                             state.get("blocked_until", 0.0))
+        yield bucket
+        f.seek(0)
+        f.truncate()
+        json.dump(bucket.to_dict(), f)
+        f.flush()
+
+
+def acquire():
+    """Block until the shared bucket grants a request slot (no-op with NAVITIA_RATE=0)."""
+    if not _active():
+        return
+    while True:
+        with _shared_bucket() as bucket:
+            wait = bucket.take(time.time())
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+def block_for(seconds):
+    """Pause every process's requests for `seconds` (server asked us to back off)."""
+    if not _active():
+        return
+    with _shared_bucket() as bucket:
+        bucket.block(time.time() + seconds)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # slow import, rarely needed
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    Honours the server's Retry-After when given, otherwise full-jitter
+    exponential backoff: uniform(0, min(cap, base * 2**attempt)).
+    """
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
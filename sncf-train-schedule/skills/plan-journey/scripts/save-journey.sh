@@ -7,6 +7,9 @@ FROM="$1"
 TO="$2"
 DATETIME="$3"
 OUTPUT_FILE="${4:-results/$(date +%Y-%m-%d_%H%M)_journey.txt}"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+API_URL="${NAVITIA_API_URL:-https://api.navitia.io/v1}"
+COVERAGE_URL="${API_URL%/}/coverage/${NAVITIA_COVERAGE:-sncf}"
 
 if [ -z "$TOKEN" ]; then
     echo "Error: NAVITIA_API_TOKEN not set"
@@ -25,78 +28,67 @@ fi
 # Create results directory if it doesn't exist
 mkdir -p results
 
-echo "Fetching journey from $FROM to $TO at $DATETIME..."
-
-curl -s -H "Authorization: $TOKEN" \
-    "https://api.navitia.io/v1/coverage/sncf/journeys?from=$FROM&to=$TO&datetime=$DATETIME&count=5" | \
-    python3 << 'EOF' | tee "$OUTPUT_FILE"
+# Renders with the shared journey records (models.py). Passed with -c so that
+# stdin stays the API response.
+read -r -d '' RENDER << 'EOF'
 import sys, json
 from datetime import datetime
 
-data = json.load(sys.stdin)
-
-def format_time(dt_str):
-    """Convert YYYYMMDDTHHMMSS to HH:MM"""
-    return f"{dt_str[9:11]}:{dt_str[11:13]}"
+sys.path.insert(0, sys.argv[1])
+from models import Journey, clock
+from timestamps import parse_timestamp
 
-def format_date(dt_str):
-    """Convert YYYYMMDDTHHMMSS to readable date"""
-    return f"{dt_str[6:8]}/{dt_str[4:6]}/{dt_str[0:4]}"
+data = json.load(sys.stdin)
+journeys = [Journey.from_json(journey) for journey in data.get('journeys', [])]
 
 print("╔═══════════════════════════════════════════════════════════════╗")
 print("║              SNCF Journey Search Results                      ║")
 print("╚═══════════════════════════════════════════════════════════════╝\n")
 
-if data.get('journeys'):
-    first = data['journeys'][0]
-    print(f"Search Date: {format_date(first['requested_date_time'])}")
+if journeys:
+    requested = parse_timestamp(journeys[0].requested_text)
+    print(f"Search Date: {requested:%d/%m/%Y}" if requested else "Search Date: ?")
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
 
-for idx, journey in enumerate(data.get('journeys', [])[:5], 1):
-    duration_sec = journey.get('duration', 0)
-    duration_min = duration_sec // 60
-    duration_h = duration_min // 60
-    duration_m = duration_min % 60
-
-    dep_time = journey.get('departure_date_time', '')
-    arr_time = journey.get('arrival_date_time', '')
-    transfers = journey.get('nb_transfers', 0)
-    co2 = journey.get('co2_emission', {}).get('value', 0)
+for idx, journey in enumerate(journeys[:5], 1):
+    duration_min = journey.duration // 60
 
     print(f"{'═' * 63}")
-    print(f"Option {idx}: {'⭐ RECOMMENDED' if journey.get('type') == 'best' else 'Alternative'}")
+    print(f"Option {idx}: {'⭐ RECOMMENDED' if journey.type == 'best' else 'Alternative'}")
     print(f"{'═' * 63}")
-    print(f"🕐 Depart:  {format_time(dep_time)}")
-    print(f"🕐 Arrive:  {format_time(arr_time)}")
-    print(f"⏱️  Duration: {duration_h}h {duration_m:02d}min")
-    print(f"🔄 Transfers: {transfers}")
-    print(f"🌱 CO2: {co2:.0f}g")
+    print(f"🕐 Depart:  {clock(journey.departure, journey.departure_text)}")
+    print(f"🕐 Arrive:  {clock(journey.arrival, journey.arrival_text)}")
+    print(f"⏱️  Duration: {duration_min // 60}h {duration_min % 60:02d}min")
+    print(f"🔄 Transfers: {journey.nb_transfers}")
+    print(f"🌱 CO2: {journey.co2:.0f}g")
 
     print(f"\n📍 Route Details:")
-    for section in journey.get('sections', []):
-        sec_type = section.get('type', '')
-        if sec_type == 'public_transport':
-            from_name = section.get('from', {}).get('name', '').split(' (')[0]
-            to_name = section.get('to', {}).get('name', '').split(' (')[0]
-            line = section.get('display_informations', {}).get('code', 'N/A')
-            commercial_mode = section.get('display_informations', {}).get('commercial_mode', 'Train')
-            dep = section.get('departure_date_time', '')
-            arr = section.get('arrival_date_time', '')
-            print(f"\n  🚆 {commercial_mode} {line}")
-            print(f"     └─ {from_name} ({format_time(dep)}) → {to_name} ({format_time(arr)})")
-        elif sec_type == 'transfer' or sec_type == 'waiting':
-            duration = section.get('duration', 0) // 60
+    for section in journey.sections:
+        if section.type == 'public_transport':
+            from_name = section.from_name.split(' (')[0]
+            to_name = section.to_name.split(' (')[0]
+            dep = clock(section.departure, section.departure_text)
+            arr = clock(section.arrival, section.arrival_text)
+            print(f"\n  🚆 {section.commercial_mode or 'Train'} {section.code}")
+            print(f"     └─ {from_name} ({dep}) → {to_name} ({arr})")
+        elif section.type in ('transfer', 'waiting'):
+            duration = section.duration // 60
             if duration > 0:
-                transfer_type = section.get('transfer_type', 'connection')
-                print(f"     🔄 {transfer_type.title()}: {duration} min")
+                print(f"     🔄 {(section.transfer_type or 'connection').title()}: {duration} min")
 
     print()
 
 print(f"{'═' * 63}")
-print(f"Total options: {len(data.get('journeys', []))}")
+print(f"Total options: {len(journeys)}")
 print(f"{'═' * 63}")
 EOF
 
+echo "Fetching journey from $FROM to $TO at $DATETIME..."
+
+curl -s -H "Authorization: $TOKEN" \
+    "$COVERAGE_URL/journeys?from=$FROM&to=$TO&datetime=$DATETIME&count=5" | \
+    python3 -c "$RENDER" "$SCRIPT_DIR" | tee "$OUTPUT_FILE"
+
 echo ""
 echo "✅ Results saved to: $OUTPUT_FILE"
@@ -2,6 +2,10 @@
 """
 Search for SNCF station IDs by name.
 
+Answers from the offline station index (see station_index.py) when it has a
+match, and only queries /coverage/sncf/places on a miss. With only the
+bundled major stations, an exact name match is needed to skip the API.
+
 Usage:
     python search_stations.py "Paris Gare de Lyon"
     python search_stations.py "Lyon" --count 10
@@ -12,18 +16,14 @@ import json
 import os
 import sys
 
-try:
-    import requests
-except ImportError:
-    print("❌ Error: 'requests' package not found", file=sys.stderr)
-    print("Install with: pip install requests", file=sys.stderr)
-    sys.exit(1)
-
+import cache
+import navitia
+import station_index
 from config import load_token
-load_token()
+from errors import APITimeoutError, HTTPStatusError, NetworkError
 
 
-def search_stations(query, api_token, count=10):
+def search_stations(query, api_token, count=10, use_index=True):
     """
     Search for stations matching the query.
 
@@ -31,61 +31,44 @@ def search_stations(query, api_token, count=10):
         query: Station name to search for
         api_token: Navitia API token
         count: Maximum number of results to return
+        use_index: Try the offline station index before the API
 
     Returns:
         List of station dictionaries with id, name, and coordinates
     """
-    url = "https://api.navitia.io/v1/coverage/sncf/places"
-    params = {
-        "q": query,
-        "type[]": "stop_area",
-        "count": count
-    }
-    headers = {"Authorization": api_token}
+    if use_index:
+        stations = station_index.search(query, count)
+        if stations:
+            return stations
 
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        places = data.get("places", [])
-        if not places:
+        stations = navitia.search_stations(query, api_token, count)
+        if not stations:
             print(f"⚠️  No stations found for '{query}'", file=sys.stderr)
             print("Try a different search term or check spelling", file=sys.stderr)
             return []
 
-        stations = []
-        for place in places:
-            station = {
-                "id": place.get("id"),
-                "name": place.get("name"),
-                "quality": place.get("quality", 0)
-            }
-
-            # Add coordinates if available
-            if "stop_area" in place and "coord" in place["stop_area"]:
-                coord = place["stop_area"]["coord"]
-                station["coordinates"] = f"{coord.get('lon')};{coord.get('lat')}"
-
-            stations.append(station)
-
         return stations
 
-    except requests.exceptions.Timeout:
+    except APITimeoutError:
         print("❌ API timeout - network may be slow", file=sys.stderr)
         print("Retry the search or check your connection", file=sys.stderr)
         sys.exit(0)
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
+    except HTTPStatusError as e:
+        if e.status == 401:
             print("❌ Invalid API token", file=sys.stderr)
             print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
             print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
-        elif e.response.status_code == 400:
+        elif e.status == 400:
             print(f"❌ Invalid search query: '{query}'", file=sys.stderr)
+        elif e.status == 429:
+            print("❌ API rate limit reached", file=sys.stderr)
+            if e.retry_after:
+                print(f"Retry in {int(e.retry_after)}s", file=sys.stderr)
         else:
-            print(f"❌ API error: HTTP {e.response.status_code}", file=sys.stderr)
+            print(f"❌ API error: HTTP {e.status}", file=sys.stderr)
         sys.exit(0)
-    except requests.exceptions.RequestException as e:
+    except NetworkError as e:
         print(f"❌ Network error: {e}", file=sys.stderr)
         sys.exit(0)
 
@@ -116,6 +99,7 @@ def main():
 Examples:
   python search_stations.py "Paris Gare de Lyon"
   python search_stations.py "Lyon" --count 10 --format json
+  python search_stations.py "Lyon" --online
         """
     )
     parser.add_argument("query", help="Station name to search for")
@@ -123,10 +107,22 @@ Examples:
                        help="Maximum number of results (default: 10)")
     parser.add_argument("--format", choices=["human", "json"], default="human",
                        help="Output format (default: human)")
+    parser.add_argument("--online", action="store_true",
+                       help="Skip the offline station index and query the API")
+
+    cache.add_arguments(parser)
 
     args = parser.parse_args()
+    cache.apply_arguments(args)
+
+    # Offline index first — no token or network needed on a hit
+    stations = [] if args.online else station_index.search(args.query, args.count)
+    if stations:
+        print(format_output(stations, args.format))
+        return
 
-    # Get API token from environment
+    # Get API token from environment (settings file / .env only read once a call is needed)
+    load_token()
     api_token = os.getenv("NAVITIA_API_TOKEN")
     if not api_token:
         print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
@@ -135,7 +131,7 @@ Examples:
         sys.exit(0)
 
     # Search for stations
-    stations = search_stations(args.query, api_token, args.count)
+    stations = search_stations(args.query, api_token, args.count, use_index=False)
 
     if stations:
         print(format_output(stations, args.format))
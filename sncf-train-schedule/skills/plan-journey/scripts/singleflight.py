@@ -0,0 +1,129 @@
+"""
+Single-flight coalescing for identical Navitia requests.
+
+When several callers ask for the same path and parameters at the same time,
+only one of them (the leader) goes upstream; the others wait for its result.
+
+- In-process: batch worker threads share the leader's response (or error)
+- Across processes: the leader holds a file lock under .claude/ while it
+  fetches; other processes block on that lock, then find the response in the
+  on-disk cache (see cache.py) instead of issuing their own call
+
+Cross-process coalescing therefore needs the cache; with --no-cache only
+in-process coalescing applies.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+stats = {"leaders": 0, "shared": 0}
+_inflight = {}
+_lock = threading.Lock()
+
+
+class _Call:
+    """One in-flight request and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def do(key, fn):
+    """
+    Run fn() once per key among concurrent callers in this process.
+
+    Args:
+        key: Request identity (e.g., cache.make_key(path, params))
+        fn: Callable performing the request
+
+    Returns:
+        fn()'s result; callers that joined an in-flight call get the same object
+
+    Raises:
+        Whatever fn() raised, in the leader and in every caller that joined it
+    """
+    with _lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+            stats["leaders"] += 1
+        else:
+            stats["shared"] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _inflight[key]
+        call.done.set()
+
+
+def lock_path(key):
+    """Return the lock file for a key (one per request, removed once it is fetched)."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.flights",
+                        f"{key}.lock")
+
+
+def _open_locked(path):
+    """
+    Open and flock the lock file, retrying if its holder removed it meanwhile.
+
+    A waiter that wins the lock on a file already unlinked by the previous
+    holder would not exclude a newcomer creating a fresh file at the same path.
+    """
+    while True:
+        f = open(path, "a")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                return f
+        except FileNotFoundError:
+            pass
+        f.close()
+
+
+@contextmanager
+def process_lock(key):
+    """
+    Hold the cross-process lock for a key while fetching it.
+
+    Locks are per key, so unrelated requests never wait on each other; the
+    file is removed on release so the directory only holds in-flight requests.
+    Falls back to no locking where flock or the .claude/ directory is unavailable.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        path = lock_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = _open_locked(path)
+    except OSError:
+        yield
+        return
+    with f:
+        try:
+            yield
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
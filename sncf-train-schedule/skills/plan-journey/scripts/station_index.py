@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Offline SNCF station index with fuzzy local search.
+
+The index is a sorted, tab-separated file (one stop area per line):
+
+    folded_name <TAB> id <TAB> name <TAB> lon <TAB> lat
+
+Names are accent-folded and lowercased once at build time, so lookups are a
+bisect for prefixes plus a token scan, with a trigram fallback for typos.
+Nearest-station lookups use a grid of GRID_CELL-degree cells built on first
+use: only the cells around the point are scanned, ring by ring, and
+candidates are ranked by great-circle distance.
+
+Index files, first match wins:
+  1. .claude/sncf-train-schedule.local.stations.tsv (full dump, built with `build`)
+  2. references/stations.tsv (major stations, shipped with the plugin)
+
+The full dump doubles as the set of known stop area IDs for bulk
+validation (validate_station_id.py --file), which rebuilds it once it is
+older than INDEX_MAX_AGE.
+
+Usage:
+    python station_index.py build
+    python station_index.py build --from-file stop_areas.json
+    python station_index.py info
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+
+BUNDLED_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "references", "stations.tsv")
+
+# Common abbreviations in SNCF station names
+_SYNONYMS = {"st": "saint", "ste": "sainte", "gd": "grand"}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_RADIUS = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(km|m)?\s*$", re.IGNORECASE)
+
+MIN_FUZZY_SIMILARITY = 0.3
+
+# Age after which bulk validation downloads the full index again (seconds)
+INDEX_MAX_AGE = 30 * 24 * 3600
+
+# Grid cell size for nearest-station lookups (degrees; ~5.5 km of latitude)
+GRID_CELL = 0.05
+EARTH_RADIUS_KM = 6371.0088
+
+_index = None
+_index_is_complete = False
+
+
+def local_index_path():
+    """Return the path of the locally built full index."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.stations.tsv")
+
+
+def fold(name):
+    """Accent-fold, lowercase and normalize a station name for matching."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    tokens = _NON_ALNUM.sub(" ", ascii_name).split()
+    return " ".join(_SYNONYMS.get(t, t) for t in tokens)
+
+
+def distance_km(lon1, lat1, lon2, lat2):
+    """Great-circle (haversine) distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(text):
+    """Parse "lon;lat" into a (lon, lat) float pair; None if it is not valid coordinates."""
+    parts = text.split(";")
+    if len(parts) != 2:
+        return None
+    try:
+        lon, lat = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        return None
+    return lon, lat
+
+
+def parse_radius(text):
+    """Parse a distance such as "2km", "500m" or "3" (km) into kilometres; None if invalid."""
+    match = _RADIUS.match(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return value / 1000 if (match.group(2) or "km").lower() == "m" else value
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationIndex:
+    """Array-backed station index sorted by folded name."""
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: Iterable of (folded_name, id, name, lon, lat) tuples
+        """
+        rows = sorted(rows)
+        self.folded = [r[0] for r in rows]
+        self.ids = [r[1] for r in rows]
+        self.names = [r[2] for r in rows]
+        self.lons = [float(r[3]) if r[3] != "" else None for r in rows]
+        self.lats = [float(r[4]) if r[4] != "" else None for r in rows]
+        self._tokens = None
+        self._trigram_sets = None
+        self._by_id = None
+        self._grid = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index file written by save()."""
+        with open(path, encoding="utf-8") as f:
+            return cls(tuple(line.rstrip("\n").split("\t")) for line in f if line.strip())
+
+    def save(self, path):
+        """
+        Write the index as a sorted TSV file.
+
+        Written to a temporary file then moved over the old one, so an
+        interrupted save never leaves a truncated index behind.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for i in range(len(self)):
+                    lon = "" if self.lons[i] is None else self.lons[i]
+                    lat = "" if self.lats[i] is None else self.lats[i]
+                    f.write(f"{self.folded[i]}\t{self.ids[i]}\t{self.names[i]}\t{lon}\t{lat}\n")
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def station(self, i):
+        """Return row i as a station dict (same shape as search_stations results)."""
+        station = {"id": self.ids[i], "name": self.names[i]}
+        if self.lons[i] is not None and self.lats[i] is not None:
+            station["coordinates"] = f"{self.lons[i]};{self.lats[i]}"
+        return station
+
+    def get(self, station_id):
+        """Return the station dict for an ID, or None if unknown."""
+        if self._by_id is None:
+            self._by_id = {sid: i for i, sid in enumerate(self.ids)}
+        i = self._by_id.get(station_id)
+        return None if i is None else self.station(i)
+
+    def search(self, query, count=10, fuzzy=True):
+        """
+        Search stations by name.
+
+        Ranking: exact name, then name prefix, then every query word being a
+        prefix of a name word, then trigram similarity for misspellings.
+
+        Args:
+            query: Station name (any case, accents optional)
+            count: Maximum number of results
+            fuzzy: Fall back to trigram similarity when nothing matches by prefix
+
+        Returns:
+            List of station dicts with id, name, coordinates and quality (0-100)
+        """
+        q = fold(query)
+        if not q:
+            return []
+
+        scores = {}
+
+        # Whole-name prefix: contiguous range in the sorted array
+        start = bisect.bisect_left(self.folded, q)
+        for i in range(start, len(self.folded)):
+            if not self.folded[i].startswith(q):
+                break
+            scores[i] = 100 if self.folded[i] == q else 90
+
+        # Every query word is a prefix of some word of the name
+        q_tokens = q.split()
+        if self._tokens is None:
+            self._tokens = [name.split() for name in self.folded]
+        for i, tokens in enumerate(self._tokens):
+            if i not in scores and all(any(t.startswith(qt) for t in tokens) for qt in q_tokens):
+                scores[i] = 80 - min(len(tokens) - len(q_tokens), 10)
+
+        if not scores and fuzzy:
+            scores = self._fuzzy(q)
+
+        ranked = sorted(scores, key=lambda i: (-scores[i], len(self.folded[i]), self.folded[i]))
+        results = []
+        for i in ranked[:count]:
+            station = self.station(i)
+            station["quality"] = scores[i]
+            results.append(station)
+        return results
+
+    def _cell(self, lon, lat):
+        return int(math.floor(lat / GRID_CELL)), int(math.floor(lon / GRID_CELL))
+
+    def nearest(self, lon, lat, count=5, radius_km=None):
+        """
+        Find the stations closest to a point.
+
+        Cells are scanned in growing square rings around the point's cell;
+        the scan stops once `count` stations are known to be closer than
+        anything left in outer rings, or the rings are past `radius_km`.
+
+        Args:
+            lon: Longitude
+            lat: Latitude
+            count: Maximum number of results
+            radius_km: Only stations within this distance (None = no limit)
+
+        Returns:
+            List of station dicts (see station()) with "distance" in metres,
+            closest first
+        """
+        if self._grid is None:
+            self._grid = {}
+            for i, (x, y) in enumerate(zip(self.lons, self.lats)):
+                if x is not None and y is not None:
+                    self._grid.setdefault(self._cell(x, y), []).append(i)
+        if not self._grid or count <= 0:
+            return []
+
+        row, col = self._cell(lon, lat)
+        # Past this ring every indexed cell has been scanned
+        last_ring = max(max(abs(r - row), abs(c - col)) for r, c in self._grid)
+        degree_km = math.radians(EARTH_RADIUS_KM)
+
+        found = []
+        ring = 0
+        while ring <= last_ring:
+            if ring:
+                cells = [(row + dr, col + dc) for dr in range(-ring, ring + 1) for dc in (-ring, ring)]
+                cells += [(row + dr, col + dc) for dr in (-ring, ring) for dc in range(-ring + 1, ring)]
+            else:
+                cells = [(row, col)]
+            for cell in cells:
+                for i in self._grid.get(cell, ()):
+                    distance = distance_km(lon, lat, self.lons[i], self.lats[i])
+                    if radius_km is None or distance <= radius_km:
+                        found.append((distance, i))
+            # Outer rings are at least `ring` cells away; longitude cells are
+            # narrowest on the side of the ring furthest from the equator
+            shortest = min(1.0, math.cos(math.radians(min(abs(lat) + (ring + 1) * GRID_CELL, 90))))
+            covered = ring * GRID_CELL * degree_km * shortest
+            found.sort()
+            if len(found) >= count and found[count - 1][0] <= covered:
+                break
+            if radius_km is not None and covered >= radius_km:
+                break
+            ring += 1
+
+        results = []
+        for distance, i in found[:count]:
+            station = self.station(i)
+            station["distance"] = int(round(distance * 1000))
+            results.append(station)
+        return results
+
+    def _fuzzy(self, q):
+        if self._trigram_sets is None:
+            self._trigram_sets = [_trigrams(name) for name in self.folded]
+        q_grams = _trigrams(q)
+        scores = {}
+        for i, grams in enumerate(self._trigram_sets):
+            similarity = len(q_grams & grams) / len(q_grams | grams)
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                scores[i] = int(similarity * 70)
+        return scores
+
+
+def load():
+    """Return the station index (local full dump, else bundled), or None."""
+    global _index, _index_is_complete
+    if _index is None:
+        if os.path.isfile(local_index_path()):
+            _index = StationIndex.load(local_index_path())
+            _index_is_complete = True
+        elif os.path.isfile(BUNDLED_INDEX):
+            _index = StationIndex.load(BUNDLED_INDEX)
+    return _index
+
+
+def search(query, count=10):
+    """
+    Search the station index; returns [] when no index is available.
+
+    The bundled index only lists major stations, so without the full local
+    index only an exact name match is an answer: a prefix or fuzzy hit on the
+    small table ("Marseille" → Saint-Charles only) would hide the other
+    stations the API fallback finds.
+
+    Answered by the local server (daemon.py) when one is running, so its
+    already-loaded index is used.
+    """
+    import daemon
+
+    forwarded = daemon.forward_search(query, count)
+    if forwarded is not daemon.UNAVAILABLE:
+        return forwarded
+    index = load()
+    if index is None:
+        return []
+    stations = index.search(query, count, fuzzy=_index_is_complete)
+    if not _index_is_complete and not (stations and stations[0]["quality"] == 100):
+        return []
+    return stations
+
+
+def nearest(lon, lat, count=5, radius_km=None):
+    """Find the stations closest to a point (see StationIndex.nearest); [] without an index."""
+    index = load()
+    if index is None:
+        return []
+    return index.nearest(lon, lat, count, radius_km)
+
+
+def is_complete():
+    """Return True when the full local index (not just the bundled major stations) is in use."""
+    load()
+    return _index_is_complete
+
+
+def index_age():
+    """Return the age of the full local index in seconds, or None if it is not built."""
+    import time
+
+    try:
+        return time.time() - os.path.getmtime(local_index_path())
+    except OSError:
+        return None
+
+
+def refresh(api_token, path=None):
+    """
+    Download every stop area into the full local index and reload it.
+
+    Raises:
+        errors.NavitiaError: If the download fails (the old index is kept)
+
+    Returns:
+        Number of indexed stations
+    """
+    global _index, _index_is_complete
+    index = StationIndex(list(fetch_stop_areas(api_token)))
+    index.save(path or local_index_path())
+    _index, _index_is_complete = None, False
+    return len(index)
+
+
+def rows_from_stop_areas(stop_areas):
+    """Convert Navitia stop_area objects to index rows."""
+    for sa in stop_areas:
+        coord = sa.get("coord") or {}
+        name = sa.get("name") or sa.get("label") or ""
+        if sa.get("id") and name:
+            yield (fold(name), sa["id"], name, coord.get("lon", ""), coord.get("lat", ""))
+
+
+def rows_from_file(path):
+    """Read index rows from a Navitia stop_areas JSON dump or an id,name,lon,lat CSV."""
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        pages = data if isinstance(data, list) else [data]
+        return [row for page in pages for row in rows_from_stop_areas(page.get("stop_areas", []))]
+    with open(path, encoding="utf-8", newline="") as f:
+        return [(fold(r["name"]), r["id"], r["name"], r.get("lon", ""), r.get("lat", ""))
+                for r in csv.DictReader(f)]
+
+
+def fetch_stop_areas(api_token, page_size=1000):
+    """Page through /coverage/sncf/stop_areas and yield index rows."""
+    from client import get_json
+
+    page = 0
+    while True:
+        data = get_json("/stop_areas", api_token,
+                        {"count": page_size, "start_page": page, "depth": 0}, timeout=30)
+        stop_areas = data.get("stop_areas", [])
+        yield from rows_from_stop_areas(stop_areas)
+        pagination = data.get("pagination", {})
+        total = pagination.get("total_result", 0)
+        page += 1
+        if not stop_areas or page * page_size >= total:
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the offline SNCF station index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Download all SNCF stop areas into .claude/sncf-train-schedule.local.stations.tsv
+  python station_index.py build
+
+  # Build from a saved /stop_areas JSON dump or an id,name,lon,lat CSV
+  python station_index.py build --from-file stop_areas.json
+
+  # Show which index is in use
+  python station_index.py info
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the full local index")
+    build.add_argument("--from-file", help="Navitia stop_areas JSON or id,name,lon,lat CSV")
+    build.add_argument("--output", default=None,
+                       help="Index path (default: .claude/sncf-train-schedule.local.stations.tsv)")
+    sub.add_parser("info", help="Show the active index")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        for path in (local_index_path(), BUNDLED_INDEX):
+            if os.path.isfile(path):
+                print(f"Index: {os.path.normpath(path)}")
+                print(f"Stations: {len(StationIndex.load(path))}")
+                if path == local_index_path():
+                    print(f"Age: {index_age() / 86400:.1f} days")
+                return
+        print("⚠️  No station index found", file=sys.stderr)
+        return
+
+    if args.from_file:
+        rows = rows_from_file(args.from_file)
+    else:
+        from config import load_token
+        load_token()
+        api_token = os.getenv("NAVITIA_API_TOKEN")
+        if not api_token:
+            print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
+            print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
+            sys.exit(0)
+        from errors import NavitiaError
+        try:
+            rows = list(fetch_stop_areas(api_token))
+        except NavitiaError as e:
+            print(f"❌ Could not download stop areas: {e}", file=sys.stderr)
+            sys.exit(0)
+
+    index = StationIndex(rows)
+    output = args.output or local_index_path()
+    index.save(output)
+    print(f"✅ Indexed {len(index)} stations into {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,9 +30,16 @@ fi
 echo -e "${GREEN}✓${NC} API token found"
 echo ""
 
+# Endpoint (NAVITIA_API_URL / NAVITIA_COVERAGE point it at another instance, e.g. mock_navitia.py)
+API_URL="${NAVITIA_API_URL:-https://api.navitia.io/v1}"
+API_URL="${API_URL%/}"
+COVERAGE_URL="$API_URL/coverage/${NAVITIA_COVERAGE:-sncf}"
+echo "Endpoint: $COVERAGE_URL"
+echo ""
+
 # Test 1: Check coverage
 echo "Test 1: Checking available coverage regions..."
-COVERAGE=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage" 2>&1)
+COVERAGE=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "$API_URL/coverage" 2>&1)
 
 if echo "$COVERAGE" | grep -q "regions"; then
     echo -e "${GREEN}✓${NC} Coverage endpoint working"
@@ -47,7 +54,7 @@ echo ""
 
 # Test 2: Search for a station
 echo "Test 2: Searching for Paris Gare de Lyon..."
-STATION=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage/sncf/places?q=paris%20gare%20de%20lyon" 2>&1)
+STATION=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "$COVERAGE_URL/places?q=paris%20gare%20de%20lyon" 2>&1)
 
 if echo "$STATION" | grep -q "places"; then
     echo -e "${GREEN}✓${NC} Places search working"
@@ -65,7 +72,7 @@ echo ""
 if [ -n "$STATION_ID" ]; then
     echo "Test 3: Getting next departures from $STATION_ID..."
     DATETIME=$(date -u +"%Y%m%dT%H%M%S")
-    DEPARTURES=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage/sncf/stop_areas/$STATION_ID/departures?from_datetime=$DATETIME&count=3" 2>&1)
+    DEPARTURES=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "$COVERAGE_URL/stop_areas/$STATION_ID/departures?from_datetime=$DATETIME&count=3" 2>&1)
 
     if echo "$DEPARTURES" | grep -q "departures"; then
         echo -e "${GREEN}✓${NC} Departures endpoint working"
@@ -81,7 +88,7 @@ echo ""
 
 # Test 4: Check rate limit headers (optional)
 echo "Test 4: Checking API rate limits..."
-RATE_LIMIT=$(curl -s -I -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage" 2>&1 | grep -i "x-ratelimit" || true)
+RATE_LIMIT=$(curl -s -I -H "Authorization: $NAVITIA_API_TOKEN" "$API_URL/coverage" 2>&1 | grep -i "x-ratelimit" || true)
 
 if [ -n "$RATE_LIMIT" ]; then
     echo -e "${GREEN}✓${NC} Rate limit information:"
@@ -0,0 +1,42 @@
+"""
+Fast parsing for Navitia's fixed-width YYYYMMDDTHHmmss timestamps.
+
+datetime.strptime re-interprets the format string on every call and was the
+top frame when rendering large boards. Navitia timestamps are fixed-width,
+so they are sliced into integers instead, and the results are memoized:
+a board repeats the same few instants (base and realtime times, arrival ==
+departure) and batch runs repeat them across stations.
+
+Anything that is not a well-formed 15-character timestamp goes through
+strptime, so accepted inputs are exactly the ones strptime accepts.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S"
+
+# Distinct timestamps kept; a 40-row board has at most ~160
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_timestamp(value):
+    """Parse a Navitia YYYYMMDDTHHmmss timestamp; None if missing or malformed.
+
+    Args:
+        value: Timestamp string, e.g. "20260210T140000"
+
+    Returns:
+        datetime, or None when value is not a valid timestamp
+    """
+    if (isinstance(value, str) and len(value) == 15 and value[8] == "T"
+            and value.isascii() and value[:8].isdigit() and value[9:].isdigit()):
+        try:
+            return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                            int(value[9:11]), int(value[11:13]), int(value[13:]))
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
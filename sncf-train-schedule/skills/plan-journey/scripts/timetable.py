@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Offline SNCF timetable built from the published GTFS feed.
+
+Theoretical timetables (--data-freshness base_schedule) do not need the
+API: the GTFS feed is imported once into a SQLite file, and departure and
+arrival boards are then answered locally in well under a millisecond,
+without quota and offline.
+
+Layout of .claude/sncf-train-schedule.local.timetable.db:
+
+    stops       stop (int) → Navitia stop_area id, name
+    services    service (int) → first day (ordinal) + one bit per day
+    trips       trip (int) → GTFS trip_id, service, code, train number, terminus
+    stop_times  (trip, seq) → stop, arrival, departure in seconds after
+                midnight of the service day (may exceed 24h), indexed by
+                (stop, departure) and (stop, arrival)
+    connections one row per hop between consecutive stops of a trip, sorted
+                by departure (for the journey planner, planner.py)
+    transfers   footpaths between stop areas with their walking time
+
+GTFS stop areas are mapped to Navitia ids by their UIC code
+(StopArea:OCE87686006 → stop_area:SNCF:87686006), so the scripts' station
+IDs work unchanged. Departure times are Europe/Paris local time, as in
+the feed.
+
+Usage:
+    python timetable.py build sncf-gtfs.zip
+    python timetable.py build https://.../export-gtfs.zip
+    python timetable.py info
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+
+from timestamps import parse_timestamp
+
+DAY = 24 * 60 * 60
+
+# GTFS route_type → Navitia-like commercial mode
+ROUTE_TYPES = {0: "Tramway", 1: "Métro", 2: "Train", 3: "Car", 7: "Funiculaire"}
+
+_UIC_RE = re.compile(r"(\d{8})$")
+
+_conn = None
+_services = None
+
+
+def timetable_path():
+    """Return the path of the locally built timetable."""
+    return os.path.join(os.getcwd(), ".claude", "sncf-train-schedule.local.timetable.db")
+
+
+def stop_area_id(gtfs_id):
+    """Map a GTFS stop or stop area id to the Navitia stop_area id (by UIC code)."""
+    match = _UIC_RE.search(gtfs_id)
+    return f"stop_area:SNCF:{match.group(1)}" if match else gtfs_id
+
+
+def parse_time(value):
+    """Convert a GTFS HH:MM:SS time (hours may exceed 23) to seconds, or None if empty."""
+    if not value:
+        return None
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def _parse_date(value):
+    return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
+# -- Import -----------------------------------------------------------------
+
+class _Feed:
+    """Read GTFS tables from a .zip file or a directory."""
+
+    def __init__(self, path):
+        import zipfile
+
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+
+    def rows(self, name):
+        """Yield the rows of a GTFS table as dicts ([] if the table is absent)."""
+        import csv
+        import io
+
+        if self._zip is not None:
+            names = {os.path.basename(n): n for n in self._zip.namelist()}
+            if name not in names:
+                return
+            with self._zip.open(names[name]) as raw:
+                yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        else:
+            path = os.path.join(self.path, name)
+            if not os.path.isfile(path):
+                return
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                yield from csv.DictReader(f)
+
+
+def _service_days(feed):
+    """Return {service_id: set of active dates} from calendar.txt and calendar_dates.txt."""
+    weekdays = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    days = {}
+    for row in feed.rows("calendar.txt"):
+        active = days.setdefault(row["service_id"], set())
+        day, end = _parse_date(row["start_date"]), _parse_date(row["end_date"])
+        runs = [row[w] == "1" for w in weekdays]
+        while day <= end:
+            if runs[day.weekday()]:
+                active.add(day)
+            day += timedelta(days=1)
+    for row in feed.rows("calendar_dates.txt"):
+        active = days.setdefault(row["service_id"], set())
+        day = _parse_date(row["date"])
+        if row["exception_type"] == "1":
+            active.add(day)
+        else:
+            active.discard(day)
+    return days
+
+
+def _bitmap(active):
+    """Encode a set of dates as (first day ordinal, bytes with one bit per day)."""
+    if not active:
+        return 0, b""
+    first = min(active).toordinal()
+    bits = bytearray((max(active).toordinal() - first) // 8 + 1)
+    for day in active:
+        offset = day.toordinal() - first
+        bits[offset >> 3] |= 1 << (offset & 7)
+    return first, bytes(bits)
+
+
+def build(source, path=None):
+    """
+    Import a GTFS feed into a fresh timetable file.
+
+    Args:
+        source: GTFS .zip file or directory
+        path: Output file (default: timetable_path())
+
+    Returns:
+        Dict of counts: stops, services, trips, stop_times
+    """
+    import sqlite3
+
+    feed = _Feed(source)
+    path = path or timetable_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE stops (stop INTEGER PRIMARY KEY, area TEXT UNIQUE NOT NULL, name TEXT);
+        CREATE TABLE services (service INTEGER PRIMARY KEY, first_day INTEGER, days BLOB);
+        CREATE TABLE trips (trip INTEGER PRIMARY KEY, trip_id TEXT, service INTEGER,
+                            code TEXT, mode TEXT, headsign TEXT, terminus INTEGER);
+        CREATE TABLE stop_times (trip INTEGER, seq INTEGER, stop INTEGER,
+                                 arrival INTEGER, departure INTEGER,
+                                 PRIMARY KEY (trip, seq)) WITHOUT ROWID;
+        CREATE TABLE connections (departure INTEGER, arrival INTEGER, from_stop INTEGER,
+                                  to_stop INTEGER, trip INTEGER, board INTEGER, alight INTEGER);
+        CREATE TABLE transfers (from_stop INTEGER, to_stop INTEGER, duration INTEGER,
+                                PRIMARY KEY (from_stop, to_stop)) WITHOUT ROWID;
+    """)
+
+    # Stop points collapse onto their stop area
+    areas, names, parents = {}, {}, {}
+    for row in feed.rows("stops.txt"):
+        parents[row["stop_id"]] = row.get("parent_station") or row["stop_id"]
+        if row.get("location_type", "0") == "1" or not row.get("parent_station"):
+            names[stop_area_id(row["stop_id"])] = row["stop_name"]
+    for gtfs_id, parent in parents.items():
+        area = stop_area_id(parent)
+        if area not in areas:
+            areas[area] = len(areas) + 1
+        names.setdefault(area, "")
+    stop_of = {gtfs_id: areas[stop_area_id(parent)] for gtfs_id, parent in parents.items()}
+    conn.executemany("INSERT INTO stops VALUES (?, ?, ?)",
+                     ((stop, area, names.get(area, "")) for area, stop in areas.items()))
+
+    service_ids = {}
+    service_days = _service_days(feed)
+    feed_days = set()
+    for service_id, active in service_days.items():
+        service_ids[service_id] = len(service_ids) + 1
+        feed_days |= active
+        conn.execute("INSERT INTO services VALUES (?, ?, ?)",
+                     (service_ids[service_id], *_bitmap(active)))
+
+    routes = {}
+    for row in feed.rows("routes.txt"):
+        mode = ROUTE_TYPES.get(int(row.get("route_type") or 2), "Train")
+        routes[row["route_id"]] = (row.get("route_short_name") or row.get("route_long_name") or mode, mode)
+
+    trip_ids = {}
+    trips = []
+    for row in feed.rows("trips.txt"):
+        if row["service_id"] not in service_ids:
+            continue
+        trip_ids[row["trip_id"]] = len(trip_ids) + 1
+        code, mode = routes.get(row["route_id"], ("Train", "Train"))
+        headsign = row.get("trip_short_name") or row.get("trip_headsign") or ""
+        trips.append((trip_ids[row["trip_id"]], row["trip_id"], service_ids[row["service_id"]],
+                       code, mode, headsign, None))
+
+    conn.executemany("INSERT INTO trips VALUES (?, ?, ?, ?, ?, ?, ?)", trips)
+
+    # stop_times is by far the largest table: streamed straight into SQLite
+    def stop_times():
+        for row in feed.rows("stop_times.txt"):
+            trip = trip_ids.get(row["trip_id"])
+            stop = stop_of.get(row["stop_id"])
+            if trip is None or stop is None:
+                continue
+            arrival = parse_time(row.get("arrival_time"))
+            departure = parse_time(row.get("departure_time"))
+            yield (trip, int(row["stop_sequence"]), stop,
+                   None if row.get("drop_off_type") == "1" else arrival if arrival is not None else departure,
+                   None if row.get("pickup_type") == "1" else departure if departure is not None else arrival)
+
+    conn.executemany("INSERT INTO stop_times VALUES (?, ?, ?, ?, ?)", stop_times())
+    # No arrival at the origin and no departure from the terminus (as on Navitia boards)
+    conn.executescript("""
+        UPDATE stop_times SET arrival = NULL
+         WHERE (trip, seq) IN (SELECT trip, MIN(seq) FROM stop_times GROUP BY trip);
+        UPDATE stop_times SET departure = NULL
+         WHERE (trip, seq) IN (SELECT trip, MAX(seq) FROM stop_times GROUP BY trip);
+        UPDATE trips SET terminus = (SELECT stop FROM stop_times
+                                      WHERE stop_times.trip = trips.trip ORDER BY seq DESC LIMIT 1);
+    """)
+    count = conn.execute("SELECT COUNT(*) FROM stop_times").fetchone()[0]
+
+    # One connection per hop between consecutive stops, sorted by departure (planner.py).
+    # A train also passes stops where it does not pick up or set down passengers.
+    conn.executescript("""
+        INSERT INTO connections
+        SELECT departure, arrival, from_stop, to_stop, trip, board, alight FROM (
+            SELECT COALESCE(departure, arrival) AS departure, departure IS NOT NULL AS board,
+                   stop AS from_stop, trip,
+                   LEAD(COALESCE(arrival, departure)) OVER hop AS arrival,
+                   LEAD(arrival IS NOT NULL) OVER hop AS alight,
+                   LEAD(stop) OVER hop AS to_stop
+            FROM stop_times WINDOW hop AS (PARTITION BY trip ORDER BY seq))
+        WHERE to_stop IS NOT NULL AND departure IS NOT NULL
+        ORDER BY departure;
+        CREATE INDEX connections_departure ON connections (departure);
+        CREATE INDEX stop_times_departure ON stop_times (stop, departure) WHERE departure IS NOT NULL;
+        CREATE INDEX stop_times_arrival ON stop_times (stop, arrival) WHERE arrival IS NOT NULL;
+    """)
+
+    # Footpaths between stop areas (transfers.txt; transfer_type 3 = not possible)
+    footpaths = {}
+    for row in feed.rows("transfers.txt"):
+        from_stop, to_stop = stop_of.get(row["from_stop_id"]), stop_of.get(row["to_stop_id"])
+        if from_stop is None or to_stop is None or from_stop == to_stop or row.get("transfer_type") == "3":
+            continue
+        duration = int(row.get("min_transfer_time") or 0)
+        footpaths[from_stop, to_stop] = min(duration, footpaths.get((from_stop, to_stop), duration))
+    conn.executemany("INSERT INTO transfers VALUES (?, ?, ?)",
+                     ((a, b, d) for (a, b), d in footpaths.items()))
+    meta = {
+        "source": os.path.basename(source),
+        "built_at": datetime.now().strftime("%Y%m%dT%H%M%S"),
+        "first_day": min(feed_days).strftime("%Y%m%d") if feed_days else "",
+        "last_day": max(feed_days).strftime("%Y%m%d") if feed_days else "",
+    }
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp, path)
+    close()
+    return {"stops": len(areas), "services": len(service_ids), "trips": len(trips), "stop_times": count}
+
+
+# -- Queries ----------------------------------------------------------------
+
+def close():
+    """Drop the open connection and cached calendars (after a rebuild)."""
+    global _conn, _services
+    if _conn is not None:
+        _conn.close()
+    _conn = _services = None
+
+
+def connect():
+    """Return a read-only connection to the timetable, or None if it has not been built."""
+    global _conn
+    if _conn is None:
+        import sqlite3
+
+        path = timetable_path()
+        if not os.path.isfile(path):
+            return None
+        _conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    return _conn
+
+
+def available():
+    """True if a local timetable has been built in this directory."""
+    return os.path.isfile(timetable_path())
+
+
+def info():
+    """Return the timetable metadata and table sizes, or None if not built."""
+    conn = connect()
+    if conn is None:
+        return None
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    for table in ("stops", "trips", "stop_times"):
+        meta[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return meta
+
+
+def runs_on(service, day):
+    """True if a service runs on a date."""
+    global _services
+    if _services is None:
+        _services = {s: (first, days) for s, first, days in
+                     connect().execute("SELECT service, first_day, days FROM services")}
+    first, days = _services.get(service, (0, b""))
+    offset = day.toordinal() - first
+    return 0 <= offset < len(days) * 8 and bool(days[offset >> 3] >> (offset & 7) & 1)
+
+
+def covers(day):
+    """True if the feed has service on or around a date (within its first and last day)."""
+    meta = dict(connect().execute("SELECT key, value FROM meta WHERE key IN ('first_day', 'last_day')"))
+    return bool(meta.get("first_day")) and meta["first_day"] <= day.strftime("%Y%m%d") <= meta["last_day"]
+
+
+def _board_item(kind, moment, trip_id, code, mode, headsign, terminus, stop_area, stop_name):
+    text = moment.strftime("%Y%m%dT%H%M%S")
+    return {
+        "display_informations": {
+            "code": code,
+            "commercial_mode": mode,
+            "direction": terminus,
+            "headsign": headsign,
+            "trip_short_name": headsign,
+        },
+        "links": [{"type": "vehicle_journey", "id": f"vehicle_journey:{trip_id}"}],
+        "stop_date_time": {
+            f"{kind}_date_time": text,
+            f"base_{kind}_date_time": text,
+            "data_freshness": "base_schedule",
+            "additional_informations": [],
+        },
+        "stop_point": {"id": stop_area, "name": stop_name},
+    }
+
+
+def board(station_id, kind, count=10, from_datetime=None):
+    """
+    Answer a base_schedule departures or arrivals board from the timetable.
+
+    Covers the 24 hours from from_datetime, like Navitia boards.
+
+    Args:
+        station_id: Navitia stop_area id
+        kind: "departure" or "arrival"
+        count: Maximum number of items
+        from_datetime: Start in YYYYMMDDTHHmmss format (None = now)
+
+    Returns:
+        List of board items shaped like Navitia's, or None when the
+        timetable is not built, does not know the station or does not cover
+        the date (the caller then asks the API)
+    """
+    conn = connect()
+    start = parse_timestamp(from_datetime) if from_datetime else datetime.now().replace(microsecond=0)
+    if conn is None or start is None:
+        return None
+    stop = conn.execute("SELECT stop, name FROM stops WHERE area = ?", (station_id,)).fetchone()
+    if stop is None or not covers(start.date()):
+        return None
+
+    column = "departure" if kind == "departure" else "arrival"
+    seconds = start.hour * 3600 + start.minute * 60 + start.second
+    found = []
+    # Trips of the previous service day run past midnight (times >= 24:00:00)
+    for shift in (-1, 0, 1):
+        day = start.date() + timedelta(days=shift)
+        low = max(seconds - shift * DAY, 0)
+        rows = conn.execute(
+            f"SELECT st.{column}, t.trip_id, t.service, t.code, t.mode, t.headsign, s.name"
+            f" FROM stop_times st JOIN trips t ON t.trip = st.trip"
+            f" JOIN stops s ON s.stop = t.terminus"
+            f" WHERE st.stop = ? AND st.{column} >= ? AND st.{column} < ?"
+            f" ORDER BY st.{column}",
+            (stop[0], low, seconds - shift * DAY + DAY))
+        taken = 0
+        for at, trip_id, service, code, mode, headsign, terminus in rows:
+            if runs_on(service, day):
+                moment = datetime(day.year, day.month, day.day) + timedelta(seconds=at)
+                found.append((moment, trip_id, code, mode, headsign, terminus))
+                taken += 1
+                if taken == count:
+                    break
+    found.sort()
+    return [_board_item(kind, moment, trip_id, code, mode, headsign, terminus, station_id, stop[1])
+            for moment, trip_id, code, mode, headsign, terminus in found[:count]]
+
+
+def departures(station_id, count=10, from_datetime=None):
+    """Return base_schedule departures from the local timetable (None = ask the API)."""
+    return board(station_id, "departure", count, from_datetime)
+
+
+def arrivals(station_id, count=10, from_datetime=None):
+    """Return base_schedule arrivals from the local timetable (None = ask the API)."""
+    return board(station_id, "arrival", count, from_datetime)
+
+
+def _download(url):
+    """Download a feed next to the timetable and return its path."""
+    import shutil
+    import urllib.request
+
+    path = timetable_path() + ".gtfs.zip"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with urllib.request.urlopen(url, timeout=120) as response, open(path, "wb") as f:
+        shutil.copyfileobj(response, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the offline SNCF timetable (GTFS)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Import a downloaded SNCF GTFS feed into .claude/sncf-train-schedule.local.timetable.db
+  python timetable.py build export-sncf-gtfs.zip
+
+  # Download and import in one go
+  python timetable.py build https://example.org/sncf-gtfs.zip
+
+  # Show the feed's date range and size
+  python timetable.py info
+
+Once built, --data-freshness base_schedule boards are answered locally
+for the stations and dates the feed covers.
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Import a GTFS feed")
+    build_parser.add_argument("feed", help="GTFS .zip file, unpacked directory or URL")
+    sub.add_parser("info", help="Show the local timetable")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        meta = info()
+        if meta is None:
+            print("⚠️  No timetable built (run: python timetable.py build FEED.zip)", file=sys.stderr)
+            return
+        print(f"Timetable: {timetable_path()}")
+        print(f"Feed: {meta['source']} (built {meta['built_at']})")
+        print(f"Service days: {meta['first_day']} → {meta['last_day']}")
+        print(f"Stations: {meta['stops']}, trips: {meta['trips']}, stop times: {meta['stop_times']}")
+        return
+
+    source = args.feed
+    if source.startswith(("http://", "https://")):
+        try:
+            source = _download(source)
+        except OSError as e:
+            print(f"❌ Could not download the feed: {e}", file=sys.stderr)
+            sys.exit(0)
+    if not os.path.exists(source):
+        print(f"❌ Feed not found: {source}", file=sys.stderr)
+        sys.exit(0)
+
+    import zipfile
+
+    try:
+        counts = build(source)
+    except (KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"❌ Invalid GTFS feed: {e}", file=sys.stderr)
+        sys.exit(0)
+    print(f"✅ Imported {counts['trips']} trips ({counts['stop_times']} stop times, "
+          f"{counts['stops']} stations) into {timetable_path()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Travel time matrix between SNCF locations.
+
+Usage:
+    python travel_matrix.py --from "stop_area:SNCF:87686006" "stop_area:SNCF:87722025" \
+        --to "stop_area:SNCF:87751008" "stop_area:SNCF:87723197"
+    python travel_matrix.py --from-file offices.txt --datetime "20260210T080000" --format csv > matrix.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import batch
+import cache
+import navitia
+from config import load_token
+from models import format_duration
+from timestamps import parse_timestamp
+
+# Output columns (csv and json rows)
+FIELDS = ("origin", "destination", "departure", "arrival", "duration", "transfers", "error")
+
+
+def choose_engine(engine, data_freshness="realtime"):
+    """
+    Resolve --engine to "local" or "navitia".
+
+    auto uses the local planner for base_schedule matrices when a GTFS
+    timetable has been built; pairs it cannot answer (coordinates, stations
+    missing from the feed) still go to Navitia.
+    """
+    if engine != "auto":
+        return engine
+    import timetable
+
+    if data_freshness == "base_schedule" and timetable.available():
+        return "local"
+    return "navitia"
+
+
+def make_row(origin, destination, journey=None, error=None):
+    """
+    Build a matrix row from the best journey of a pair.
+
+    Args:
+        origin: Origin ID or coordinates
+        destination: Destination ID or coordinates
+        journey: Journey dict (None or empty = no journey found)
+        error: Error message for the pair, if it failed
+
+    Returns:
+        Dict with the FIELDS keys; departure/arrival/duration/transfers are
+        None when no journey was found
+    """
+    row = dict.fromkeys(FIELDS)
+    row["origin"], row["destination"], row["error"] = origin, destination, error
+    if journey:
+        row["departure"] = journey.get("departure_date_time")
+        row["arrival"] = journey.get("arrival_date_time")
+        row["duration"] = journey.get("duration")
+        row["transfers"] = journey.get("nb_transfers", 0)
+    return row
+
+
+def matrix_rows(origins, destinations, api_token, datetime_param=None, data_freshness="realtime",
+                engine="navitia", fallback=False, concurrency=batch.DEFAULT_CONCURRENCY):
+    """
+    Compute the best journey for every origin/destination pair.
+
+    The local engine plans one origin to all its destinations in a single
+    connection scan (planner.plan_many). Pairs left to Navitia are planned
+    concurrently over the pooled session, one /journeys call each, so
+    repeated runs are answered by the response cache.
+
+    Args:
+        origins: Origin IDs or coordinates
+        destinations: Destination IDs or coordinates
+        api_token: Navitia API token (None = local engine only)
+        datetime_param: Departure in YYYYMMDDTHHmmss format (None = now)
+        data_freshness: "realtime" or "base_schedule"
+        engine: "local" or "navitia"
+        fallback: Send pairs the local timetable cannot answer to Navitia
+        concurrency: Maximum number of Navitia requests in flight
+
+    Yields:
+        Rows (see make_row): local pairs first, then Navitia pairs as they
+        complete
+    """
+    remote = []
+    for origin in origins:
+        local = None
+        if engine == "local" and origin.startswith("stop_area:"):
+            import planner
+            local = planner.plan_many(origin, [d for d in destinations if d.startswith("stop_area:")],
+                                      datetime_param)
+        for destination in destinations:
+            if destination == origin:
+                yield dict(make_row(origin, destination), duration=0, transfers=0)
+            elif local is not None and local.get(destination) is not None:
+                yield make_row(origin, destination, local[destination])
+            elif engine == "local" and not fallback:
+                yield make_row(origin, destination, error="Not in the local timetable")
+            elif not api_token:
+                yield make_row(origin, destination, error="NAVITIA_API_TOKEN not set")
+            else:
+                remote.append((origin, destination))
+
+    if not remote:
+        return
+
+    def fetch(pair):
+        journeys = navitia.plan_journey(pair[0], pair[1], api_token, datetime_param,
+                                        "departure", 1, data_freshness)
+        return journeys[0] if journeys else None
+
+    for (origin, destination), journey, error in batch.run(fetch, remote, concurrency):
+        yield make_row(origin, destination, journey, error)
+
+
+def _label(location):
+    """Short column label: the UIC code of a stop area, coordinates as given."""
+    return location.rsplit(":", 1)[-1]
+
+
+def format_cell(row):
+    """Format one pair for the human grid."""
+    if row["error"]:
+        return "error"
+    if row["duration"] is None:
+        return "-"
+    if row["duration"] == 0:
+        return "0"
+    return f"{format_duration(row['duration'])} ({row['transfers']})"
+
+
+def format_matrix(rows, origins, destinations):
+    """Format rows as a grid: one line per origin, one column per destination."""
+    cells = {(row["origin"], row["destination"]): format_cell(row) for row in rows}
+    labels = [_label(d) for d in destinations]
+    first = max(len(_label(o)) for o in origins)
+    widths = [max([len(label)] + [len(cells.get((o, d), "")) for o in origins])
+              for d, label in zip(destinations, labels)]
+
+    lines = ["  ".join([" " * first] + [label.rjust(w) for label, w in zip(labels, widths)])]
+    for origin in origins:
+        lines.append("  ".join([_label(origin).ljust(first)] +
+                               [cells.get((origin, d), "").rjust(w) for d, w in zip(destinations, widths)]))
+    lines.append("")
+    lines.append("Cells: duration (transfers); - = no journey")
+    return "\n".join(lines)
+
+
+def print_rows(rows, output_format):
+    """Stream rows as CSV (with a header) or JSON lines; return the number of failed pairs."""
+    failures = 0
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+    for row in rows:
+        if row["error"]:
+            failures += 1
+        if writer:
+            writer.writerow(row)
+            sys.stdout.flush()
+        else:
+            print(json.dumps(row, ensure_ascii=False), flush=True)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Travel time matrix between SNCF locations (duration and transfers of the best journey)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Every office to every office (destinations default to the origins)
+  python travel_matrix.py --from-file offices.txt --datetime "20260210T080000"
+
+  # Explicit origins and destinations, CSV for a spreadsheet
+  python travel_matrix.py --from "stop_area:SNCF:87686006" "2.3522;48.8566" \\
+      --to "stop_area:SNCF:87722025" "stop_area:SNCF:87751008" --format csv > matrix.csv
+
+  # Theoretical timetable, one scan per origin from the GTFS feed (see timetable.py)
+  python travel_matrix.py --from-file offices.txt --data-freshness base_schedule --format json
+        """
+    )
+    parser.add_argument("--from", dest="origins", nargs="+", default=[], metavar="LOCATION",
+                       help="Origin station IDs or coordinates (lon;lat)")
+    parser.add_argument("--to", dest="destinations", nargs="+", default=[], metavar="LOCATION",
+                       help="Destination station IDs or coordinates (default: the origins)")
+    parser.add_argument("--from-file",
+                       help="Read origins from a file, one per line ('-' for stdin)")
+    parser.add_argument("--to-file",
+                       help="Read destinations from a file, one per line ('-' for stdin)")
+    parser.add_argument("--datetime",
+                       help="Departure datetime in YYYYMMDDTHHmmss format (default: now)")
+    parser.add_argument("--data-freshness", choices=["realtime", "base_schedule"],
+                       default="realtime", help="Data freshness (default: realtime)")
+    parser.add_argument("--engine", choices=["auto", "local", "navitia"], default="auto",
+                       help="Planner: local GTFS timetable (build it with timetable.py), the Navitia "
+                            "API, or auto = local for base_schedule when a timetable is built, "
+                            "Navitia for the pairs it cannot answer (default: auto)")
+    parser.add_argument("--concurrency", type=int, default=batch.DEFAULT_CONCURRENCY,
+                       help=f"Parallel Navitia requests (default: {batch.DEFAULT_CONCURRENCY})")
+    parser.add_argument("--format", choices=["human", "csv", "json"], default="human",
+                       help="Output format: grid, CSV rows or JSON lines (default: human)")
+
+    cache.add_arguments(parser)
+
+    args = parser.parse_args()
+    cache.apply_arguments(args)
+
+    if args.from_file == "-" and args.to_file == "-":
+        parser.error("only one of --from-file and --to-file can read stdin")
+    origins = batch.read_station_ids(args.origins, args.from_file)
+    destinations = batch.read_station_ids(args.destinations, args.to_file) or origins
+    if not origins:
+        parser.error("at least one origin is required (--from or --from-file)")
+    if args.datetime and parse_timestamp(args.datetime) is None:
+        print(f"❌ Invalid datetime: '{args.datetime}'", file=sys.stderr)
+        print("Required format: YYYYMMDDTHHmmss (e.g. 20260210T080000)", file=sys.stderr)
+        sys.exit(0)
+
+    engine = choose_engine(args.engine, args.data_freshness)
+
+    # Get API token from environment (settings file / .env only read once a call is needed)
+    load_token()
+    api_token = os.getenv("NAVITIA_API_TOKEN")
+    if not api_token and engine == "navitia":
+        print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
+        print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
+        print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
+        sys.exit(0)
+
+    rows = matrix_rows(origins, destinations, api_token, args.datetime, args.data_freshness,
+                       engine, args.engine == "auto", args.concurrency)
+    if args.format == "human":
+        rows = list(rows)
+        print(format_matrix(rows, origins, destinations))
+        failures = sum(1 for row in rows if row["error"])
+    else:
+        failures = print_rows(rows, args.format)
+    if failures:
+        print(f"⚠️  {failures} pair(s) failed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
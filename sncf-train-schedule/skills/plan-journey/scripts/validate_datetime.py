@@ -11,6 +11,8 @@ import argparse
 import sys
 from datetime import datetime
 
+from timestamps import TIMESTAMP_FORMAT, parse_timestamp
+
 
 def validate_datetime(dt_string, convert=False):
     """
@@ -23,15 +25,9 @@ def validate_datetime(dt_string, convert=False):
     Returns:
         Tuple of (is_valid, formatted_string, error_message)
     """
-    # Target format: YYYYMMDDTHHmmss
-    target_format = "%Y%m%dT%H%M%S"
-
-    # Try to parse as target format first
-    try:
-        dt = datetime.strptime(dt_string, target_format)
+    # Target format: YYYYMMDDTHHmmss (fast path, no strptime)
+    if parse_timestamp(dt_string) is not None:
         return True, dt_string, None
-    except ValueError:
-        pass
 
     # If convert mode, try common formats
     if convert:
@@ -48,7 +44,7 @@ def validate_datetime(dt_string, convert=False):
         for fmt in common_formats:
             try:
                 dt = datetime.strptime(dt_string, fmt)
-                formatted = dt.strftime(target_format)
+                formatted = dt.strftime(TIMESTAMP_FORMAT)
                 return True, formatted, f"Converted from {fmt}"
             except ValueError:
                 continue
@@ -104,7 +100,7 @@ Example: 20260210T140000 = February 10, 2026 at 14:00:00
                 print(f"   {message}")
 
             # Parse and show human-readable version
-            dt = datetime.strptime(formatted, "%Y%m%dT%H%M%S")
+            dt = parse_timestamp(formatted)
             readable = dt.strftime("%A, %B %d, %Y at %H:%M:%S")
             print(f"   {readable}")
 
@@ -2,23 +2,29 @@
 """
 Validate that a station ID exists and is accessible via the API.
 
+Several IDs (or --file) run in bulk mode: IDs found in the offline station
+index are valid without a request, and only the others are checked against
+/stop_areas/{id}, concurrently.
+
 Usage:
     python validate_station_id.py "stop_area:SNCF:87686006"
+    python validate_station_id.py --file station_ids.txt --format json
 """
 
 import argparse
+import json
 import os
 import sys
 
-try:
-    import requests
-except ImportError:
-    print("❌ Error: 'requests' package not found", file=sys.stderr)
-    print("Install with: pip install requests", file=sys.stderr)
-    sys.exit(1)
-
+import batch
+import cache
+import navitia
+import station_index
 from config import load_token
-load_token()
+from errors import APITimeoutError, HTTPStatusError, NavitiaError, NetworkError, NotFoundError
+
+# Report fields of bulk validation (valid is None when the API check failed)
+FIELDS = ("id", "valid", "name", "coordinates", "source", "error")
 
 
 def validate_station_id(station_id, api_token):
@@ -43,23 +49,14 @@ def validate_station_id(station_id, api_token):
         return False
 
     # Try to fetch station details
-    url = f"https://api.navitia.io/v1/coverage/sncf/stop_areas/{station_id}"
-    headers = {"Authorization": api_token}
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Check if we got stop_areas back
-        stop_areas = data.get("stop_areas", [])
-        if not stop_areas:
+        station = navitia.get_stop_area(station_id, api_token)
+        if station is None:
             print(f"❌ Station ID not found: '{station_id}'", file=sys.stderr)
             print("Search for stations with: python scripts/search_stations.py 'name'", file=sys.stderr)
             return False
 
         # Valid station found
-        station = stop_areas[0]
         name = station.get("name", "Unknown")
         print(f"✅ Valid station: {name}")
         print(f"   ID: {station_id}")
@@ -73,26 +70,131 @@ def validate_station_id(station_id, api_token):
 
         return True
 
-    except requests.exceptions.Timeout:
+    except APITimeoutError:
         print("❌ API timeout - network may be slow", file=sys.stderr)
         print("Retry the validation or check your connection", file=sys.stderr)
         return False
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 401:
+    except HTTPStatusError as e:
+        if e.status == 401:
             print("❌ Invalid API token", file=sys.stderr)
             print("Get a token at: https://numerique.sncf.com/startup/api/token-developpeur/", file=sys.stderr)
             print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
-        elif e.response.status_code == 404:
+        elif e.status == 404:
             print(f"❌ Station ID not found: '{station_id}'", file=sys.stderr)
             print("Search for stations with: python scripts/search_stations.py 'name'", file=sys.stderr)
+        elif e.status == 429:
+            print("❌ API rate limit reached", file=sys.stderr)
+            if e.retry_after:
+                print(f"Retry in {int(e.retry_after)}s", file=sys.stderr)
         else:
-            print(f"❌ API error: HTTP {e.response.status_code}", file=sys.stderr)
+            print(f"❌ API error: HTTP {e.status}", file=sys.stderr)
         return False
-    except requests.exceptions.RequestException as e:
+    except NetworkError as e:
         print(f"❌ Network error: {e}", file=sys.stderr)
         return False
 
 
+def make_result(station_id, valid, station=None, source=None, error=None):
+    """Build a bulk validation result with every FIELDS key."""
+    result = dict.fromkeys(FIELDS)
+    result.update(id=station_id, valid=valid, source=source, error=error)
+    if station:
+        result["name"] = station.get("name")
+        coord = station.get("coord")
+        result["coordinates"] = f"{coord.get('lon')};{coord.get('lat')}" if coord else station.get("coordinates")
+    return result
+
+
+def validate_many(station_ids, api_token, concurrency=batch.DEFAULT_CONCURRENCY):
+    """
+    Validate many station IDs, resolving known ones from the station index.
+
+    IDs in the station index are valid with no request; the rest are
+    fetched from /stop_areas/{id} over a bounded thread pool (and the
+    response cache).
+
+    Args:
+        station_ids: Station IDs to validate
+        api_token: Navitia API token (None = index only; unknown IDs are
+            reported unchecked)
+        concurrency: Maximum number of requests in flight
+
+    Yields:
+        Result dicts (see make_result): index hits first, then API checks
+        as they complete
+    """
+    index = station_index.load()
+    unknown = []
+    for station_id in station_ids:
+        station_id = station_id.strip().strip("'\"")
+        if not station_id.startswith("stop_area:"):
+            yield make_result(station_id, False, error="Invalid format")
+            continue
+        station = index.get(station_id) if index else None
+        if station:
+            yield make_result(station_id, True, station, "index")
+        else:
+            unknown.append(station_id)
+
+    if not api_token:
+        for station_id in unknown:
+            yield make_result(station_id, None, error="NAVITIA_API_TOKEN not set")
+        return
+
+    def fetch(station_id):
+        try:
+            return navitia.get_stop_area(station_id, api_token)
+        except NotFoundError:
+            return None
+
+    for station_id, station, error in batch.run(fetch, unknown, concurrency):
+        if error:
+            yield make_result(station_id, None, error=error)
+        elif station is None:
+            yield make_result(station_id, False, source="api", error="Station ID not found")
+        else:
+            yield make_result(station_id, True, station, "api")
+
+
+def format_result(result, output_format="human"):
+    """Format one bulk validation result as a JSON line or a human-readable line."""
+    if output_format == "json":
+        return json.dumps(result, ensure_ascii=False)
+    if result["valid"]:
+        return f"✅ {result['id']}  {result['name']} ({result['coordinates'] or 'no coordinates'})"
+    if result["valid"] is None:
+        return f"⚠️  {result['id']}  {result['error']}"
+    return f"❌ {result['id']}  {result['error']}"
+
+
+def refresh_index(api_token, force=False):
+    """
+    Make the full station index the reference set of known IDs before a bulk validation.
+
+    Builds it on first use, and rebuilds it when forced or older than
+    station_index.INDEX_MAX_AGE. Without a token, a missing full index is
+    only reported: IDs outside the bundled major stations go to the API.
+    """
+    age = station_index.index_age()
+    if not api_token:
+        if age is None:
+            print("⚠️  No full station index: only the bundled major stations are known offline",
+                  file=sys.stderr)
+            print("Build it with: NAVITIA_API_TOKEN set and --refresh-index", file=sys.stderr)
+        return
+    if age is None:
+        print("🔄 Building the station index (first bulk validation)...", file=sys.stderr)
+    elif force or age > station_index.INDEX_MAX_AGE:
+        print("🔄 Refreshing the station index...", file=sys.stderr)
+    else:
+        return
+    try:
+        count = station_index.refresh(api_token)
+        print(f"✅ Indexed {count} stations", file=sys.stderr)
+    except NavitiaError as e:
+        print(f"⚠️  Could not refresh the station index: {e}", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Validate an SNCF station ID",
@@ -101,14 +203,45 @@ def main():
 Examples:
   python validate_station_id.py "stop_area:SNCF:87686006"
   python validate_station_id.py stop_area:SNCF:87722025
+
+  # Bulk: IDs known to the station index need no request, the rest are checked concurrently
+  python validate_station_id.py --file station_ids.txt --format json > report.jsonl
+  cat station_ids.txt | python validate_station_id.py --file - --refresh-index
         """
     )
-    parser.add_argument("station_id", help="Station ID to validate")
+    parser.add_argument("station_ids", nargs="*", metavar="station_id",
+                       help="Station ID(s) to validate; several IDs run in bulk mode")
+    parser.add_argument("--format", choices=["human", "json"], default="human",
+                       help="Bulk report format: one line per ID, or JSON lines (default: human)")
+    parser.add_argument("--refresh-index", action="store_true",
+                       help="Download the full station index before a bulk validation (otherwise "
+                            "built on first use and refreshed when older than 30 days)")
+
+    batch.add_arguments(parser)
+    cache.add_arguments(parser)
 
     args = parser.parse_args()
+    cache.apply_arguments(args)
 
-    # Get API token from environment
+    station_ids = batch.read_station_ids(args.station_ids, args.file)
+    if not station_ids:
+        parser.error("at least one station ID is required (as argument or via --file)")
+
+    # Get API token from environment (settings file / .env only read once a call is needed)
+    load_token()
     api_token = os.getenv("NAVITIA_API_TOKEN")
+
+    # Bulk mode: index first, API only for unknown IDs, streamed as a report
+    if len(station_ids) > 1 or args.file:
+        refresh_index(api_token, args.refresh_index)
+        counts = {True: 0, False: 0, None: 0}
+        for result in validate_many(station_ids, api_token, args.concurrency):
+            counts[result["valid"]] += 1
+            print(format_result(result, args.format), flush=True)
+        unchecked = f", {counts[None]} unchecked" if counts[None] else ""
+        print(f"{counts[True]} valid, {counts[False]} invalid{unchecked}", file=sys.stderr)
+        sys.exit(0)
+
     if not api_token:
         print("❌ NAVITIA_API_TOKEN environment variable not set", file=sys.stderr)
         print("Set it with: export NAVITIA_API_TOKEN='your-token'", file=sys.stderr)
@@ -116,7 +249,7 @@ Examples:
         sys.exit(0)
 
     # Validate station ID
-    is_valid = validate_station_id(args.station_id, api_token)
+    is_valid = validate_station_id(station_ids[0], api_token)
     sys.exit(0)
 
 
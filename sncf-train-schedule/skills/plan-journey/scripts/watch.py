@@ -0,0 +1,187 @@
+"""
+Watch mode for station boards: poll in one process and emit only changes.
+
+get_departures.py / get_arrivals.py --watch INTERVAL keep polling the same
+board over the pooled client connection, diff each response against the
+previous one by vehicle journey, and emit events for trains that appear,
+leave the board, change delay, get cancelled or change platform.
+
+While nothing changes, the wait between polls grows by BACKOFF_STEP up to
+MAX_BACKOFF times the requested interval; the first change snaps it back.
+"""
+import json
+import time
+
+import batch
+import cache
+import errors
+import navitia
+from models import Arrival, Departure, clock
+
+BACKOFF_STEP = 1.5
+MAX_BACKOFF = 4
+
+EVENTS = ("added", "removed", "delay", "cancelled", "platform")
+
+# Line prefix in human output ("~" for changes)
+MARKERS = {"added": "+", "removed": "-"}
+
+
+def snapshot(items, kind):
+    """
+    Index a board response by vehicle journey.
+
+    Args:
+        items: Departures or arrivals from the Navitia response
+        kind: "departure" or "arrival"
+
+    Returns:
+        Dict of vehicle journey id → Departure/Arrival record
+    """
+    record = Departure if kind == "departure" else Arrival
+    board = {}
+    for item in items:
+        row = record.from_json(item)
+        key = row.vehicle_journey
+        if not key:
+            # Scheduled time, so a train keeps its key when it is delayed
+            times = item.get("stop_date_time", {})
+            scheduled = times.get(f"base_{kind}_date_time") or times.get(f"{kind}_date_time", "")
+            key = f"{row.code}:{row.headsign}:{scheduled}"
+        board[key] = row
+    return board
+
+
+def _event(name, key, row, kind, **fields):
+    sdt = row.stop_date_time
+    moment, text = (sdt.departure, sdt.departure_text) if kind == "departure" else (sdt.arrival, sdt.arrival_text)
+    event = {
+        "event": name,
+        "vehicle_journey": key,
+        "code": row.code,
+        "direction": row.direction,
+        "time": clock(moment, text),
+        "disruption": sdt.disruption(kind),
+        "platform": row.platform,
+    }
+    event.update(fields)
+    return event
+
+
+def diff(previous, current, kind):
+    """
+    Return the events turning board `previous` into `current` (see snapshot).
+
+    Each event is a dict with "event" (one of EVENTS), the train's
+    "vehicle_journey", "code", "direction", "time", "disruption" and
+    "platform", plus "previous" for delay and platform changes.
+    """
+    events = []
+    for key, row in current.items():
+        old = previous.get(key)
+        if old is None:
+            events.append(_event("added", key, row, kind))
+            continue
+        disruption = row.stop_date_time.disruption(kind)
+        if row.stop_date_time.cancelled and not old.stop_date_time.cancelled:
+            events.append(_event("cancelled", key, row, kind))
+        elif disruption != old.stop_date_time.disruption(kind):
+            events.append(_event("delay", key, row, kind, previous=old.stop_date_time.disruption(kind)))
+        if row.platform != old.platform:
+            events.append(_event("platform", key, row, kind, previous=old.platform))
+    for key, row in previous.items():
+        if key not in current:
+            events.append(_event("removed", key, row, kind))
+    return events
+
+
+def watch(fetch, kind, interval, polls=None, sleep=time.sleep):
+    """
+    Poll a board and yield the events of each poll.
+
+    The first poll reports every train as "added". Failed polls (timeouts,
+    network errors, HTTP 5xx) yield a single "error" event and back off;
+    an invalid token or unknown station is raised.
+
+    Args:
+        fetch: Callable returning the board items
+        kind: "departure" or "arrival"
+        interval: Seconds between polls while the board is changing
+        polls: Stop after this many polls (None = forever)
+        sleep: Sleep function (injectable for tests)
+
+    Yields:
+        List of events (possibly empty) per poll
+    """
+    board = {}
+    wait = interval
+    done = 0
+    while polls is None or done < polls:
+        if done:
+            sleep(wait)
+        done += 1
+        try:
+            items = fetch()
+        except (errors.AuthenticationError, errors.NotFoundError):
+            raise
+        except errors.NavitiaError as e:
+            wait = min(wait * BACKOFF_STEP, interval * MAX_BACKOFF)
+            yield [{"event": "error", "error": batch.describe_error(e)}]
+            continue
+
+        current = snapshot(items, kind)
+        events = diff(board, current, kind)
+        board = current
+        wait = interval if events else min(wait * BACKOFF_STEP, interval * MAX_BACKOFF)
+        yield events
+
+
+def watch_board(kind, station_id, api_token, interval, count=10, from_datetime=None,
+                data_freshness="realtime", output_format="human"):
+    """
+    Poll a board every `interval` seconds and print only what changed, until interrupted.
+
+    Args:
+        kind: "departure" or "arrival"
+        station_id: Station ID (e.g., "stop_area:SNCF:87686006")
+        api_token: Navitia API token
+        interval: Seconds between polls (longer while the board does not change)
+        count: Number of departures or arrivals on the watched board
+        from_datetime: Fixed board start (None = now, moving with each poll)
+        data_freshness: "realtime" or "base_schedule"
+        output_format: "human", or "json" for one event object per line (NDJSON)
+    """
+    # Every poll must reach the API
+    cache.enabled = False
+    get_board = navitia.get_departures if kind == "departure" else navitia.get_arrivals
+    fetch = lambda: get_board(station_id, api_token, count, from_datetime, data_freshness)
+    try:
+        for events in watch(fetch, kind, interval):
+            for event in events:
+                print(format_event(event, output_format), flush=True)
+    except errors.NavitiaError as e:
+        batch.report_error(e, station_id)
+    except KeyboardInterrupt:
+        pass
+
+
+def format_event(event, output_format="human"):
+    """Format one event as a JSON line or a human-readable line."""
+    if output_format == "json":
+        return json.dumps(event, ensure_ascii=False)
+    if event["event"] == "error":
+        return f"⚠️  {event['error']}"
+
+    train = f"{event['time']} [{event['code']}] {event['direction']}"
+    name = event["event"]
+    if name == "removed":
+        detail = "gone"
+    elif name == "delay":
+        detail = f"{event['previous'] or 'on time'} → {event['disruption'] or 'on time'}"
+    elif name == "platform":
+        detail = f"platform {event['previous'] or '?'} → {event['platform'] or '?'}"
+    else:
+        detail = event["disruption"]
+
+    line = f"{MARKERS.get(name, '~')} {train}"
+    return f"{line} ({detail})" if detail else line
@@ -23,6 +23,11 @@ if [ -z "$NAVITIA_API_TOKEN" ]; then
     exit 0
 fi
 
+# Endpoint (NAVITIA_API_URL / NAVITIA_COVERAGE point it at another instance, e.g. mock_navitia.py)
+API_URL="${NAVITIA_API_URL:-https://api.navitia.io/v1}"
+API_URL="${API_URL%/}"
+COVERAGE_URL="$API_URL/coverage/${NAVITIA_COVERAGE:-sncf}"
+
 PASS=0
 FAIL=0
 
@@ -48,13 +53,13 @@ echo ""
 
 # Test 1: Coverage endpoint
 echo "Test 1: Coverage regions..."
-COVERAGE=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage" 2>&1)
-check "Coverage endpoint returns regions" bash -c "echo '$COVERAGE' | grep -q 'regions'"
+COVERAGE=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "$API_URL/coverage" 2>&1)
+check "Coverage endpoint returns regions" grep -q 'regions' <<< "$COVERAGE"
 
 # Test 2: Places search
 echo "Test 2: Places search..."
-STATION=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage/sncf/places?q=paris%20gare%20de%20lyon" 2>&1)
-check "Places search returns results" bash -c "echo '$STATION' | grep -q 'places'"
+STATION=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" "$COVERAGE_URL/places?q=paris%20gare%20de%20lyon" 2>&1)
+check "Places search returns results" grep -q 'places' <<< "$STATION"
 
 STATION_ID=$(echo "$STATION" | grep -o '"id":"stop_area:SNCF:[^"]*"' | head -1 | sed 's/"id":"\([^"]*\)"/\1/')
 
@@ -63,16 +68,16 @@ if [ -n "$STATION_ID" ]; then
     echo "Test 3: Departures..."
     DATETIME=$(date -u +"%Y%m%dT%H%M%S")
     DEPARTURES=$(curl -s -H "Authorization: $NAVITIA_API_TOKEN" \
-        "https://api.navitia.io/v1/coverage/sncf/stop_areas/$STATION_ID/departures?from_datetime=$DATETIME&count=3" 2>&1)
-    check "Departures endpoint returns data" bash -c "echo '$DEPARTURES' | grep -q 'departures'"
+        "$COVERAGE_URL/stop_areas/$STATION_ID/departures?from_datetime=$DATETIME&count=3" 2>&1)
+    check "Departures endpoint returns data" grep -q 'departures' <<< "$DEPARTURES"
 else
     echo -e "${YELLOW}SKIP${NC} Test 3: No station ID found"
 fi
 
 # Test 4: Rate limit headers
 echo "Test 4: Rate limits..."
-HEADERS=$(curl -s -I -H "Authorization: $NAVITIA_API_TOKEN" "https://api.navitia.io/v1/coverage" 2>&1)
-check "API returns HTTP headers" bash -c "echo '$HEADERS' | grep -qi 'HTTP'"
+HEADERS=$(curl -s -I -H "Authorization: $NAVITIA_API_TOKEN" "$API_URL/coverage" 2>&1)
+check "API returns HTTP headers" grep -qi 'HTTP' <<< "$HEADERS"
 
 echo ""
 echo "=================================="
@@ -84,6 +84,8 @@ check "check-token.sh exists" test -f "$PLUGIN_DIR/hooks/check-token.sh"
 check "check-token.sh is executable" test -x "$PLUGIN_DIR/hooks/check-token.sh"
 check "validate-bash-security.sh exists" test -f "$PLUGIN_DIR/hooks/validate-bash-security.sh"
 check "validate-bash-security.sh is executable" test -x "$PLUGIN_DIR/hooks/validate-bash-security.sh"
+check "pretooluse.sh exists" test -f "$PLUGIN_DIR/hooks/pretooluse.sh"
+check "pretooluse.sh is executable" test -x "$PLUGIN_DIR/hooks/pretooluse.sh"
 
 # Reference files
 check "api-reference.md exists" test -f "$PLUGIN_DIR/skills/plan-journey/references/api-reference.md"
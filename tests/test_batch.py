@@ -0,0 +1,80 @@
+"""Unit tests for batch station board fetching."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import json
+import threading
+import time
+
+import pytest
+
+import batch
+import errors
+
+
+def test_read_station_ids_merges_args_and_file(tmp_path):
+    ids_file = tmp_path / "stations.txt"
+    ids_file.write_text("# board\nstop_area:SNCF:2\n\nstop_area:SNCF:1\nstop_area:SNCF:3\n")
+    ids = batch.read_station_ids(["stop_area:SNCF:1"], str(ids_file))
+    assert ids == ["stop_area:SNCF:1", "stop_area:SNCF:2", "stop_area:SNCF:3"]
+
+
+def test_run_is_concurrent_and_bounded():
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def fetch(station_id):
+        with lock:
+            in_flight.append(station_id)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(station_id)
+        return [station_id]
+
+    start = time.perf_counter()
+    results = list(batch.run(fetch, [f"stop_area:SNCF:{i}" for i in range(12)], concurrency=4))
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 12
+    assert max(peak) <= 4
+    assert elapsed < 12 * 0.05
+
+
+def test_run_reports_errors_per_station():
+    def fetch(station_id):
+        if station_id == "bad":
+            raise errors.APITimeoutError()
+        return ["ok"]
+
+    results = {sid: (items, error) for sid, items, error in batch.run(fetch, ["good", "bad"])}
+    assert results["good"] == (["ok"], None)
+    assert results["bad"] == (None, "API timeout")
+
+
+def test_print_results_json_lines(capsys):
+    failures = batch.print_results(
+        iter([("a", [{"x": 1}], None), ("b", None, "API timeout")]), "departures", None, "json")
+    lines = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert failures == 1
+    assert lines == [{"station_id": "a", "departures": [{"x": 1}]},
+                     {"station_id": "b", "error": "API timeout"}]
+
+
+def test_stream_board_walks_the_kind_asked(monkeypatch, capsys):
+    import navitia
+    monkeypatch.setattr(navitia, "iter_arrivals", lambda *args: iter([{"n": 1}, {"n": 2}]))
+    monkeypatch.setattr(navitia, "iter_departures", lambda *args: iter([]))
+    assert batch.stream_board("arrival", "s", "t", "20260210T220000", lambda i, item: f"{i}:{item['n']}") == 2
+    assert capsys.readouterr().out == "1:1\n\n2:2\n\n"
+    assert batch.stream_board("departure", "s", "t", "20260210T220000", None) == 0
+    assert "No departures found for station 's'" in capsys.readouterr().err
+
+
+def test_report_error_exits_quietly(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        batch.report_error(errors.NotFoundError(404, "unknown object"), "s")
+    assert exit_info.value.code == 0
+    assert "Station ID 's' not found" in capsys.readouterr().err
@@ -0,0 +1,126 @@
+"""Benchmarks for the fetch, parse and format stages of every script (pytest-benchmark)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("requests")
+
+import batch
+import cache
+import client
+import get_arrivals
+import get_departures
+import navitia
+import plan_journey
+import ratelimit
+import search_stations
+from mock_navitia import MockNavitia, fixture_bytes, load_fixture
+
+STATION = "stop_area:SNCF:87686006"
+DESTINATION = "stop_area:SNCF:87751008"
+
+# fixture name → parser
+PARSERS = {
+    "departures": navitia.parse_departures,
+    "arrivals": navitia.parse_arrivals,
+    "journeys": navitia.parse_journeys,
+    "journeys_large": navitia.parse_journeys,
+    "places": navitia.parse_places,
+    "stop_area": navitia.parse_stop_area,
+}
+
+# benchmark id → (fixture name, parser, formatter)
+FORMATTERS = {
+    "get_departures": ("departures", navitia.parse_departures, get_departures.format_output),
+    "get_arrivals": ("arrivals", navitia.parse_arrivals, get_arrivals.format_output),
+    "plan_journey": ("journeys", navitia.parse_journeys, plan_journey.format_output),
+    "plan_journey_large": ("journeys_large", navitia.parse_journeys, plan_journey.format_output),
+    "search_stations": ("places", navitia.parse_places, search_stations.format_output),
+}
+
+# Blocking API calls, one per script
+FETCHES = {
+    "get_departures": lambda: navitia.get_departures(STATION, "token", count=40),
+    "get_arrivals": lambda: navitia.get_arrivals(STATION, "token", count=40),
+    "plan_journey": lambda: navitia.plan_journey(STATION, DESTINATION, "token", count=3),
+    "plan_journey_large": lambda: navitia.plan_journey(STATION, DESTINATION, "token", count=10),
+    "search_stations": lambda: navitia.search_stations("paris", "token"),
+    "validate_station_id": lambda: navitia.get_stop_area(STATION, "token"),
+}
+
+
+@pytest.fixture
+def offline_client(tmp_path, monkeypatch):
+    """Point the client at a fresh mock API, with cache and rate limiter out of the way."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "enabled", False)
+    monkeypatch.setattr(ratelimit, "enabled", False)
+
+    def start(**options):
+        api = MockNavitia(**options).__enter__()
+        monkeypatch.setattr(client, "BASE_URL", api.url)
+        started.append(api)
+        return api
+
+    started = []
+    yield start
+    for api in started:
+        api.__exit__(None, None, None)
+
+
+@pytest.mark.parametrize("fixture", sorted(PARSERS))
+def test_parse(benchmark, fixture):
+    raw = fixture_bytes(fixture)
+    parse = PARSERS[fixture]
+    benchmark.group = "parse"
+    benchmark(lambda: parse(json.loads(raw)))
+
+
+@pytest.mark.parametrize("output_format", ["human", "json"])
+@pytest.mark.parametrize("script", sorted(FORMATTERS))
+def test_format(benchmark, script, output_format):
+    fixture, parse, format_output = FORMATTERS[script]
+    items = parse(load_fixture(fixture))
+    benchmark.group = f"format-{output_format}"
+    assert benchmark(format_output, items, output_format)
+
+
+@pytest.mark.parametrize("script", sorted(FETCHES))
+def test_fetch(benchmark, offline_client, script):
+    offline_client()
+    benchmark.group = "fetch"
+    assert benchmark(FETCHES[script]) is not None
+
+
+def test_fetch_cache_hit(benchmark, offline_client, monkeypatch):
+    api = offline_client()
+    monkeypatch.setattr(cache, "_conn", None)
+    monkeypatch.setattr(cache, "enabled", True)
+    FETCHES["get_departures"]()
+    benchmark.group = "fetch"
+    benchmark(FETCHES["get_departures"])
+    assert api.hits == 1
+
+
+def test_fetch_with_429_injection(benchmark, offline_client):
+    # Every other request is rate limited: measures the retry path overhead
+    offline_client(rate_limit_every=2, retry_after=0)
+    benchmark.group = "fetch"
+    assert benchmark(FETCHES["get_departures"])
+
+
+@pytest.mark.parametrize("concurrency", [1, 8, 32])
+def test_batch_throughput(benchmark, offline_client, concurrency):
+    # 32 stations at 20 ms server latency: wall time ≈ 32 / concurrency × 20 ms
+    offline_client(latency=0.02)
+    station_ids = [f"stop_area:SNCF:{87000000 + i}" for i in range(32)]
+    fetch = lambda sid: navitia.get_departures(sid, "token", count=40)
+    benchmark.group = "batch-throughput"
+    results = benchmark.pedantic(lambda: list(batch.run(fetch, station_ids, concurrency)),
+                                 rounds=3, iterations=1)
+    assert all(error is None for _, _, error in results)
@@ -0,0 +1,72 @@
+"""Unit tests for the on-disk Navitia response cache."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import pytest
+
+import cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "_conn", None)
+    monkeypatch.setattr(cache, "enabled", True)
+    monkeypatch.setattr(cache, "stats", {"hits": 0, "misses": 0})
+    yield
+    if cache._conn is not None:
+        cache._conn.close()
+
+
+def test_ttl_per_endpoint_class():
+    assert cache.ttl_for("/places") == cache.TTL_PLACES
+    assert cache.ttl_for("/stop_areas/stop_area:SNCF:87686006") == cache.TTL_STOP_AREA
+    assert cache.ttl_for("/stop_areas/stop_area:SNCF:87686006/departures") == cache.TTL_REALTIME
+    assert cache.ttl_for("/journeys", {"data_freshness": "realtime"}) == cache.TTL_REALTIME
+    assert cache.ttl_for("/journeys", {"data_freshness": "base_schedule"}) == cache.TTL_BASE_SCHEDULE
+    assert cache.ttl_for("/coverage") == 0
+
+
+def test_key_normalizes_params():
+    a = cache.make_key("/places", {"q": "Lyon  Part Dieu", "count": 10})
+    b = cache.make_key("/places", {"count": "10", "q": "lyon part dieu"})
+    assert a == b
+    assert a != cache.make_key("/places", {"q": "lyon", "count": 10})
+
+
+def test_key_depends_on_coverage_url(monkeypatch):
+    import client
+    real = cache.make_key("/places", {"q": "lyon"})
+    monkeypatch.setattr(client, "BASE_URL", "http://127.0.0.1:8080/v1/coverage/sncf")
+    assert cache.make_key("/places", {"q": "lyon"}) != real
+
+
+def test_roundtrip_and_stats():
+    params = {"q": "lyon"}
+    assert cache.get("/places", params) is None
+    cache.put("/places", params, {"places": [{"id": "stop_area:SNCF:87722025"}]})
+    assert cache.get("/places", params) == {"places": [{"id": "stop_area:SNCF:87722025"}]}
+    assert cache.stats == {"hits": 1, "misses": 1}
+    assert os.path.isfile(cache.cache_path())
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache.put("/places", {"q": "lyon"}, {"places": []})
+    monkeypatch.setattr(cache.time, "time", lambda: 10 ** 12)
+    assert cache.get("/places", {"q": "lyon"}) is None
+
+
+def test_disabled_cache_bypasses_storage():
+    cache.enabled = False
+    cache.put("/places", {"q": "lyon"}, {"places": []})
+    assert cache.get("/places", {"q": "lyon"}) is None
+    assert not os.path.exists(cache.cache_path())
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(cache, "MAX_BYTES", 100)
+    for i in range(5):
+        cache.put("/places", {"q": str(i)}, {"name": "x" * 40})
+    assert cache.get("/places", {"q": "0"}) is None
+    assert cache.get("/places", {"q": "4"}) == {"name": "x" * 40}
@@ -0,0 +1,19 @@
+"""Unit tests for the shared Navitia client session."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import client
+
+
+def test_session_is_shared():
+    assert client.get_session() is client.get_session()
+
+
+def test_session_sets_authorization_header():
+    session = client.get_session("test-token")
+    assert session.headers["Authorization"] == "test-token"
+
+
+def test_session_negotiates_gzip():
+    assert "gzip" in client.get_session().headers["Accept-Encoding"]
@@ -0,0 +1,91 @@
+"""Unit tests for token and settings resolution (config.py) and its mtime-keyed cache."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import json
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """An empty project directory (with .claude/) and no NAVITIA_* variables."""
+    for name in config.SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "PLUGIN_DIR", str(tmp_path / "plugin"))
+    monkeypatch.setattr(config, "_config", None)
+    (tmp_path / ".claude").mkdir()
+    return tmp_path
+
+
+def write_settings(project, text, mtime):
+    path = project / ".claude" / "sncf-train-schedule.local.md"
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_defaults(project):
+    settings = config.get()
+    assert settings.api_token is None
+    assert settings.base_url == "https://api.navitia.io/v1/coverage/sncf"
+    assert (settings.timeout, settings.journey_timeout) == (10.0, 15.0)
+
+
+def test_priority_environment_settings_dotenv(project, monkeypatch):
+    pytest.importorskip("dotenv")
+    write_settings(project, "---\nnavitia_api_token: 'from-settings'\nnavitia_coverage: fr-idf\n---\n", 1000)
+    (project / ".env").write_text("NAVITIA_API_TOKEN=from-env-file\nNAVITIA_TIMEOUT=3\nOTHER=1\n")
+    monkeypatch.setenv("NAVITIA_API_URL", "http://127.0.0.1:8080/v1/")
+    settings = config.get()
+    assert settings.api_token == "from-settings"
+    assert settings.base_url == "http://127.0.0.1:8080/v1/coverage/fr-idf"
+    assert settings.timeout == 3.0
+
+
+def test_cache_is_keyed_on_mtimes(project, monkeypatch):
+    settings_file = write_settings(project, "navitia_api_token: abc\n", 1000)
+    assert config.get().api_token == "abc"
+    entry = json.loads((project / config.CACHE_FILE).read_text())
+    # The cache names the token's file but never holds the token itself
+    assert entry["location"] == str(settings_file)
+    assert "abc" not in json.dumps(entry)
+
+    reads = []
+    resolve_files = config._resolve_files
+    monkeypatch.setattr(config, "_resolve_files", lambda paths: reads.append(paths) or resolve_files(paths))
+    assert config.get(refresh=True).api_token == "abc"
+    assert reads == []
+
+    write_settings(project, "navitia_api_token: xyz\n", 2000)
+    assert config.get(refresh=True).api_token == "xyz"
+    assert len(reads) == 1
+
+
+def test_token_is_read_from_its_file_on_cache_hits(project, monkeypatch):
+    pytest.importorskip("dotenv")
+    (project / ".env").write_text("NAVITIA_API_TOKEN=from-env-file\nNAVITIA_COVERAGE=fr-idf\n")
+    assert config.get().api_token == "from-env-file"
+    assert "from-env-file" not in (project / config.CACHE_FILE).read_text()
+
+    # Cache hit: the settings come from the cache, the token from .env on first use only
+    reads = []
+    read_dotenv = config._read_dotenv
+    monkeypatch.setattr(config, "_read_dotenv", lambda path: reads.append(path) or read_dotenv(path))
+    settings = config.get(refresh=True)
+    assert settings.coverage == "fr-idf" and reads == []
+    assert settings.api_token == "from-env-file"
+    assert settings.api_token == "from-env-file"
+    assert reads == [str(project / ".env")]
+
+
+def test_load_token_and_invalid_values(project, monkeypatch, capsys):
+    write_settings(project, "navitia_api_token: abc\nnavitia_pool_maxsize: lots\n", 1000)
+    config.load_token()
+    assert os.environ["NAVITIA_API_TOKEN"] == "abc"
+    assert config.get().pool_maxsize == 16
+    assert "Ignoring invalid NAVITIA_POOL_MAXSIZE" in capsys.readouterr().err
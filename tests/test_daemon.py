@@ -0,0 +1,110 @@
+"""Unit tests for forwarding script calls to the local SNCF server."""
+import sys
+import os
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cache
+import daemon
+import errors
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        type(self).hits.append(self.headers.get("Authorization"))
+        status = 404 if "missing" in self.path else 200
+        body = json.dumps({"departures": [{"n": 1}]} if status == 200
+                          else {"error": {"message": "unknown object"}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def running_server(monkeypatch):
+    """A daemon (subprocess, token 'server-token') in a temporary directory, talking to a local stand-in API."""
+    pytest.importorskip("requests")
+    # Short path: UNIX socket paths are limited to ~107 bytes, which pytest's tmp_path can exceed
+    tmp_path = tempfile.mkdtemp(prefix="sncf-")
+    _CountingHandler.hits = []
+    api = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "_conn", None)
+    monkeypatch.setattr(cache, "enabled", True)
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import client, daemon;"
+        "client.BASE_URL = sys.argv[2]; daemon.serve()"
+    )
+    env = dict(os.environ, NAVITIA_API_TOKEN="server-token")
+    proc = subprocess.Popen([sys.executable, "-c", code, os.path.abspath(SCRIPTS),
+                             f"http://127.0.0.1:{api.server_address[1]}"], cwd=tmp_path, env=env)
+    for _ in range(100):
+        if daemon._call({"op": "ping"}, timeout=1):
+            break
+        time.sleep(0.05)
+    yield
+    proc.terminate()
+    proc.wait(timeout=10)
+    api.shutdown()
+    api.server_close()
+    shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def test_not_running_means_local():
+    assert daemon.forward_search("Lyon") is daemon.UNAVAILABLE
+
+
+def test_get_is_forwarded_and_cached_in_server(running_server):
+    for _ in range(2):
+        data, _ = daemon.forward_get("/stop_areas/X/departures", "server-token", {"count": 1})
+        assert data == {"departures": [{"n": 1}]}
+    assert _CountingHandler.hits == ["server-token"]
+
+
+def test_other_token_is_declined(running_server):
+    assert daemon.forward_get("/stop_areas/X/departures", "other", {"count": 1}) is daemon.UNAVAILABLE
+    assert _CountingHandler.hits == []
+
+
+def test_other_coverage_is_declined(running_server):
+    assert daemon.forward_get("/stop_areas/X/departures", "server-token", {"count": 1}, 10, True,
+                              "https://api.navitia.io/v1/coverage/sncf") is daemon.UNAVAILABLE
+    assert _CountingHandler.hits == []
+
+
+def test_decoder_is_applied_in_server(running_server):
+    data, _ = daemon.forward_get("/journeys", "server-token", {"from": "a", "to": "b"}, decode="decode_journeys")
+    # Projected server-side: only the journeys and paging links (none here) cross the socket
+    assert data == {"journeys": [], "links": []}
+    assert daemon.forward_get("/journeys", "server-token", {"from": "a", "to": "b"},
+                              decode="<lambda>") is daemon.UNAVAILABLE
+    assert len(_CountingHandler.hits) == 1
+
+
+def test_errors_are_rebuilt(running_server):
+    with pytest.raises(errors.NotFoundError) as exc:
+        daemon.forward_get("/stop_areas/missing/departures", "server-token", {"count": 1})
+    assert exc.value.message == "unknown object"
+
+
+def test_search_uses_server_index(running_server):
+    stations = daemon.forward_search("Paris Gare de Lyon", 1)
+    assert stations[0]["id"] == "stop_area:SNCF:87686006"
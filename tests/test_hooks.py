@@ -0,0 +1,112 @@
+"""Behaviour and latency budget of the PreToolUse hook (pretooluse.sh and its single-check entry points)."""
+import sys
+import os
+HOOKS = os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'hooks')
+
+import json
+import subprocess
+import time
+
+import pytest
+
+# Median wall time of one hook run, in milliseconds (two python3 startups took ~110 ms)
+HOOK_BUDGET_MS = 20
+
+TOKEN_WARNING = "NAVITIA_API_TOKEN not found"
+SECURITY_WARNING = "Possible hardcoded API token"
+UUID = "12345678-1234-1234-1234-123456789abc"
+
+
+def payload(command, key="input"):
+    return json.dumps({"tool_name": "Bash", key: {"command": command, "description": "sncf"}})
+
+
+@pytest.fixture
+def run_hook(tmp_path):
+    """Run a hook script in tmp_path without a token in the environment; returns stderr."""
+    env = {k: v for k, v in os.environ.items() if k != "NAVITIA_API_TOKEN"}
+
+    def run(command, script="pretooluse.sh", key="input", **extra_env):
+        result = subprocess.run([os.path.join(HOOKS, script)], input=payload(command, key), cwd=tmp_path,
+                                env=dict(env, **extra_env), capture_output=True, text=True, timeout=10)
+        assert result.returncode == 0
+        return result.stderr
+
+    return run
+
+
+def test_unrelated_commands_are_silent(run_hook):
+    # "sncf" in another field does not count: only the command is checked
+    assert run_hook(f"ls -la && echo {UUID}") == ""
+
+
+def test_token_and_security_checks_in_one_pass(run_hook):
+    err = run_hook(f"python3 get_departures.py --token {UUID}")
+    assert TOKEN_WARNING in err and SECURITY_WARNING in err
+    err = run_hook(f"python3 get_departures.py --token {UUID}", NAVITIA_API_TOKEN="x")
+    assert TOKEN_WARNING not in err and SECURITY_WARNING in err
+    assert run_hook("python3 PLAN_JOURNEY.py a b", key="tool_input", NAVITIA_API_TOKEN="x") == ""
+
+
+def test_single_check_entry_points(run_hook):
+    command = f"python3 get_departures.py --token {UUID}"
+    assert run_hook(command, "check-token.sh").count("SNCF Plugin") == 1
+    assert SECURITY_WARNING in run_hook(command, "validate-bash-security.sh")
+    assert TOKEN_WARNING not in run_hook(command, "validate-bash-security.sh")
+
+
+def test_token_location_comes_from_the_config_cache(run_hook, tmp_path):
+    (tmp_path / ".claude").mkdir()
+    settings = tmp_path / ".claude" / "sncf-train-schedule.local.md"
+    cache = tmp_path / ".claude" / "sncf-train-schedule.local.config-cache"
+    settings.write_text("other: 1\n")
+    os.utime(settings, (time.time() - 10, time.time() - 10))
+    # Written by config.py: trusted while no candidate file is newer
+    cache.write_text(json.dumps({"mtimes": [], "location": str(settings), "values": {}}) + "\n")
+    assert run_hook("python3 get_arrivals.py x") == ""
+
+    os.utime(settings, (time.time() + 5, time.time() + 5))
+    assert TOKEN_WARNING in run_hook("python3 get_arrivals.py x")
+
+    (tmp_path / ".env").write_text('export NAVITIA_API_TOKEN="zz"\n')
+    assert run_hook("python3 get_arrivals.py x") == ""
+
+
+def test_plugin_directory_env_is_a_candidate(tmp_path):
+    plugin = tmp_path / "plugin"
+    (plugin / "hooks").mkdir(parents=True)
+    hook = plugin / "hooks" / "pretooluse.sh"
+    hook.write_text(open(os.path.join(HOOKS, "pretooluse.sh")).read())
+    hook.chmod(0o755)
+    env = {k: v for k, v in os.environ.items() if k != "NAVITIA_API_TOKEN"}
+
+    def run():
+        return subprocess.run([str(hook)], input=payload("python3 get_arrivals.py x"), cwd=tmp_path,
+                              env=env, capture_output=True, text=True, timeout=10).stderr
+
+    assert TOKEN_WARNING in run() and "plugin directory" in run()
+    (plugin / ".env").write_text("NAVITIA_API_TOKEN=zz\n")
+    assert run() == ""
+
+
+def test_no_interpreter_is_started(run_hook, tmp_path):
+    # python3, grep and sed on PATH leave a marker if the hook runs them
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for tool in ("python3", "grep", "sed"):
+        (bin_dir / tool).write_text(f"#!/bin/sh\ntouch {tmp_path}/ran-{tool}\n")
+        (bin_dir / tool).chmod(0o755)
+    path = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    run_hook("ls", PATH=path)
+    run_hook(f"python3 get_departures.py {UUID}", PATH=path)
+    assert not list(tmp_path.glob("ran-*"))
+
+
+@pytest.mark.parametrize("command", ["ls -la", "python3 get_departures.py stop_area:SNCF:87686006"])
+def test_hook_within_budget(run_hook, command):
+    timings = []
+    for _ in range(15):
+        start = time.perf_counter()
+        run_hook(command, NAVITIA_API_TOKEN="x")
+        timings.append(time.perf_counter() - start)
+    assert sorted(timings)[len(timings) // 2] * 1000 < HOOK_BUDGET_MS
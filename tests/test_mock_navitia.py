@@ -0,0 +1,93 @@
+"""Sanity checks for the recorded Navitia fixtures and the mock API server."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import time
+
+import pytest
+
+import get_arrivals
+import get_departures
+import navitia
+import plan_journey
+import search_stations
+from mock_navitia import MockNavitia, fixture_bytes, load_fixture
+
+RECORDED = os.path.join(os.path.dirname(__file__), "fixtures", "navitia")
+
+
+def test_recorded_fixtures_are_the_synthetic_responses():
+    # Regenerate with: python sncf-train-schedule/skills/plan-journey/scripts/mock_responses.py tests/fixtures/navitia
+    for name in ("departures", "arrivals", "journeys", "journeys_large", "places", "stop_area"):
+        assert fixture_bytes(name) == fixture_bytes(name, RECORDED), name
+
+
+def test_fixtures_render_in_every_script():
+    departures = navitia.parse_departures(load_fixture("departures"))
+    arrivals = navitia.parse_arrivals(load_fixture("arrivals"))
+    journeys = navitia.parse_journeys(load_fixture("journeys_large"))
+    places = navitia.parse_places(load_fixture("places"))
+
+    assert len(departures) == 40 and len(arrivals) == 40 and len(journeys) == 10
+    assert "❌ SUPPRIMÉ" in get_departures.format_output(departures)
+    assert "min)" in get_arrivals.format_output(arrivals)
+    assert "Transfer (walking, 5min)" in plan_journey.format_output(journeys)
+    assert places[0]["id"].startswith("stop_area:SNCF:")
+    assert search_stations.format_output(places)
+
+
+@pytest.fixture
+def offline_client(tmp_path, monkeypatch):
+    pytest.importorskip("requests")
+    import cache
+    import client
+    import ratelimit
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "enabled", False)
+    monkeypatch.setattr(ratelimit, "enabled", False)
+    return client
+
+
+def test_mock_serves_fixtures_with_latency(offline_client, monkeypatch):
+    with MockNavitia(latency=0.1) as api:
+        monkeypatch.setattr(offline_client, "BASE_URL", api.url)
+        start = time.perf_counter()
+        journeys = navitia.plan_journey("a", "b", "token", count=10)
+        assert time.perf_counter() - start >= 0.1
+    assert len(journeys) == 10
+
+
+def test_injected_429_is_retried(offline_client, monkeypatch):
+    with MockNavitia(rate_limit_every=1, retry_after=0) as api:
+        monkeypatch.setattr(offline_client, "BASE_URL", api.url)
+        api.rate_limit_every = 2
+        # Hits 1 (ok), 2 (429), 3 (ok)
+        navitia.get_stop_area("stop_area:SNCF:87686006", "token")
+        assert navitia.get_departures("stop_area:SNCF:87686006", "token")
+        assert api.hits == 3
+
+
+def test_scripts_reach_mock_through_settings(offline_client, monkeypatch):
+    import config
+    with MockNavitia() as api:
+        monkeypatch.setenv("NAVITIA_API_URL", api.api_url)
+        monkeypatch.setenv("NAVITIA_COVERAGE", "fr-idf")
+        monkeypatch.setattr(config, "_config", None)
+        assert offline_client.base_url() == api.api_url + "/coverage/fr-idf"
+        assert len(navitia.get_departures("stop_area:SNCF:87686006", "token")) == 40
+        assert api.hits == 1
+
+
+def test_injected_error_rates(offline_client, monkeypatch):
+    import errors
+    import ratelimit
+    monkeypatch.setattr(ratelimit, "MAX_RETRIES", 0)
+    with MockNavitia(error_rate=1.0, seed=1) as api:
+        monkeypatch.setattr(offline_client, "BASE_URL", api.url)
+        with pytest.raises(errors.HTTPStatusError) as exc:
+            navitia.get_stop_area("stop_area:SNCF:87686006", "token")
+        assert exc.value.status == 503
+    with MockNavitia(rate_limit_rate=0.5, error_rate=0.25, seed=1) as api:
+        statuses = [api._respond("/v1/coverage/sncf/places?q=x")[0] for _ in range(400)]
+    assert 150 < statuses.count(429) < 250 and 50 < statuses.count(503) < 150
@@ -0,0 +1,77 @@
+"""Unit tests for the departure, arrival and journey records."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+from datetime import datetime
+
+import pytest
+
+import models
+from mock_navitia import load_fixture
+
+
+def stop(departure, base=None, info=()):
+    return {
+        "departure_date_time": departure,
+        "arrival_date_time": departure,
+        "base_departure_date_time": base or departure,
+        "base_arrival_date_time": base or departure,
+        "additional_informations": list(info),
+    }
+
+
+@pytest.mark.parametrize("record", [
+    models.StopDateTime.from_json(stop("20260210T140000")),
+    models.Departure.from_json({"stop_date_time": stop("20260210T140000")}),
+    models.Arrival.from_json({}),
+    models.Section("waiting"),
+    models.Journey(),
+])
+def test_records_have_no_instance_dict(record):
+    assert not hasattr(record, "__dict__")
+
+
+def test_stop_date_time_delay_and_cancellation():
+    late = models.StopDateTime.from_json(stop("20260210T141200", base="20260210T140000"))
+    assert late.departure == datetime(2026, 2, 10, 14, 12)
+    assert late.departure_delay == late.arrival_delay == 12
+    assert late.disruption("departure") == "+12min"
+
+    early = models.StopDateTime.from_json(stop("20260210T135800", base="20260210T140000"))
+    assert early.disruption("arrival") == "-2min"
+
+    cancelled = models.StopDateTime.from_json(stop("20260210T140000", info=["no_departing"]))
+    assert cancelled.disruption("departure") == models.CANCELLED
+
+    assert models.StopDateTime.from_json(stop("20260210T140000")).disruption("departure") == ""
+
+
+def test_malformed_timestamps_fall_back_to_text():
+    sdt = models.StopDateTime.from_json(stop("garbage", base="20260210T140000"))
+    assert sdt.departure is None and sdt.departure_delay == 0
+    assert models.clock(sdt.departure, sdt.departure_text) == "garbage"
+    assert models.format_datetime("20260210T140500") == "14:05"
+
+
+def test_board_rows_from_fixture():
+    rows = [models.Departure.from_json(d) for d in load_fixture("departures")["departures"]]
+    assert len(rows) == 40
+    assert all(row.stop_date_time.departure for row in rows)
+    assert any(row.stop_date_time.cancelled for row in rows)
+
+
+def test_journey_from_fixture():
+    raw = load_fixture("journeys_large")["journeys"][0]
+    journey = models.Journey.from_json(raw)
+    assert journey.departure_text == raw["departure_date_time"]
+    assert journey.duration == raw["duration"]
+    assert len(journey.sections) == len(raw["sections"])
+    legs = [s for s in journey.sections if s.type == "public_transport"]
+    assert legs and all(leg.departure and leg.arrival for leg in legs)
+
+
+def test_journey_status_label():
+    assert models.Journey(status="NO_SERVICE").status_label == models.CANCELLED
+    assert models.Journey(status="SIGNIFICANT_DELAYS").status_label == "⚠️"
+    assert models.format_journey_status({}) == ""
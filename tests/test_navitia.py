@@ -0,0 +1,233 @@
+"""Unit tests for the Navitia API layer (request builders, parsers, typed errors)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import asyncio
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import errors
+import navitia
+
+
+def test_departures_request_params():
+    request = navitia.departures_request("stop_area:SNCF:87686006", 5, "20260210T140000")
+    assert request.path == "/stop_areas/stop_area:SNCF:87686006/departures"
+    assert request.params == {"count": 5, "data_freshness": "realtime", "from_datetime": "20260210T140000"}
+
+
+def test_journeys_request_datetime_is_optional():
+    request = navitia.journeys_request("a", "b")
+    assert "datetime" not in request.params
+    assert request.timeout == 15
+
+
+def test_journeys_request_asks_for_less_data():
+    params = navitia.journeys_request("a", "b").params
+    assert params["disable_geojson"] == "true"
+    assert params["depth"] == navitia.JOURNEY_DEPTH
+
+
+def _large_journeys_raw():
+    path = os.path.join(os.path.dirname(__file__), "fixtures", "navitia", "journeys_large.json")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_project_journey_keeps_formatter_fields_only():
+    raw = json.loads(_large_journeys_raw())["journeys"][1]
+    journey = navitia.project_journey(raw)
+    section = next(s for s in journey["sections"] if s["type"] == "public_transport")
+    assert set(journey) <= set(navitia.JOURNEY_FIELDS) | {"sections"}
+    assert "geojson" not in section and "links" not in section
+    assert section["from"]["name"] and section["display_informations"]["code"]
+    assert set(section["stop_date_times"][0]["stop_point"]) == {"id", "name"}
+    assert navitia.project_journey(journey) == journey
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_decode_journeys_matches_parse(streaming, monkeypatch):
+    if streaming:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setitem(sys.modules, "ijson", None)
+    raw = _large_journeys_raw()
+    data = json.loads(raw)
+    links = [{"type": link["type"], "href": link["href"]} for link in data["links"]
+             if link["type"] in navitia.PAGE_LINKS]
+    assert len(links) == 2
+    decoded = navitia.decode_journeys(io.BytesIO(raw))
+    assert decoded == {"journeys": navitia.parse_journeys(data), "links": links}
+
+    # The paging links are found after the journeys too
+    reordered = json.dumps({"journeys": data["journeys"], "links": data["links"]}, indent=1).encode()
+    assert navitia.decode_journeys(io.BytesIO(reordered))["links"] == links
+
+    if streaming:
+        # A brace in an href cuts the link short: it is skipped, not raised after the journeys streamed
+        body = b'{"links":[{"type":"next","href":"/journeys?x=}"}],"journeys":[]}'
+        assert navitia.decode_journeys(io.BytesIO(body)) == {"journeys": [], "links": []}
+
+
+def test_parse_places_builds_station_dicts():
+    data = {"places": [{"id": "stop_area:SNCF:87722025", "name": "Lyon Part Dieu", "quality": 90,
+                        "stop_area": {"coord": {"lon": "4.859488", "lat": "45.760403"}}}]}
+    assert navitia.parse_places(data) == [{"id": "stop_area:SNCF:87722025", "name": "Lyon Part Dieu",
+                                           "quality": 90, "coordinates": "4.859488;45.760403"}]
+
+
+def test_parse_stop_area_missing():
+    assert navitia.parse_stop_area({"stop_areas": []}) is None
+
+
+def test_for_status_types_and_message():
+    assert isinstance(errors.for_status(401), errors.AuthenticationError)
+    assert isinstance(errors.for_status(404), errors.NotFoundError)
+    assert isinstance(errors.for_status(429), errors.RateLimitError)
+    error = errors.for_status(400, {"error": {"message": "Invalid datetime"}})
+    assert isinstance(error, errors.BadRequestError)
+    assert error.message == "Invalid datetime"
+    assert errors.for_status(503).status == 503
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if "missing" in self.path:
+            status, body = 404, {"error": {"message": "unknown object"}}
+        else:
+            status, body = 200, {"departures": [{"display_informations": {"code": "TER"}}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v1/coverage/sncf"
+    httpd.shutdown()
+
+
+def test_async_departures_and_typed_errors(server):
+    pytest.importorskip("httpx")
+    from navitia_async import AsyncNavitia
+
+    async def scenario():
+        async with AsyncNavitia("token", base_url=server) as api:
+            boards = await asyncio.gather(*(api.get_departures(f"stop_area:SNCF:{i}") for i in range(5)))
+            with pytest.raises(errors.NotFoundError) as excinfo:
+                await api.get_departures("missing")
+            return boards, excinfo.value
+
+    boards, error = asyncio.run(scenario())
+    assert [b[0]["display_informations"]["code"] for b in boards] == ["TER"] * 5
+    assert error.message == "unknown object"
+
+
+def _timetable(times):
+    """Departures board items, one per (time, trip) in order."""
+    return [{"display_informations": {"code": "TER", "headsign": str(trip)},
+             "links": [{"type": "vehicle_journey", "id": f"vj:{trip}"}],
+             "stop_date_time": {"departure_date_time": t}}
+            for trip, t in enumerate(times)]
+
+
+@pytest.fixture
+def paged_board(monkeypatch):
+    """Serve a fake timetable through navitia.get_departures; returns (items, calls)."""
+    # Two trains at 17:00, 17:10, ...; 17:50 has 12 trains (more than a page)
+    times = sorted([f"20260210T17{m}000" for m in range(6) for _ in range(2)]
+                   + ["20260210T175000"] * 10 + [f"20260210T18{m}000" for m in range(6)])
+    items = _timetable(times)
+    calls = []
+
+    def get_departures(station_id, api_token, count=10, from_datetime=None, data_freshness="realtime"):
+        calls.append(from_datetime)
+        start = from_datetime or times[0]
+        return [item for item in items
+                if item["stop_date_time"]["departure_date_time"] >= start][:count]
+
+    monkeypatch.setattr(navitia, "get_departures", get_departures)
+    return items, calls
+
+
+def test_window_pages_without_gaps_or_duplicates(paged_board):
+    items, calls = paged_board
+    window = list(navitia.iter_departures("sa", "token", "20260210T183000", page_size=5))
+    expected = [i for i in items if i["stop_date_time"]["departure_date_time"] <= "20260210T183000"]
+    assert window == expected
+    assert len(calls) > 3 and calls[0] is None
+
+
+def test_window_prefetches_and_stops_at_until(paged_board):
+    items, calls = paged_board
+    window = navitia.iter_departures("sa", "token", "20260210T172000", page_size=4)
+    next(window)
+    # The second page is already being fetched while the first is consumed
+    for _ in range(100):
+        if len(calls) == 2:
+            break
+        time.sleep(0.01)
+    assert calls == [None, "20260210T171000"]
+    assert len(list(window)) == 5
+    # No page is requested past the window end
+    assert all(c is None or c <= "20260210T172000" for c in calls)
+
+
+def _journey(departure, arrival, transfers, code="TER"):
+    return {"departure_date_time": f"20260210T{departure}00", "arrival_date_time": f"20260210T{arrival}00",
+            "nb_transfers": transfers,
+            "sections": [{"type": "public_transport", "departure_date_time": f"20260210T{departure}00",
+                          "display_informations": {"code": code, "headsign": departure}}]}
+
+
+def test_pareto_front_drops_dominated_and_repeated_journeys():
+    fast, direct, slow, later = (_journey("0700", "0900", 1), _journey("0700", "1000", 0),
+                                 _journey("0650", "1000", 1), _journey("0800", "0900", 1))
+    assert navitia.pareto_front([later, direct, slow, fast, dict(direct)]) == [direct, later]
+
+
+def test_journey_range_walks_slices_and_keeps_front(monkeypatch):
+    # A direct train every 30 min (2h) and a faster one with a change every hour at :10
+    timetable = sorted([_journey(f"{h:02}{m:02}", f"{h + 2:02}{m:02}", 0) for h in range(5, 14) for m in (0, 30)]
+                       + [_journey(f"{h:02}10", f"{h + 1:02}40", 1, "TGV") for h in range(5, 14)],
+                       key=lambda j: j["departure_date_time"])
+    requests = []
+
+    def get(request, api_token, decode=None):
+        requests.append(request.params)
+        later = [j for j in timetable if j["departure_date_time"] >= request.params["datetime"]]
+        return {"journeys": later[:request.params["min_nb_journeys"]]}
+
+    monkeypatch.setattr(navitia, "_get", get)
+    journeys = navitia.plan_journey_range("a", "b", "token", "20260210T060000", "20260210T090000", page_size=3)
+    assert [(j["departure_date_time"][9:13], j["nb_transfers"]) for j in journeys] == [
+        ("0600", 0), ("0610", 1), ("0630", 0), ("0700", 0), ("0710", 1), ("0730", 0),
+        ("0800", 0), ("0810", 1), ("0830", 0), ("0900", 0)]
+    assert all("count" not in params and params["min_nb_journeys"] == 3 for params in requests)
+    assert {params["datetime"] for params in requests} >= {"20260210T060000", "20260210T070000", "20260210T080000"}
+
+
+@pytest.mark.parametrize("option", ["--datetime", "--until"])
+def test_plan_journey_rejects_invalid_window(option, monkeypatch, capsys):
+    import plan_journey
+    argv = {"--datetime": "20260210T060000", "--until": "20260210T120000", option: "bogus"}
+    monkeypatch.setattr(sys, "argv", ["plan_journey.py", "a", "b", *(x for item in argv.items() for x in item)])
+    with pytest.raises(SystemExit) as exit_info:
+        plan_journey.main()
+    assert exit_info.value.code == 0
+    assert f"Invalid {option} datetime: 'bogus'" in capsys.readouterr().err
@@ -0,0 +1,129 @@
+"""Unit tests for journey paging state (plan_journey.py --later / --earlier)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import io
+import json
+
+import pytest
+
+import navitia
+import paging
+from mock_navitia import fixture_bytes
+
+KEY = paging.search_key("stop_area:SNCF:87686006", "stop_area:SNCF:87751008")
+
+
+def journey(departure, arrival, *trips):
+    return {"departure_date_time": f"20260210T{departure}00", "arrival_date_time": f"20260210T{arrival}00",
+            "sections": [{"type": "public_transport", "vehicle_journey": f"vehicle_journey:{trip}"}
+                         for trip in trips]}
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def test_page_links_and_trains_from_navitia_response():
+    data = navitia.decode_journeys(io.BytesIO(fixture_bytes("journeys")))
+    assert navitia.parse_page_links(data) == {"next": ("20260210T150100", "departure"),
+                                              "prev": ("20260210T152800", "arrival")}
+    first = data["journeys"][0]
+    assert navitia.journey_trips(first) == ("vehicle_journey:SNCF:1",)
+    assert navitia.project_journey(first) == first
+
+
+def test_later_returns_only_new_trains(state):
+    paging.record(KEY, [journey("0800", "0900", "A"), journey("0830", "0930", "B")],
+                  {"next": ("20260210T080100", "departure")})
+    calls = []
+
+    def fetch(datetime_param, represents):
+        calls.append((datetime_param, represents))
+        return [journey("0830", "0930", "B"), journey("0900", "1000", "C")], {"next": ("20260210T083100", "departure")}
+
+    fresh, pages = paging.page(fetch, paging.get_search(KEY), "next")
+    assert [j["sections"][0]["vehicle_journey"] for j in fresh] == ["vehicle_journey:C"]
+    assert calls == [("20260210T080100", "departure")]
+
+    paging.record(KEY, fresh, pages, "next")
+    entry = paging.get_search(KEY)
+    assert entry["next"] == ["20260210T083100", "departure"]
+    assert len(entry["seen"]) == 3
+    # The earlier cursor of the first page is kept (derived from its earliest arrival)
+    assert entry["prev"] == ["20260210T085900", "arrival"]
+
+
+def test_pages_repeating_shown_journeys_are_skipped(state):
+    paging.record(KEY, [journey("0800", "0900", "A")], {})
+    pages = {"20260210T080100": ([journey("0800", "0900", "A")], {"next": ("20260210T090100", "departure")}),
+             "20260210T090100": ([journey("0800", "0900", "A"), journey("1000", "1100", "D")], {})}
+    fresh, _ = paging.page(lambda dt, represents: pages[dt], paging.get_search(KEY), "next")
+    assert [j["departure_date_time"] for j in fresh] == ["20260210T100000"]
+
+    # Nothing new after MAX_PAGES pages: give up with an empty result
+    calls = []
+
+    def same(datetime_param, represents):
+        calls.append(datetime_param)
+        return [journey("0800", "0900", "A")], {"next": (f"20260210T0{len(calls)}0000", "departure")}
+
+    assert paging.page(same, paging.get_search(KEY), "next")[0] == []
+    assert len(calls) == paging.MAX_PAGES
+
+
+def test_state_expires_and_stays_small(state, monkeypatch):
+    for i in range(paging.MAX_SEARCHES + 5):
+        paging.record(f"a|{i}|realtime", [journey("0800", "0900", i)], {})
+    with open(paging.state_path()) as f:
+        saved = json.load(f)
+    assert len(saved) == paging.MAX_SEARCHES and "a|0|realtime" not in saved
+
+    monkeypatch.setattr(paging, "STATE_TTL", -1)
+    assert paging.get_search(f"a|{paging.MAX_SEARCHES}|realtime") is None
+
+
+def test_cli_later_prints_new_journeys_only(state, monkeypatch, capsys):
+    pytest.importorskip("requests")
+    import client
+    import plan_journey
+    import ratelimit
+    from mock_navitia import MockNavitia
+
+    monkeypatch.setattr(ratelimit, "enabled", False)
+    monkeypatch.setenv("NAVITIA_API_TOKEN", "token")
+    base = ["plan_journey.py", "stop_area:SNCF:87686006", "stop_area:SNCF:87751008", "--count", "3",
+            "--no-cache", "--format", "json"]
+
+    def run(*extra):
+        monkeypatch.setattr(sys, "argv", base + list(extra))
+        try:
+            plan_journey.main()
+        except SystemExit:
+            pass
+        return capsys.readouterr()
+
+    with MockNavitia() as api:
+        monkeypatch.setattr(client, "BASE_URL", api.url)
+        assert len(json.loads(run().out)) == 3
+        # The stand-in answers every page with the same journeys and next link: one call, nothing new
+        result = run("--later")
+        assert result.out == "" and "No later journeys" in result.err
+        assert api.hits == 2
+    assert paging.get_search(KEY)["next"] == ["20260210T150100", "departure"]
+    assert "No recent search" in run("--earlier", "--data-freshness", "base_schedule").err
+
+
+def test_cli_records_only_searches_with_links(state, monkeypatch, capsys):
+    pytest.importorskip("requests")
+    import plan_journey
+
+    monkeypatch.setattr(navitia, "plan_journey_page", lambda *args: ([journey("0800", "0900", "A")], {}))
+    monkeypatch.setenv("NAVITIA_API_TOKEN", "token")
+    monkeypatch.setattr(sys, "argv", ["plan_journey.py", "stop_area:SNCF:87686006", "stop_area:SNCF:87751008",
+                                      "--engine", "navitia", "--format", "json"])
+    plan_journey.main()
+    assert len(json.loads(capsys.readouterr().out)) == 1
+    assert not os.path.exists(paging.state_path())
@@ -0,0 +1,125 @@
+"""Unit tests for the offline journey planner (connection scan over the GTFS timetable)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import pytest
+
+import plan_journey
+import planner
+import timetable
+
+
+def area(n):
+    return f"stop_area:SNCF:8700000{n}"
+
+
+STATIONS = "ABCDEG"
+
+FEED = {
+    "stops.txt": "stop_id,stop_name,location_type,parent_station\n" + "".join(
+        f"StopArea:OCE8700000{i},{name},1,\nStopPoint:OCETrain-8700000{i},{name},0,StopArea:OCE8700000{i}\n"
+        for i, name in enumerate(STATIONS, 1)),
+    "routes.txt": "route_id,route_short_name,route_type\nR,TER,2\n",
+    "calendar.txt": ("service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date\n"
+                     "ALL,1,1,1,1,1,1,1,20260201,20260228\n"),
+    "trips.txt": "route_id,service_id,trip_id,trip_short_name\n" + "".join(
+        f"R,ALL,T{n},{n}\n" for n in range(1, 7)),
+    # T1 A→B→C; T2 B→E leaves 10 min after T1 reaches B, T3 only 2 min after;
+    # T4 leaves D, a 5 min walk from C; T5 is a slow direct A→E; T6 runs past midnight
+    "stop_times.txt": "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n" + "".join(
+        f"T{trip},{time},{time},StopPoint:OCETrain-8700000{STATIONS.index(stop) + 1},{seq}\n"
+        for trip, calls in {
+            1: [("A", "08:00:00"), ("B", "09:00:00"), ("C", "10:00:00")],
+            2: [("B", "09:10:00"), ("E", "10:00:00")],
+            3: [("B", "09:02:00"), ("E", "09:40:00")],
+            4: [("D", "10:10:00"), ("G", "11:00:00")],
+            5: [("A", "07:00:00"), ("E", "12:00:00")],
+            6: [("A", "23:50:00"), ("B", "24:30:00")],
+        }.items()
+        for seq, (stop, time) in enumerate(calls, 1)),
+    "transfers.txt": ("from_stop_id,to_stop_id,transfer_type,min_transfer_time\n"
+                      "StopArea:OCE87000003,StopArea:OCE87000004,2,300\n"),
+}
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "gtfs").mkdir()
+    for name, content in FEED.items():
+        (tmp_path / "gtfs" / name).write_text(content)
+    timetable.build(str(tmp_path / "gtfs"))
+    yield
+    timetable.close()
+
+
+def summary(journey):
+    return [(s["type"], s.get("from", {}).get("name"), s.get("to", {}).get("name"),
+             s["departure_date_time"][9:13], s["arrival_date_time"][9:13])
+            for s in journey["sections"]]
+
+
+def test_change_respects_minimum_change_time(built):
+    journey, = planner.plan(area(1), area(5), "20260210T073000", count=1)
+    assert summary(journey) == [
+        ("public_transport", "A", "B", "0800", "0900"),
+        ("waiting", None, None, "0900", "0910"),
+        ("public_transport", "B", "E", "0910", "1000"),
+    ]
+    assert journey["nb_transfers"] == 1 and journey["duration"] == 2 * 3600
+    assert journey["type"] == "best"
+
+
+def test_footpath_between_stations(built):
+    journey, = planner.plan(area(1), area(6), "20260210T070000", count=1)
+    assert summary(journey) == [
+        ("public_transport", "A", "C", "0800", "1000"),
+        ("transfer", "C", "D", "1000", "1005"),
+        ("waiting", None, None, "1005", "1010"),
+        ("public_transport", "D", "G", "1010", "1100"),
+    ]
+
+
+def test_next_options_and_past_midnight(built):
+    # Each option departs after the previous one; the 23:50 arrives after midnight, and
+    # options stop once they depart the next day
+    journeys = planner.plan(area(1), area(2), "20260210T073000", count=5)
+    assert [(j["departure_date_time"], j["arrival_date_time"]) for j in journeys] == [
+        ("20260210T080000", "20260210T090000"), ("20260210T235000", "20260211T003000"),
+        ("20260211T080000", "20260211T090000")]
+    # Just after midnight, the next train is the next day's 08:00
+    journey, = planner.plan(area(1), area(2), "20260211T000000", count=1)
+    assert journey["departure_date_time"] == "20260211T080000"
+
+
+def test_cannot_answer(built):
+    assert planner.plan(area(1), "stop_area:SNCF:00000000", "20260210T070000") is None
+    assert planner.plan(area(1), area(5), "20270210T070000") is None
+
+
+def test_engine_choice_and_output(built):
+    assert plan_journey.choose_engine("auto", area(1), area(5), "departure", "base_schedule") == "local"
+    assert plan_journey.choose_engine("auto", area(1), area(5), "departure", "realtime") == "navitia"
+    assert plan_journey.choose_engine("auto", "2.35;48.85", area(5), "departure", "base_schedule") == "navitia"
+    output = plan_journey.format_output(planner.plan(area(1), area(6), "20260210T070000", count=1))
+    assert "Journey 1: 08:00 → 11:00 (3h 0min)" in output
+    assert "Transfer (walking, 5min)" in output
+
+
+def test_range_keeps_pareto_optimal_journeys(built):
+    # The slow direct T5 leaves first with no change; T1 + T2 arrives earlier with one
+    journeys = planner.plan_range(area(1), area(5), "20260210T060000", "20260210T120000")
+    assert [(j["departure_date_time"][9:13], j["arrival_date_time"][9:13], j["nb_transfers"])
+            for j in journeys] == [("0700", "1200", 0), ("0800", "1000", 1)]
+    assert summary(journeys[1]) == summary(planner.plan(area(1), area(5), "20260210T073000", count=1)[0])
+
+
+def test_range_window_and_footpaths(built):
+    # Leaving after 07:30 the direct train is gone
+    journeys = planner.plan_range(area(1), area(5), "20260210T073000", "20260210T120000")
+    assert [j["nb_transfers"] for j in journeys] == [1]
+    journey, = planner.plan_range(area(1), area(6), "20260210T060000", "20260210T120000")
+    assert summary(journey) == summary(planner.plan(area(1), area(6), "20260210T070000", count=1)[0])
+    assert planner.plan_range(area(1), area(5), "20260210T090000", "20260210T120000") == []
+    assert planner.plan_range(area(1), area(5), "20260210T090000", "20260211T010000") is None
@@ -0,0 +1,128 @@
+"""Unit tests for the shared token bucket and 429/5xx retry policy."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import json
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cache
+import client
+import errors
+import ratelimit
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = ratelimit.TokenBucket(rate=2, burst=3, updated=0.0)
+    assert [bucket.take(0.0) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take(0.0) == pytest.approx(0.5)
+    assert bucket.take(0.5) == 0
+
+
+def test_bucket_block_refuses_until_deadline():
+    bucket = ratelimit.TokenBucket(rate=10, burst=10, updated=0.0)
+    bucket.block(5.0)
+    assert bucket.take(1.0) == pytest.approx(4.0)
+    assert bucket.take(5.0) == 0
+
+
+def test_parse_retry_after():
+    assert ratelimit.parse_retry_after("3") == 3.0
+    assert ratelimit.parse_retry_after(None) is None
+    assert ratelimit.parse_retry_after("not a date") is None
+    assert ratelimit.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_backoff_is_jittered_and_capped():
+    for attempt in range(10):
+        assert 0 <= ratelimit.backoff_delay(attempt) <= ratelimit.BACKOFF_CAP
+    assert ratelimit.backoff_delay(0, retry_after=2.5) == 2.5
+
+
+def test_block_is_shared_through_state_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ratelimit.block_for(60)
+    with open(ratelimit.state_path()) as f:
+        state = json.load(f)
+    with ratelimit._shared_bucket() as bucket:
+        assert bucket.blocked_until == state["blocked_until"]
+        assert bucket.take(state["blocked_until"] - 10) == pytest.approx(10)
+
+
+def test_bucket_is_per_api_and_configurable(tmp_path, monkeypatch):
+    import config
+    monkeypatch.chdir(tmp_path)
+    real = ratelimit.state_path()
+    monkeypatch.setattr(client, "BASE_URL", "http://127.0.0.1:8080/v1/coverage/sncf")
+    assert ratelimit.state_path() != real
+    monkeypatch.setattr(client, "BASE_URL", "http://127.0.0.1:8080/v1/coverage/fr-idf")
+    mock = ratelimit.state_path()
+
+    # NAVITIA_RATE=0 turns pacing off: no state file, no wait
+    monkeypatch.setenv("NAVITIA_RATE", "0")
+    monkeypatch.setattr(config, "_config", None)
+    for _ in range(50):
+        ratelimit.acquire()
+    assert not os.path.exists(mock)
+
+    monkeypatch.setenv("NAVITIA_RATE", "2")
+    monkeypatch.setenv("NAVITIA_BURST", "3")
+    monkeypatch.setattr(config, "_config", None)
+    with ratelimit._shared_bucket() as bucket:
+        assert (bucket.rate, bucket.burst) == (2.0, 3)
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    responses = []
+
+    def do_GET(self):
+        status, headers = self.responses.pop(0)
+        payload = json.dumps({"places": []}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "enabled", False)
+    monkeypatch.setattr(ratelimit, "enabled", False)
+    sleeps = []
+    monkeypatch.setattr(client, "time", types.SimpleNamespace(sleep=sleeps.append))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(client, "BASE_URL", f"http://127.0.0.1:{httpd.server_address[1]}")
+    yield sleeps
+    httpd.shutdown()
+
+
+def test_client_retries_429_with_retry_after(flaky_api):
+    _FlakyHandler.responses = [(429, {"Retry-After": "2"}), (503, {}), (200, {})]
+    assert client.get_json("/places", "token") == {"places": []}
+    assert flaky_api[0] == 2.0
+    assert len(flaky_api) == 2
+
+
+def test_client_gives_up_on_long_retry_after(flaky_api):
+    _FlakyHandler.responses = [(429, {"Retry-After": "3600"})]
+    with pytest.raises(errors.RateLimitError) as excinfo:
+        client.get_json("/places", "token")
+    assert excinfo.value.retry_after == 3600
+    assert flaky_api == []
+
+
+def test_client_does_not_retry_client_errors(flaky_api):
+    _FlakyHandler.responses = [(404, {})]
+    with pytest.raises(errors.NotFoundError):
+        client.get_json("/places", "token")
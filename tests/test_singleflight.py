@@ -0,0 +1,120 @@
+"""Unit tests for single-flight coalescing of identical Navitia requests."""
+import sys
+import os
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import singleflight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"departures": []}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: singleflight.do("k", fetch), range(5)))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert singleflight._inflight == {}
+
+
+def test_error_reaches_every_caller_and_is_not_remembered():
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            singleflight.do("k", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert singleflight.do("k", lambda: "fresh") == "fresh"
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(0.5)
+        body = json.dumps({"departures": [{"n": 1}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_api():
+    pytest.importorskip("requests")
+    _SlowHandler.hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_processes_share_one_upstream_call(slow_api, tmp_path):
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import client;"
+        "client.BASE_URL = sys.argv[2];"
+        "print(client.get_json('/stop_areas/X/departures', 't', {'count': 1}))"
+    )
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code, os.path.abspath(SCRIPTS), slow_api],
+                         cwd=tmp_path, stdout=subprocess.PIPE, text=True)
+        for _ in range(3)
+    ]
+    outputs = [p.communicate(timeout=30)[0] for p in procs]
+    assert _SlowHandler.hits == 1
+    assert all("'n': 1" in out for out in outputs)
+
+
+def test_process_locks_are_per_key(tmp_path, monkeypatch):
+    pytest.importorskip("fcntl")
+    monkeypatch.chdir(tmp_path)
+    flights = tmp_path / ".claude" / "sncf-train-schedule.local.flights"
+    # Keys sharing a prefix do not wait on each other
+    with singleflight.process_lock("ab" + "0" * 62):
+        def other():
+            with singleflight.process_lock("ab" + "1" * 62):
+                pass
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(2)
+        assert not thread.is_alive()
+        assert [p.name for p in flights.iterdir()] == ["ab" + "0" * 62 + ".lock"]
+    assert list(flights.iterdir()) == []
@@ -0,0 +1,52 @@
+"""Startup-time budget for the CLI scripts (heavy imports stay off the --help path)."""
+import sys
+import os
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+import re
+import subprocess
+
+import pytest
+
+CLI_SCRIPTS = ["get_departures", "get_arrivals", "plan_journey", "search_stations",
+               "validate_station_id", "validate_datetime", "travel_matrix",
+               "nearest_stations"]
+
+# Only needed once a request actually goes out (or a token must be loaded)
+DEFERRED_MODULES = {"requests", "urllib3", "dotenv", "email.utils", "concurrent.futures", "subprocess",
+                    "sqlite3", "socket", "hashlib", "daemon", "timetable"}
+
+# Cumulative import time of a script module, in milliseconds (was ~110 ms with eager requests)
+IMPORT_BUDGET_MS = 75
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _importtime(args, cwd):
+    """Run python -X importtime and return {module: cumulative µs} for every import."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd,
+                            capture_output=True, text=True, timeout=30)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+@pytest.mark.parametrize("script", CLI_SCRIPTS)
+def test_help_skips_heavy_imports(script, tmp_path):
+    imported = _importtime([os.path.join(os.path.abspath(SCRIPTS), f"{script}.py"), "--help"], tmp_path)
+    assert not DEFERRED_MODULES & set(imported)
+
+
+@pytest.mark.parametrize("script", CLI_SCRIPTS)
+def test_import_within_budget(script, tmp_path):
+    # Best of three: the budget is about our imports, not a cold disk cache
+    best = min(
+        _importtime(["-c", f"import sys; sys.path.insert(0, {os.path.abspath(SCRIPTS)!r}); import {script}"],
+                    tmp_path)[script]
+        for _ in range(3)
+    )
+    assert best / 1000 < IMPORT_BUDGET_MS
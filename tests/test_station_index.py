@@ -0,0 +1,146 @@
+"""Unit tests for the offline station index."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import random
+
+import pytest
+
+from station_index import StationIndex, fold, rows_from_stop_areas, BUNDLED_INDEX
+from station_index import distance_km, parse_coordinates, parse_radius
+
+STOP_AREAS = [
+    {"id": "stop_area:SNCF:87722025", "name": "Lyon Part Dieu", "coord": {"lon": "4.859488", "lat": "45.760403"}},
+    {"id": "stop_area:SNCF:87723197", "name": "Lyon Perrache", "coord": {"lon": "4.826111", "lat": "45.749722"}},
+    {"id": "stop_area:SNCF:87739847", "name": "Lyon Saint-Exupéry TGV", "coord": {"lon": "5.079167", "lat": "45.726111"}},
+    {"id": "stop_area:SNCF:87686006", "name": "Paris Gare de Lyon", "coord": {"lon": "2.373456", "lat": "48.844444"}},
+    {"id": "stop_area:SNCF:87751008", "name": "Marseille St Charles", "coord": {"lon": "5.380694", "lat": "43.302778"}},
+]
+
+
+def make_index():
+    return StationIndex(rows_from_stop_areas(STOP_AREAS))
+
+
+def test_fold_strips_accents_and_punctuation():
+    assert fold("Lyon Saint-Exupéry TGV") == "lyon saint exupery tgv"
+    assert fold("Paris Gare de l'Est") == "paris gare de l est"
+    assert fold("Marseille St Charles") == "marseille saint charles"
+
+
+def test_exact_match_ranks_first():
+    results = make_index().search("lyon part dieu")
+    assert results[0]["id"] == "stop_area:SNCF:87722025"
+    assert results[0]["quality"] == 100
+    assert results[0]["coordinates"] == "4.859488;45.760403"
+
+
+def test_prefix_matches_before_word_matches():
+    ids = [s["id"] for s in make_index().search("Lyon")]
+    assert ids[-1] == "stop_area:SNCF:87686006"
+    assert len(ids) == 4
+
+
+def test_word_prefix_match_ignores_accents_and_order():
+    results = make_index().search("exupery lyon")
+    assert [s["id"] for s in results] == ["stop_area:SNCF:87739847"]
+
+
+def test_fuzzy_fallback_for_typos():
+    results = make_index().search("Marseile St Charle")
+    assert results[0]["id"] == "stop_area:SNCF:87751008"
+    assert make_index().search("Marseile St Charle", fuzzy=False) == []
+
+
+def test_count_limits_results():
+    assert len(make_index().search("lyon", count=2)) == 2
+
+
+def test_get_by_id():
+    index = make_index()
+    assert index.get("stop_area:SNCF:87723197")["name"] == "Lyon Perrache"
+    assert index.get("stop_area:SNCF:00000000") is None
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = tmp_path / "stations.tsv"
+    make_index().save(str(path))
+    loaded = StationIndex.load(str(path))
+    assert loaded.search("perrache")[0]["id"] == "stop_area:SNCF:87723197"
+
+
+def test_interrupted_save_keeps_the_old_index(tmp_path):
+    path = tmp_path / "stations.tsv"
+    make_index().save(str(path))
+    before = path.read_text()
+    broken = make_index()
+    broken.lons = broken.lons[:-1]  # The write fails on the last row
+    with pytest.raises(IndexError):
+        broken.save(str(path))
+    assert path.read_text() == before
+    assert os.listdir(tmp_path) == ["stations.tsv"]
+
+
+def test_bundled_index_is_loadable():
+    index = StationIndex.load(BUNDLED_INDEX)
+    assert index.get("stop_area:SNCF:87686006")["name"] == "Paris Gare de Lyon"
+
+
+def test_nearest_stations_by_distance():
+    index = make_index()
+    # Lyon Part-Dieu area: Part Dieu, then Perrache, then Saint-Exupéry
+    results = index.nearest(4.8357, 45.7640, count=3)
+    assert [r["name"] for r in results] == ["Lyon Perrache", "Lyon Part Dieu", "Lyon Saint-Exupéry TGV"]
+    assert results[0]["distance"] == round(distance_km(4.8357, 45.7640, 4.826111, 45.749722) * 1000)
+    assert [r["name"] for r in index.nearest(4.8357, 45.7640, count=5, radius_km=2.5)] == [
+        "Lyon Perrache", "Lyon Part Dieu"]
+    assert index.nearest(2.3522, 48.8566, radius_km=0.5) == []
+    # Far from everything: rings grow until the closest station is found
+    assert index.nearest(-1.55, 47.2, count=1)[0]["name"] == "Paris Gare de Lyon"
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(1)
+    rows = [(f"s{i}", f"stop_area:SNCF:{i}", f"S{i}", rng.uniform(-4.8, 8.2), rng.uniform(42.3, 51.1))
+            for i in range(500)]
+    index = StationIndex(rows)
+    for _ in range(100):
+        lon, lat = rng.uniform(-5, 9), rng.uniform(42, 51.5)
+        count, radius = rng.choice([1, 5, 20]), rng.choice([None, 10, 50])
+        ranked = sorted((distance_km(lon, lat, x, y), sid) for sid, x, y in zip(index.ids, index.lons, index.lats))
+        expected = [sid for d, sid in ranked if radius is None or d <= radius][:count]
+        assert [r["id"] for r in index.nearest(lon, lat, count, radius)] == expected
+
+
+def test_parse_coordinates_and_radius():
+    assert parse_coordinates("2.3522;48.8566") == (2.3522, 48.8566)
+    assert parse_coordinates("stop_area:SNCF:87686006") is None
+    assert parse_coordinates("200;48") is None
+    assert parse_radius("2km") == 2 and parse_radius("500m") == 0.5 and parse_radius("3") == 3
+    assert parse_radius("far") is None
+
+
+def test_plan_journey_snaps_coordinates(monkeypatch, capsys):
+    import plan_journey
+    import station_index
+    monkeypatch.setattr(station_index, "_index", make_index())
+    assert plan_journey.snap_location("4.8357;45.7640", 3) == "stop_area:SNCF:87723197"
+    assert "Lyon Perrache" in capsys.readouterr().err
+    assert plan_journey.snap_location("4.8357;45.7640", 0.1) == "4.8357;45.7640"
+    assert plan_journey.snap_location("stop_area:SNCF:87686006", 3) == "stop_area:SNCF:87686006"
+
+
+def test_bundled_index_answers_exact_names_only(monkeypatch):
+    import daemon
+    import station_index
+    monkeypatch.setattr(daemon, "forward_search", lambda query, count: daemon.UNAVAILABLE)
+    monkeypatch.setattr(station_index, "_index", make_index())
+    monkeypatch.setattr(station_index, "_index_is_complete", False)
+    assert station_index.search("Paris Gare de Lyon")[0]["id"] == "stop_area:SNCF:87686006"
+    # Prefix and word hits on the major stations leave the search to /places
+    assert station_index.search("Marseille") == []
+    assert station_index.search("Lyon") == []
+
+    monkeypatch.setattr(station_index, "_index_is_complete", True)
+    assert [s["name"] for s in station_index.search("Marseille")] == ["Marseille St Charles"]
@@ -0,0 +1,37 @@
+"""Unit tests for the fast Navitia timestamp parser."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+from datetime import datetime
+
+import pytest
+
+import timestamps
+from validate_datetime import validate_datetime
+
+
+@pytest.mark.parametrize("value", [
+    "20260210T140000", "20240229T235959", "20260229T000000", "20261310T140000",
+    "20260210T240000", "20260210 140000", "2026021T140000", "２０２６０２１０T140000",
+    "", None,
+])
+def test_matches_strptime(value):
+    try:
+        expected = datetime.strptime(value, timestamps.TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        expected = None
+    assert timestamps.parse_timestamp(value) == expected
+
+
+def test_results_are_memoized():
+    timestamps.parse_timestamp.cache_clear()
+    first = timestamps.parse_timestamp("20260210T140000")
+    assert timestamps.parse_timestamp("20260210T140000") is first
+    assert timestamps.parse_timestamp.cache_info().hits == 1
+
+
+def test_validate_datetime_uses_api_format():
+    assert validate_datetime("20260210T140000") == (True, "20260210T140000", None)
+    assert validate_datetime("20261310T140000")[0] is False
+    assert validate_datetime("2026-02-10 14:00", convert=True)[1] == "20260210T140000"
@@ -0,0 +1,116 @@
+"""Unit tests for the offline GTFS timetable (import and base_schedule boards)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import zipfile
+
+import pytest
+
+import get_departures
+import navitia
+import timetable
+
+PARIS = "stop_area:SNCF:87686006"
+DIJON = "stop_area:SNCF:87713040"
+LYON = "stop_area:SNCF:87722025"
+
+FEED = {
+    "stops.txt": """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+StopArea:OCE87686006,Paris Gare de Lyon,48.84,2.37,1,
+StopPoint:OCETrain TER-87686006,Paris Gare de Lyon,48.84,2.37,0,StopArea:OCE87686006
+StopArea:OCE87713040,Dijon,47.32,5.03,1,
+StopPoint:OCETrain TER-87713040,Dijon,47.32,5.03,0,StopArea:OCE87713040
+StopArea:OCE87722025,Lyon Part Dieu,45.76,4.86,1,
+StopPoint:OCETrain TER-87722025,Lyon Part Dieu,45.76,4.86,0,StopArea:OCE87722025
+""",
+    "routes.txt": """route_id,agency_id,route_short_name,route_long_name,route_type
+R1,SNCF,TER,Paris - Lyon,2
+""",
+    # WEEK runs Monday-Friday in February 2026, except Wednesday 11th;
+    # EXTRA only runs on Sunday 15th
+    "calendar.txt": """service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date
+WEEK,1,1,1,1,1,0,0,20260201,20260228
+""",
+    "calendar_dates.txt": """service_id,date,exception_type
+WEEK,20260211,2
+EXTRA,20260215,1
+""",
+    "trips.txt": """route_id,service_id,trip_id,trip_headsign,trip_short_name
+R1,WEEK,T1,17001,17001
+R1,WEEK,T2,17003,17003
+R1,EXTRA,T3,17005,17005
+""",
+    # T2 leaves Paris at 23:30 and reaches Lyon after midnight (25:10:00)
+    "stop_times.txt": """trip_id,arrival_time,departure_time,stop_id,stop_sequence
+T1,08:00:00,08:00:00,StopPoint:OCETrain TER-87686006,1
+T1,09:40:00,09:45:00,StopPoint:OCETrain TER-87713040,2
+T1,11:30:00,11:30:00,StopPoint:OCETrain TER-87722025,3
+T2,23:30:00,23:30:00,StopPoint:OCETrain TER-87686006,1
+T2,25:10:00,25:10:00,StopPoint:OCETrain TER-87722025,2
+T3,10:00:00,10:00:00,StopPoint:OCETrain TER-87686006,1
+T3,12:00:00,12:00:00,StopPoint:OCETrain TER-87722025,2
+""",
+}
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    feed = tmp_path / "gtfs.zip"
+    with zipfile.ZipFile(feed, "w") as z:
+        for name, content in FEED.items():
+            z.writestr(name, content)
+    counts = timetable.build(str(feed))
+    yield counts
+    timetable.close()
+
+
+def times(items, kind="departure"):
+    return [item["stop_date_time"][f"{kind}_date_time"] for item in items]
+
+
+def test_build_counts_and_info(built):
+    assert built == {"stops": 3, "services": 2, "trips": 3, "stop_times": 7}
+    meta = timetable.info()
+    assert meta["first_day"] == "20260202" and meta["last_day"] == "20260227"
+
+
+def test_departures_follow_the_calendar(built):
+    # Tuesday: both weekday trains; the terminus is the direction
+    tuesday = timetable.departures(PARIS, from_datetime="20260210T000000")
+    assert times(tuesday) == ["20260210T080000", "20260210T233000"]
+    assert tuesday[0]["display_informations"]["direction"] == "Lyon Part Dieu"
+    assert tuesday[0]["display_informations"]["headsign"] == "17001"
+    # Wednesday 11th is removed: the next departure is Thursday morning
+    assert times(timetable.departures(PARIS, 5, "20260211T090000")) == ["20260212T080000"]
+    # Sunday 15th only has the extra train
+    assert times(timetable.departures(PARIS, 5, "20260215T000000")) == ["20260215T100000"]
+
+
+def test_board_window_and_boundaries(built):
+    # A terminus has no departures; an origin has no arrivals
+    assert timetable.departures(LYON, from_datetime="20260210T000000") == []
+    assert timetable.arrivals(PARIS, from_datetime="20260210T000000") == []
+    # The 23:30 train reaches Lyon at 01:10 the next calendar day
+    arrivals = timetable.arrivals(LYON, 10, "20260211T000000")
+    assert times(arrivals, "arrival")[0] == "20260211T011000"
+    # Boards cover 24 hours
+    assert times(timetable.departures(DIJON, 10, "20260210T094500")) == ["20260210T094500"]
+
+
+def test_unknown_station_or_date_falls_back(built):
+    assert timetable.departures("stop_area:SNCF:00000000", from_datetime="20260210T000000") is None
+    assert timetable.departures(PARIS, from_datetime="20270101T000000") is None
+
+
+def test_navitia_answers_base_schedule_locally(built, monkeypatch):
+    def no_api(*args, **kwargs):
+        raise AssertionError("API called")
+
+    monkeypatch.setattr(navitia, "get_json", no_api)
+    items = navitia.get_departures(PARIS, "token", 2, "20260210T070000", "base_schedule")
+    assert times(items) == ["20260210T080000", "20260210T233000"]
+    assert "1. [TER] → Lyon Part Dieu\n   Departure: 08:00" in get_departures.format_output(items)
+    with pytest.raises(AssertionError):
+        navitia.get_departures(PARIS, "token", 2, "20260210T070000", "realtime")
@@ -0,0 +1,106 @@
+"""Unit tests for the travel time matrix (local one-to-many scans, Navitia fallback, output)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import pytest
+
+import errors
+import navitia
+import timetable
+import travel_matrix
+
+
+def area(n):
+    return f"stop_area:SNCF:8700000{n}"
+
+
+STATIONS = "ABC"
+
+# T1 A→B→C in the morning, T2 C→A at noon
+FEED = {
+    "stops.txt": "stop_id,stop_name,location_type,parent_station\n" + "".join(
+        f"StopArea:OCE8700000{i},{name},1,\nStopPoint:OCETrain-8700000{i},{name},0,StopArea:OCE8700000{i}\n"
+        for i, name in enumerate(STATIONS, 1)),
+    "routes.txt": "route_id,route_short_name,route_type\nR,TER,2\n",
+    "calendar.txt": ("service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date\n"
+                     "ALL,1,1,1,1,1,1,1,20260201,20260228\n"),
+    "trips.txt": "route_id,service_id,trip_id,trip_short_name\nR,ALL,T1,1\nR,ALL,T2,2\n",
+    "stop_times.txt": ("trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+                       "T1,08:00:00,08:00:00,StopPoint:OCETrain-87000001,1\n"
+                       "T1,09:00:00,09:00:00,StopPoint:OCETrain-87000002,2\n"
+                       "T1,10:00:00,10:00:00,StopPoint:OCETrain-87000003,3\n"
+                       "T2,12:00:00,12:00:00,StopPoint:OCETrain-87000003,1\n"
+                       "T2,13:30:00,13:30:00,StopPoint:OCETrain-87000001,2\n"),
+}
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "gtfs").mkdir()
+    for name, content in FEED.items():
+        (tmp_path / "gtfs" / name).write_text(content)
+    timetable.build(str(tmp_path / "gtfs"))
+    yield
+    timetable.close()
+
+
+def cells(rows):
+    return {(r["origin"][-1], r["destination"][-1]): (r["duration"], r["transfers"], r["error"]) for r in rows}
+
+
+def test_local_matrix_one_scan_per_origin(built, monkeypatch):
+    import planner
+    scans = []
+    original = planner._scan
+    monkeypatch.setattr(planner, "_scan", lambda *args: scans.append(args[1]) or original(*args))
+    stations = [area(1), area(2), area(3)]
+    rows = list(travel_matrix.matrix_rows(stations, stations, None, "20260210T070000",
+                                          "base_schedule", "local"))
+    assert len(scans) == 3
+    assert cells(rows) == {
+        ("1", "1"): (0, 0, None), ("1", "2"): (3600, 0, None), ("1", "3"): (7200, 0, None),
+        ("2", "1"): (16200, 1, None), ("2", "2"): (0, 0, None), ("2", "3"): (3600, 0, None),
+        ("3", "1"): (5400, 0, None), ("3", "2"): (None, None, None), ("3", "3"): (0, 0, None),
+    }
+
+
+def test_unanswered_pairs_fall_back_to_navitia(built, monkeypatch):
+    calls = []
+
+    def plan_journey(from_location, to_location, api_token, *args):
+        calls.append((from_location, to_location))
+        if to_location == "missing":
+            raise errors.NotFoundError(404, "unknown object")
+        return [{"departure_date_time": "20260210T071000", "arrival_date_time": "20260210T080000",
+                 "duration": 3000, "nb_transfers": 2}]
+
+    monkeypatch.setattr(navitia, "plan_journey", plan_journey)
+    destinations = [area(3), "2.35;48.85", "missing"]
+    rows = list(travel_matrix.matrix_rows([area(1)], destinations, "token", "20260210T070000",
+                                          "base_schedule", "local", fallback=True))
+    assert sorted(calls) == [(area(1), "2.35;48.85"), (area(1), "missing")]
+    assert cells(rows)[("1", "3")] == (7200, 0, None)
+    assert cells(rows)[("1", "5")] == (3000, 2, None)
+    assert cells(rows)[("1", "g")] == (None, None, "Station ID not found")
+
+    rows = list(travel_matrix.matrix_rows([area(1)], ["2.35;48.85"], None, "20260210T070000",
+                                          "base_schedule", "local", fallback=True))
+    assert rows[0]["error"] == "NAVITIA_API_TOKEN not set"
+
+
+def test_output_formats(built, capsys):
+    stations = [area(1), area(3)]
+    rows = list(travel_matrix.matrix_rows(stations, stations, None, "20260210T070000",
+                                          "base_schedule", "local"))
+    grid = travel_matrix.format_matrix(rows, stations, stations)
+    assert grid.splitlines()[:3] == [
+        "              87000001     87000003",
+        "87000001             0  2h 0min (0)",
+        "87000003  1h 30min (0)            0",
+    ]
+    assert travel_matrix.print_rows(rows, "csv") == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == ",".join(travel_matrix.FIELDS)
+    assert f"{area(1)},{area(3)},20260210T080000,20260210T100000,7200,0," in lines
@@ -0,0 +1,89 @@
+"""Unit tests for bulk station ID validation (station index first, API for unknown IDs)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import pytest
+
+import errors
+import navitia
+import station_index
+import validate_station_id
+from station_index import StationIndex, fold
+
+KNOWN = [("stop_area:SNCF:87686006", "Paris Gare de Lyon", "2.373456", "48.844444"),
+         ("stop_area:SNCF:87722025", "Lyon Part Dieu", "4.859488", "45.760403")]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Index of KNOWN stations; the API knows 87751008 and times out on 87000000."""
+    monkeypatch.setattr(station_index, "_index", StationIndex((fold(n), i, n, x, y) for i, n, x, y in KNOWN))
+    calls = []
+
+    def get_stop_area(station_id, api_token):
+        calls.append(station_id)
+        if station_id.endswith("87751008"):
+            return {"id": station_id, "name": "Marseille St Charles", "coord": {"lon": "5.380694", "lat": "43.302778"}}
+        if station_id.endswith("87000000"):
+            raise errors.APITimeoutError("slow")
+        raise errors.NotFoundError(404, "unknown object")
+
+    monkeypatch.setattr(navitia, "get_stop_area", get_stop_area)
+    return calls
+
+
+def test_known_ids_skip_the_api(api):
+    ids = [KNOWN[0][0], "stop_area:SNCF:87751008", "Paris", "stop_area:SNCF:99999999",
+           KNOWN[1][0], "stop_area:SNCF:87000000"]
+    results = {r["id"]: r for r in validate_station_id.validate_many(ids, "token")}
+    assert sorted(api) == ["stop_area:SNCF:87000000", "stop_area:SNCF:87751008", "stop_area:SNCF:99999999"]
+    assert results[KNOWN[0][0]] == {"id": KNOWN[0][0], "valid": True, "name": "Paris Gare de Lyon",
+                                    "coordinates": "2.373456;48.844444", "source": "index", "error": None}
+    assert results["stop_area:SNCF:87751008"]["coordinates"] == "5.380694;43.302778"
+    assert results["stop_area:SNCF:87751008"]["source"] == "api"
+    assert (results["Paris"]["valid"], results["Paris"]["error"]) == (False, "Invalid format")
+    assert (results["stop_area:SNCF:99999999"]["valid"], results["stop_area:SNCF:99999999"]["error"]) == (
+        False, "Station ID not found")
+    assert (results["stop_area:SNCF:87000000"]["valid"], results["stop_area:SNCF:87000000"]["error"]) == (
+        None, "API timeout")
+
+
+def test_not_found_is_told_by_exception_type(api, monkeypatch):
+    import batch
+    monkeypatch.setattr(batch, "describe_error", lambda error: "reworded")
+    results = {r["id"]: r for r in validate_station_id.validate_many(
+        ["stop_area:SNCF:99999999", "stop_area:SNCF:87000000"], "token")}
+    assert results["stop_area:SNCF:99999999"]["valid"] is False
+    assert (results["stop_area:SNCF:87000000"]["valid"], results["stop_area:SNCF:87000000"]["error"]) == (
+        None, "reworded")
+
+
+def test_without_token_unknown_ids_are_unchecked(api):
+    results = list(validate_station_id.validate_many([KNOWN[0][0], "stop_area:SNCF:87751008"], None))
+    assert [(r["valid"], r["error"]) for r in results] == [(True, None), (None, "NAVITIA_API_TOKEN not set")]
+    assert api == []
+    assert validate_station_id.format_result(results[0]) == (
+        "✅ stop_area:SNCF:87686006  Paris Gare de Lyon (2.373456;48.844444)")
+
+
+def test_stale_index_is_refreshed(api, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(station_index, "refresh", lambda token: refreshed.append(token) or 2)
+    monkeypatch.setattr(station_index, "index_age", lambda: station_index.INDEX_MAX_AGE - 1)
+    validate_station_id.refresh_index("token")
+    assert refreshed == []
+    monkeypatch.setattr(station_index, "index_age", lambda: station_index.INDEX_MAX_AGE + 1)
+    validate_station_id.refresh_index(None)
+    validate_station_id.refresh_index("token")
+    assert refreshed == ["token"]
+
+
+def test_missing_index_is_built_on_first_bulk_use(api, monkeypatch, capsys):
+    refreshed = []
+    monkeypatch.setattr(station_index, "refresh", lambda token: refreshed.append(token) or 2)
+    monkeypatch.setattr(station_index, "index_age", lambda: None)
+    validate_station_id.refresh_index(None)
+    assert refreshed == [] and "--refresh-index" in capsys.readouterr().err
+    validate_station_id.refresh_index("token")
+    assert refreshed == ["token"]
@@ -0,0 +1,71 @@
+"""Unit tests for the board watch mode (diffing and adaptive polling)."""
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'sncf-train-schedule', 'skills', 'plan-journey', 'scripts'))
+
+import errors
+import watch
+
+
+def departure(trip, time="20260210T140000", base=None, cancelled=False, platform=None, linked=True):
+    item = {
+        "display_informations": {"code": "TER", "direction": "Melun", "headsign": trip,
+                                 "links": [{"type": "disruption", "id": f"disruption:{trip}"}]},
+        "links": [{"type": "vehicle_journey", "id": f"vj:{trip}"}] if linked else [],
+        "stop_date_time": {"departure_date_time": time, "arrival_date_time": time,
+                           "base_departure_date_time": base or time,
+                           "base_arrival_date_time": base or time,
+                           "additional_informations": ["no_departing"] if cancelled else []},
+        "stop_point": {"id": "stop_point:SNCF:1"},
+    }
+    if platform:
+        item["stop_point"]["platform_code"] = platform
+    return item
+
+
+def events_of(before, after):
+    return [(e["event"], e["vehicle_journey"]) for e in watch.diff(
+        watch.snapshot(before, "departure"), watch.snapshot(after, "departure"), "departure")]
+
+
+def test_diff_reports_only_changes():
+    before = [departure("1"), departure("2"), departure("3"), departure("4", platform="A")]
+    after = [departure("1"), departure("2", time="20260210T140500", base="20260210T140000"),
+             departure("3", cancelled=True), departure("4", platform="B"), departure("5")]
+    assert events_of(before, after) == [
+        ("delay", "vj:2"), ("cancelled", "vj:3"), ("platform", "vj:4"), ("added", "vj:5")]
+    assert events_of(after, after[1:]) == [("removed", "vj:1")]
+    assert events_of(after, after) == []
+
+
+def test_trains_without_vehicle_journey_are_keyed_on_scheduled_time():
+    before = [departure("1", linked=False)]
+    after = [departure("1", time="20260210T141000", base="20260210T140000", linked=False)]
+    assert events_of(before, after) == [("delay", "TER:1:20260210T140000")]
+
+
+def test_delay_event_format():
+    before = watch.snapshot([departure("2")], "departure")
+    after = watch.snapshot([departure("2", time="20260210T140500", base="20260210T140000")], "departure")
+    event, = watch.diff(before, after, "departure")
+    assert event["previous"] == "" and event["disruption"] == "+5min"
+    assert watch.format_event(event) == "~ 14:05 [TER] Melun (on time → +5min)"
+    assert '"event": "delay"' in watch.format_event(event, "json")
+
+
+def test_polling_backs_off_while_unchanged():
+    boards = iter([[departure("1")]] * 5 + [[departure("1"), departure("2")]])
+    waits = []
+    polls = list(watch.watch(lambda: next(boards), "departure", 10, polls=6, sleep=waits.append))
+    assert [len(events) for events in polls] == [1, 0, 0, 0, 0, 1]
+    assert waits == [10, 15, 22.5, 33.75, 40]
+
+
+def test_transient_errors_are_events():
+    def fetch():
+        raise errors.APITimeoutError("slow")
+
+    waits = []
+    polls = list(watch.watch(fetch, "departure", 10, polls=2, sleep=waits.append))
+    assert polls == [[{"event": "error", "error": "API timeout"}]] * 2
+    assert waits == [15]